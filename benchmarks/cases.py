@@ -0,0 +1,249 @@
+"""
+benchmark cases of `benchmarks.run`.
+every case is a function returning a callable to time, its setup runs outside of the measurements.
+"""
+import dataclasses as dtc
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Callable
+
+import numpy as np
+from scipy.stats import truncnorm
+
+from promisces.models.literature import literature_store
+from promisces.models.matrix import Matrices
+from promisces.models.mixture import Mixture
+from promisces.models.reference import Reference
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substances
+from promisces.models.treatment import Treatments, TreatmentTrain
+from promisces.removal_processes import (
+    apply_generic_process,
+    apply_mixture_process,
+    apply_separation_process,
+    apply_separation_sludge_process,
+    clear_grid_caches,
+)
+from promisces.rng import scenario_seeds
+from promisces.simulate_removal import simulate_mixture_sweep, simulate_removal, simulate_removal_batch
+
+
+@dtc.dataclass
+class Case:
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    # cases marked as `full` only run without --quick
+    full: bool = False
+
+
+CASES: list[Case] = []
+
+
+def case(name: str, full: bool = False):
+    def register(setup):
+        CASES.append(Case(name, setup, full))
+        return setup
+
+    return register
+
+
+GENERIC_TREATMENTS = [
+    Treatments.wwtt, Treatments.wwco, Treatments.wwuf, Treatments.wwro,
+    Treatments.wwnf, Treatments.wwel, Treatments.wwmb, Treatments.wetl,
+]
+SUBSTANCES = [Substances.pfoa, Substances.pfos, Substances.pfba, Substances.pfhxa]
+MATRICES = [Matrices.rww, Matrices.tww, Matrices.suw]
+
+
+def write_synthetic_literature(data_dir: str, seed: int = 0):
+    """literature tables with the layout of `data/`, so that the benchmarks don't need the real data"""
+    rng = np.random.default_rng(seed)
+    with open(os.path.join(data_dir, "process_removal_lit.csv"), "w", encoding="cp1252") as f:
+        f.write("substance_id;treatment_id;removal_percent\n")
+        for substance, treatment in itertools.product(SUBSTANCES, GENERIC_TREATMENTS + [Treatments.wwsl]):
+            for value in rng.uniform(0, 99, rng.integers(1, 6)):
+                f.write(f"{substance.id};{treatment.id};{value:.1f}\n")
+    with open(os.path.join(data_dir, "starting_concentration.csv"), "w", encoding="cp1252") as f:
+        f.write("substance_id;matrix_id;min_value_ng_l;point_value_ng_l;max_value_ng_l\n")
+        for substance, matrix in itertools.product(SUBSTANCES, MATRICES):
+            f.write(f"{substance.id};{matrix.id};{rng.uniform(1, 10):.2f};;{rng.uniform(20, 100):.2f}\n")
+    with open(os.path.join(data_dir, "reference_lit.csv"), "w", encoding="cp1252") as f:
+        f.write("substance_id;matrix_id;reference_value_ng_l;reference_id;year;comments\n")
+        for substance in SUBSTANCES:
+            f.write(f"{substance.id};{Matrices.tww.id};{rng.uniform(1, 100):.2f};bench;2024;synthetic\n")
+
+
+_data_dir = tempfile.TemporaryDirectory(prefix="promisces-bench-")
+write_synthetic_literature(_data_dir.name)
+literature_store.reload(_data_dir.name)
+
+
+def generic_scenario(train_length: int) -> Scenario:
+    return Scenario(
+        f"generic-{train_length}",
+        Matrices.rww,
+        Substances.pfoa,
+        TreatmentTrain(GENERIC_TREATMENTS[:train_length]),
+        StartingConcentration(np.array([1., 100.])),
+        Reference("bench", 10, 2024, "")
+    )
+
+
+def mixture_scenario() -> Scenario:
+    return Scenario(
+        "mixture",
+        Matrices.rww,
+        Substances.pfoa,
+        TreatmentTrain([
+            Treatments.wwtt,
+            Treatments.dilsw.clone(mixture=Mixture(0.7, 0.05, 1, 0.5)),
+            Treatments.npbk,
+        ]),
+        StartingConcentration(np.array([1., 100.])),
+        Reference("bench", 10, 2024, "")
+    )
+
+
+for _n_runs in (1_000, 10_000, 100_000, 1_000_000, 10_000_000):
+    @case(f"simulate_removal[n_runs={_n_runs:.0e}]", full=_n_runs > 100_000)
+    def _(n_runs=_n_runs):
+        scenario = generic_scenario(3)
+        return lambda: simulate_removal(scenario, n_runs, 1000, seed=0)
+
+for _resolution in (100, 1_000, 10_000):
+    @case(f"simulate_removal[resolution={_resolution}]")
+    def _(resolution=_resolution):
+        scenario = generic_scenario(3)
+
+        def run():
+            # measures the grids as well, not only the cached path
+            clear_grid_caches()
+            return simulate_removal(scenario, 10_000, resolution, seed=0)
+
+        return run
+
+for _train_length in (1, 2, 4, 8):
+    @case(f"simulate_removal[train_length={_train_length}]")
+    def _(train_length=_train_length):
+        scenario = generic_scenario(train_length)
+        return lambda: simulate_removal(scenario, 10_000, 1000, seed=0)
+
+
+@case("simulate_removal[mixture train]")
+def _():
+    scenario = mixture_scenario()
+    return lambda: simulate_removal(scenario, 10_000, 1000, seed=0)
+
+
+@case("simulate_mixture_sweep[n_mixtures=32]")
+def _():
+    scenario = mixture_scenario()
+    mixtures = [Mixture(x2, 0.05, c2, 0.5) for x2 in np.linspace(0.1, 0.9, 8) for c2 in (0, 1, 5, 10)]
+    return lambda: simulate_mixture_sweep(scenario, mixtures, n_runs=10_000, seed=0)
+
+
+def scenario_grid(n_scenarios: int) -> list[Scenario]:
+    """trains of four generic treatments (tertiary treatment, then three of the next five) for every substance"""
+    trains = [(GENERIC_TREATMENTS[0], *p) for p in itertools.permutations(GENERIC_TREATMENTS[1:6], 3)]
+    return [
+        Scenario(
+            f"grid-{i}",
+            Matrices.rww,
+            SUBSTANCES[i % len(SUBSTANCES)],
+            TreatmentTrain(list(trains[i % len(trains)])),
+            StartingConcentration(np.array([1., 100.])),
+            Reference("bench", 10, 2024, "")
+        )
+        for i in range(n_scenarios)
+    ]
+
+
+# the serial case is the reference of the batch case, both give the same results
+@case("simulate_removal[grid of 512, serial]")
+def _():
+    scenarios = scenario_grid(512)
+    seeds = scenario_seeds(0, len(scenarios))
+    return lambda: [simulate_removal(s, 1_000, 1000, seed=seed) for s, seed in zip(scenarios, seeds)]
+
+
+@case("simulate_removal_batch[grid of 512]")
+def _():
+    scenarios = scenario_grid(512)
+    return lambda: simulate_removal_batch(scenarios, 1_000, 1000, max_batch_size=512, seed=0)
+
+
+N_KERNEL_RUNS = 100_000
+
+
+def kernel_input() -> np.ndarray:
+    return np.sort(np.random.default_rng(0).uniform(1, 100, N_KERNEL_RUNS))[::-1]
+
+
+@case("process[generic]")
+def _():
+    input_c, lit_rmv, cs_rmv = kernel_input(), RemovalPercent(np.array([40, 60, 70])), RemovalPercent(np.array([]))
+    return lambda: apply_generic_process(input_c, lit_rmv, cs_rmv, 1000, n_runs=N_KERNEL_RUNS,
+                                         rng=np.random.default_rng(0))
+
+
+@case("process[mixture]")
+def _():
+    input_c = kernel_input()
+    return lambda: apply_mixture_process(input_c, 0.7, 0.05, 1, 0.5, rng=np.random.default_rng(0))
+
+
+@case("process[separation]")
+def _():
+    input_c = kernel_input()
+    return lambda: apply_separation_process(input_c, 0.3, 0.05, 1, 0.5, truncnorm, rng=np.random.default_rng(0))
+
+
+@case("process[separation_sludge]")
+def _():
+    input_c, lit_rmv, cs_rmv = kernel_input(), RemovalPercent(np.array([40, 60, 70])), RemovalPercent(np.array([]))
+    return lambda: apply_separation_sludge_process(input_c, lit_rmv, cs_rmv, 1000, rng=np.random.default_rng(0))
+
+
+@case("from_lit[cold]")
+def _():
+    def run():
+        literature_store.invalidate()
+        return [
+            (RemovalPercent.from_lit(t, s), StartingConcentration.from_lit(s, m), Reference.from_lit(m, s))
+            for t, s, m in itertools.product(GENERIC_TREATMENTS, SUBSTANCES, MATRICES)
+        ]
+
+    return run
+
+
+@case("from_lit[warm]")
+def _():
+    literature_store.reload()
+    return lambda: [
+        (RemovalPercent.from_lit(t, s), StartingConcentration.from_lit(s, m), Reference.from_lit(m, s))
+        for t, s, m in itertools.product(GENERIC_TREATMENTS, SUBSTANCES, MATRICES)
+    ]
+
+
+@case("export_excel")
+def _():
+    result = simulate_removal(generic_scenario(4), 10_000, 1000, seed=0)
+    path = os.path.join(_data_dir.name, "export.xlsx")
+
+    def run():
+        result.invalidate_cache()
+        result.export_excel(path)
+
+    return run
+
+
+@case("import[promisces.simulate_removal]")
+def _():
+    # a fresh interpreter, as a worker process would start
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return lambda: subprocess.run([sys.executable, "-c", "import promisces.simulate_removal"], cwd=root, check=True)
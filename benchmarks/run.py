@@ -0,0 +1,93 @@
+"""
+offline benchmark runner for promisces.
+
+    python -m benchmarks.run --quick                     # small sizes only
+    python -m benchmarks.run --compare                   # against the stored benchmarks/baseline.json
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare other.json --tolerance 0.25
+
+reports the best wall time over `--repeat` runs and the peak memory traced by tracemalloc during one extra run.
+`--compare` exits with status 1 if a case got slower or needs more memory than the baseline allows.
+the stored baseline was measured on the machine it names, regenerate it with `--save` after an intended change
+or to compare on another machine.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.cases import CASES
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def measure(run, repeat: int) -> dict:
+    run()  # warm up imports and caches
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times += [time.perf_counter() - start]
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return dict(best_s=min(times), median_s=statistics.median(times), peak_mb=peak / 2 ** 20)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ("best_s", "peak_mb"):
+            if result[key] > baseline[name][key] * (1 + tolerance):
+                regressions += [f"{name}: {key} {baseline[name][key]:.4g} -> {result[key]:.4g}"]
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="skip the large cases")
+    parser.add_argument("--filter", default=None, help="regular expression on the case names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", default=None, help="write the results to this json file")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, default=None,
+                        help="baseline json file to compare the results to (default: the stored baseline)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for case in CASES:
+        if (args.quick and case.full) or (args.filter and not re.search(args.filter, case.name)):
+            continue
+        results[case.name] = measure(case.setup(), args.repeat)
+        r = results[case.name]
+        print(f"{case.name:<45} best {r['best_s'] * 1e3:10.2f} ms  median {r['median_s'] * 1e3:10.2f} ms"
+              f"  peak {r['peak_mb']:9.1f} MB", flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(dict(machine=platform.platform(), python=platform.python_version(), results=results),
+                      f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != platform.platform():
+            print(f"baseline measured on {baseline.get('machine')}, timings may not be comparable", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,64 @@
-from .models import *
-from .plots import *
-from .removal_processes import *
-from .simulate_removal import *
+"""
+the public names of the submodules are imported on first access (PEP 562), so that `import promisces` and
+worker processes only load NumPy and the parts of SciPy the simulation needs.
+plotting, pandas-based exports and `scipy.stats` are loaded when they are used.
+"""
+import importlib
+
+from .models import exports as _model_exports
+
+exports = {
+    **{f".models{module}": names for module, names in _model_exports.items()},
+    ".plots": ("er_profiles", "spider_plot"),
+    ".removal_processes": (
+        "ProcessType", "DominantDistribution", "ProcessResult", "CompactProcessResult",
+        "factor_grid_cache", "prior_cache", "prior_fit_cache", "likelihood_cache", "sampler_cache",
+        "factor_grid", "likelihood_params", "to_likelihood", "prior_beta_fit", "prior_beta", "grid_cache_info",
+        "clear_grid_caches", "generic_posterior", "AdaptiveGrid", "adaptive_posterior", "posterior_sampler",
+        "sorted_uniforms", "apply_generic_process", "apply_generic_process_ranked",
+        "mixture_draws", "apply_mixture_process", "apply_generic_process_batch", "apply_mixture_process_batch",
+        "apply_separation_process", "apply_separation_sludge_process",
+    ),
+    ".simulate_removal": (
+        "SUMMARY_PERCENTILES", "ResultSummary", "Convergence", "SimulationResult", "prefix_cache", "result_key",
+        "simulate_removal", "simulate_removal_adaptive", "simulate_removal_ranked", "simulate_mixture_sweep",
+        "simulate_removal_batch",
+    ),
+    ".parallel": ("run_scenarios",),
+    ".rng": ("SeedLike", "as_seed_sequence", "child_seed", "scenario_seeds", "simulation_rngs"),
+    ".streaming": ("QuantileSketch", "StageStatistics", "StreamingResult", "simulate_removal_streaming"),
+    ".storage": (
+        "FORMAT", "VERSION", "METADATA_FILE", "INDEX_FILE", "save_result", "load_result", "ResultDirectory",
+        "save_results", "load_results", "ResultCache",
+    ),
+    ".sensitivity": (
+        "INPUT", "Factor", "default_factors", "perturb", "exceedance_probability", "SensitivityResult",
+        "sobol_indices",
+    ),
+    ".search": (
+        "MIXTURE_SDS", "TrainCandidate", "SearchResult", "stage_factors", "enumerate_trains", "search_trains",
+    ),
+    ".timing": (
+        "StageTiming", "StageHook", "add_stage_hook", "remove_stage_hook", "StageTimer", "stage", "timings_frame",
+    ),
+}
+_modules = {name: module for module, names in exports.items() for name in names}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name: str):
+    if name not in _modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_modules[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
+
+
+# the function shadows its module, as with the star imports before.
+# importing the module sets the attribute of the package, bind the function after it.
+from .simulate_removal import simulate_removal
@@ -0,0 +1,5 @@
+import sys
+
+from promisces.cli import main
+
+sys.exit(main())
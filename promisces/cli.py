@@ -0,0 +1,143 @@
+import argparse
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, Callable, TextIO
+
+import numpy as np
+
+from promisces.config import build_scenarios, load_config
+from promisces.models.literature import literature_store
+from promisces.parallel import run_scenarios
+from promisces.storage import ResultCache
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SUMMARY_FILE = "summary.csv"
+
+
+class ProgressReporter:
+    """prints the number of finished scenarios, the elapsed time and the estimated time left"""
+
+    def __init__(self, stream: TextIO | None = None, clock: Callable[[], float] = time.perf_counter):
+        self.stream = stream if stream is not None else sys.stderr
+        self.clock = clock
+        self.start = clock()
+
+    def __call__(self, n_done: int, n_total: int):
+        elapsed = self.clock() - self.start
+        eta = elapsed / n_done * (n_total - n_done) if n_done else float("nan")
+        self.stream.write(
+            f"\r{n_done}/{n_total} scenarios ({n_done / n_total:.0%}), "
+            f"elapsed {_format_seconds(elapsed)}, eta {_format_seconds(eta)}"
+        )
+        if n_done == n_total:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def _format_seconds(seconds: float) -> str:
+    if np.isnan(seconds):
+        return "--:--"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def summary_frame(results) -> "pd.DataFrame":
+    """one row per result with the summary of its final concentration and the reference value"""
+    import pandas as pd
+    rows = []
+    for result in results:
+        scenario = result.scenario
+        final = result.summary.output_c.iloc[-1]
+        rows += [dict(
+            name=scenario.name,
+            input_matrix=scenario.input_matrix.id,
+            substance=scenario.substance.id,
+            treatment_train=" ".join(t.id for t in scenario.treatment_train),
+            reference_ng_l=scenario.reference.ref_value_ng_l,
+            exceedance=float((result.final_concentration > scenario.reference.ref_value_ng_l).mean()),
+            **final.to_dict(),
+        )]
+    return pd.DataFrame(rows)
+
+
+def run(args: argparse.Namespace) -> int:
+    config = load_config(args.config)
+    settings = dict(config.get("run", {}))
+    for key in ("n_runs", "resolution", "seed", "workers", "chunk_size", "output", "cache"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    if "literature" in config:
+        literature_store.data_dir = config["literature"]
+
+    scenarios = build_scenarios(config)
+    output = settings.get("output", "results")
+    if not args.quiet:
+        sys.stderr.write(f"running {len(scenarios)} scenarios, writing to '{output}'\n")
+    results = run_scenarios(
+        scenarios,
+        workers=settings.get("workers"),
+        n_runs=settings.get("n_runs", 10000),
+        rmv_factor_resolution=settings.get("resolution", 1000),
+        chunk_size=settings.get("chunk_size", 8),
+        seed=settings.get("seed"),
+        progress=None if args.quiet else ProgressReporter(),
+        cache=ResultCache(settings["cache"], int(settings.get("cache_max_gb", 10) * 2 ** 30))
+        if "cache" in settings else None,
+        output=output,
+    )
+    summary_frame(results).to_csv(os.path.join(output, SUMMARY_FILE), index=False)
+    return 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    from promisces.service import serve
+    if args.literature is not None:
+        literature_store.data_dir = args.literature
+    sys.stderr.write(f"serving on http://{args.host}:{args.port}\n")
+    serve(args.host, args.port, args.workers)
+    return 0
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m promisces", description="promisces removal simulations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser(
+        "run",
+        help="simulate a grid of scenarios on a pool of worker processes",
+        description="simulates every scenario of the grid in CONFIG and writes the results as they are finished, "
+                    "in the layout of `promisces.storage.save_results`, plus a summary.csv of the final "
+                    "concentrations. "
+                    "the options override the [run] table of the configuration."
+    )
+    run_parser.add_argument("config", help="scenario grid (.json, .toml, .yaml)")
+    run_parser.add_argument("-o", "--output", help="output directory (default: results)")
+    run_parser.add_argument("-n", "--n-runs", dest="n_runs", type=int, help="Monte Carlo runs per scenario")
+    run_parser.add_argument("-r", "--resolution", type=int, help="removal factor resolution")
+    run_parser.add_argument("-s", "--seed", type=int, help="seed of the batch")
+    run_parser.add_argument("-w", "--workers", type=int, help="worker processes (default: number of CPUs)")
+    run_parser.add_argument("--chunk-size", dest="chunk_size", type=int, help="scenarios per task")
+    run_parser.add_argument("--cache", help="result cache directory, reused by later runs with the same seed")
+    run_parser.add_argument("-q", "--quiet", action="store_true", help="don't report progress")
+    run_parser.set_defaults(handler=run)
+
+    serve_parser = commands.add_parser(
+        "serve",
+        help="serve simulations over HTTP/JSON with warm caches",
+        description="runs `promisces.service.SimulationService` until interrupted: "
+                    "GET /health and POST /simulate with a JSON scenario definition."
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    serve_parser.add_argument("-p", "--port", type=int, default=8765, help="port (default: 8765)")
+    serve_parser.add_argument("-w", "--workers", type=int, help="simulation threads")
+    serve_parser.add_argument("--literature", help="directory of the literature tables")
+    serve_parser.set_defaults(handler=serve)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parser().parse_args(argv)
+    return args.handler(args)
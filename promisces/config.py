@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+
+from promisces.models.mixture import Mixture
+from promisces.models.reference import Reference
+from promisces.models.matrix import Matrix
+from promisces.models.registry import registry
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substance, SubstanceGroup
+from promisces.models.treatment import Treatment, TreatmentTrain
+
+
+def load_config(path: str) -> dict:
+    """reads a scenario grid from a .json, .toml or .yaml/.yml file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path) as f:
+            return json.load(f)
+    if extension == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("reading YAML configurations requires PyYAML (pip install pyyaml)") from e
+        with open(path) as f:
+            return yaml.safe_load(f)
+    raise ValueError(f"unsupported configuration format '{extension}', expected .json, .toml, .yaml or .yml")
+
+
+def _mixture(data: dict) -> Mixture:
+    if "x2_min" in data:
+        return Mixture.from_minmax(data["x2_min"], data["x2_max"], data["c2_min"], data["c2_max"])
+    return Mixture(**data)
+
+
+def _treatment(entry: str | dict) -> Treatment:
+    """a `Treatments` id, or a table with an `id` and optionally `removal`, `mixture` and `with_lit_data`"""
+    if isinstance(entry, str):
+        return registry.treatment(entry).clone()
+    treatment = registry.treatment(entry["id"]).clone()
+    if "with_lit_data" in entry:
+        treatment.with_lit_data = entry["with_lit_data"]
+    if "removal" in entry:
+        treatment.with_removal(RemovalPercent(np.array(entry["removal"], dtype=float)))
+    if "mixture" in entry:
+        treatment.with_mixture(_mixture(entry["mixture"]))
+    return treatment
+
+
+def _substances(entry: str | dict) -> list[Substance]:
+    """a `Substances` id, or a table with the `group` of the substances (a `SubstanceGroup` value)"""
+    if isinstance(entry, str):
+        return [registry.substance(entry)]
+    return list(registry.substance_groups[SubstanceGroup(entry["group"])])
+
+
+def build_scenarios(config: dict) -> list[Scenario]:
+    """
+    the scenarios of every combination of `input_matrices`, `substances`, `trains`, `starting_concentrations`
+    and `references` (see `Scenario.from_grid`). matrices, substances and treatments are given by id,
+    substances also by group. starting concentrations are lists of values and references tables of `Reference`
+    fields, both default to the literature values (`null`).
+    all combinations of input matrices and trains are validated at once before any scenario is built.
+    """
+    matrices = [registry.matrix(id) for id in config["input_matrices"]]
+    trains = [TreatmentTrain([_treatment(entry) for entry in train]) for train in config["trains"]]
+    for train in trains:
+        train.validate_mixtures()
+    _validate_matrices(matrices, trains)
+    return list(Scenario.from_grid(
+        config.get("name", "scenario"),
+        matrices,
+        [substance for entry in config["substances"] for substance in _substances(entry)],
+        trains,
+        [
+            StartingConcentration(np.array(values, dtype=float)) if values is not None else None
+            for values in config.get("starting_concentrations", [None])
+        ],
+        [Reference(**ref) if ref is not None else None for ref in config.get("references", [None])],
+    ))
+
+
+def _validate_matrices(matrices: list[Matrix], trains: list[TreatmentTrain]):
+    """every train for every input matrix in the transition table of the registry"""
+    indices = registry.resolve([[t.id for t in train] for train in trains])
+    n_trains = len(trains)
+    result = registry.validate(
+        np.repeat([registry.matrix_index[m.id] for m in matrices], n_trains), np.tile(indices, (len(matrices), 1))
+    )
+    for k in np.flatnonzero(~result.valid):
+        # the error of the treatment train names the treatment and the expected matrices
+        trains[k % n_trains].validate_matrices(matrices[k // n_trains])
+
+
+def build_scenario(data: dict) -> Scenario:
+    """
+    a single scenario from a table with `input_matrix`, `substance`, `train` and optionally `name`,
+    `starting_concentration` and `reference`, in the format of `build_scenarios`
+    """
+    train = TreatmentTrain([_treatment(entry) for entry in data["train"]])
+    train.validate_mixtures()
+    start_c, reference = data.get("starting_concentration"), data.get("reference")
+    return Scenario(
+        data.get("name", "scenario"),
+        registry.matrix(data["input_matrix"]),
+        registry.substance(data["substance"]),
+        train,
+        StartingConcentration(np.array(start_c, dtype=float)) if start_c is not None else None,
+        Reference(**reference) if reference is not None else None,
+    )
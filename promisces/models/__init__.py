@@ -1,10 +1,34 @@
-from .array_container import *
-from .matrix import *
-from .mixture import *
-from .starting_concentration import *
-from .substance import *
-from .reference import *
-from .treatment import *
-from .removal_percent import *
-from .scenario import *
-from .case_study import *
+"""
+the models are imported on first access of one of their names (PEP 562), so that importing a single model
+doesn't load the others. `case_study` is only loaded when it is imported explicitly.
+"""
+import importlib
+
+exports = {
+    ".array_container": ("ArrayContainer",),
+    ".literature": ("LiteratureStore", "literature_store"),
+    ".matrix": ("Matrix", "Matrices"),
+    ".mixture": ("Mixture",),
+    ".starting_concentration": ("StartingConcentration",),
+    ".substance": ("SubstanceGroup", "Substance", "Substances"),
+    ".reference": ("Reference",),
+    ".treatment": ("TreatmentGroup", "Treatment", "TreatmentTrain", "Treatments"),
+    ".removal_percent": ("RemovalPercent",),
+    ".scenario": ("Scenario",),
+    ".registry": ("TrainValidation", "Registry", "registry"),
+}
+_modules = {name: module for module, names in exports.items() for name in names}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name: str):
+    if name not in _modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_modules[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -1,3 +1,5 @@
+import hashlib
+
 import numpy as np
 import numpy.lib
 
@@ -14,6 +16,11 @@ class ArrayContainer(numpy.lib.mixins.NDArrayOperatorsMixin):
     def __len__(self):
         return len(self.arr)
 
+    def digest(self) -> str:
+        """content hash of the values, equal for arrays holding the same numbers"""
+        arr = np.ascontiguousarray(self.arr, dtype=float)
+        return hashlib.blake2b(arr.tobytes(), digest_size=16).hexdigest()
+
     def __array__(self, dtype=None, copy=None):
         if copy is False:
             return self.arr.astype(dtype)
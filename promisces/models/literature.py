@@ -0,0 +1,126 @@
+import os
+import threading
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class LiteratureStore:
+    """
+    parses the literature tables in `data_dir` once and indexes them by substance and treatment/matrix ids.
+    tables are loaded lazily on first access. call `reload()` after the csv files changed on disk,
+    or `invalidate()` to drop the parsed tables until they are needed again.
+    """
+
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+        self._lock = threading.RLock()
+        self._removals: dict[tuple[str, str], np.ndarray] | None = None
+        self._starting_concentrations: dict[tuple[str, str], np.ndarray] | None = None
+        self._references: dict[tuple[str, str], list[tuple]] | None = None
+
+    def invalidate(self):
+        with self._lock:
+            self._removals = None
+            self._starting_concentrations = None
+            self._references = None
+
+    def reload(self, data_dir: str | None = None):
+        with self._lock:
+            if data_dir is not None:
+                self.data_dir = data_dir
+            self.invalidate()
+            self._load_removals()
+            self._load_starting_concentrations()
+            self._load_references()
+
+    def removal_percent(self, substance_id: str, treatment_id: str) -> np.ndarray:
+        if self._removals is None:
+            self._load_removals()
+        return self._removals.get((substance_id, treatment_id), np.array([], dtype=int))
+
+    def starting_concentration(self, substance_id: str, matrix_id: str) -> np.ndarray:
+        if self._starting_concentrations is None:
+            self._load_starting_concentrations()
+        return self._starting_concentrations.get((substance_id, matrix_id), np.array([]))
+
+    def references(self, substance_id: str, matrix_id: str) -> list[tuple]:
+        """(reference_id, reference_value_ng_l, year, comments) for every matching row, in file order"""
+        if self._references is None:
+            self._load_references()
+        return self._references.get((substance_id, matrix_id), [])
+
+    def _read_csv(self, filename: str, **kwargs) -> "pd.DataFrame":
+        # pandas is only needed to parse the tables, it is not imported with the models
+        import pandas as pd
+        return pd.read_csv(
+            os.path.join(self.data_dir, filename),
+            encoding='cp1252',
+            sep=';',
+            **kwargs
+        )
+
+    def _load_removals(self):
+        with self._lock:
+            if self._removals is not None:
+                return
+            df = self._read_csv(
+                "process_removal_lit.csv",
+                na_values="",
+                keep_default_na=False,
+                dtype={"removal_percent": float}
+            )
+            self._removals = {
+                key: np.round(group.values).astype(int)
+                for key, group in df.groupby(["substance_id", "treatment_id"], sort=False).removal_percent
+            }
+
+    def _load_starting_concentrations(self):
+        with self._lock:
+            if self._starting_concentrations is not None:
+                return
+            df = self._read_csv(
+                "starting_concentration.csv",
+                na_values="",
+                keep_default_na=False,
+                dtype={"removal_percent": float}
+            )
+            self._starting_concentrations = {
+                key: np.concatenate((
+                    group.min_value_ng_l.values,
+                    group.point_value_ng_l.values,
+                    group.max_value_ng_l.values
+                ))
+                for key, group in df.groupby(["substance_id", "matrix_id"], sort=False)
+            }
+
+    def _load_references(self):
+        with self._lock:
+            if self._references is not None:
+                return
+            df = self._read_csv(
+                "reference_lit.csv",
+                dtype={
+                    "substance_id": str,
+                    "matrix_id": str,
+                    "reference_value": float,
+                    "reference_id": str,
+                    "year": "Int64",
+                    "comments": str}
+            )
+            references = {}
+            for row in df.itertuples(index=False):
+                references.setdefault((row.substance_id, row.matrix_id), []).append((
+                    row.reference_id,
+                    row.reference_value_ng_l,
+                    row.year,
+                    row.comments
+                ))
+            self._references = references
+
+
+# shared by all the `from_lit` loaders
+literature_store = LiteratureStore()
@@ -2,8 +2,6 @@ from __future__ import annotations
 import dataclasses as dtc
 import statistics
 
-from scipy.stats import truncnorm, lognorm
-
 
 @dtc.dataclass
 class Mixture:
@@ -1,9 +1,7 @@
 import dataclasses as dtc
-import os
 import warnings
 
-import pandas as pd
-
+from promisces.models.literature import literature_store
 from promisces.models.matrix import Matrix
 
 
@@ -16,27 +14,10 @@ class Reference:
 
     @staticmethod
     def from_lit(output_matrix: Matrix, substance) -> "Reference":
-        df = pd.read_csv(
-            os.path.join("data", "reference_lit.csv"),
-            encoding='cp1252',
-            sep=';',
-            dtype={
-                "substance_id": str,
-                "matrix_id": str,
-                "reference_value": float,
-                "reference_id": str,
-                "year": pd.Int64Dtype(),
-                "comments": str}
-        )
-        df = df[df.substance_id.eq(substance.id) & df.matrix_id.eq(output_matrix.id)]
-        if len(df):
-            if len(df) < 1:
+        references = literature_store.references(substance.id, output_matrix.id)
+        if len(references):
+            if len(references) > 1:
                 warnings.warn("more than one literature reference found. returning only the first one")
-            df = next(df.itertuples(index=False))
-            return Reference(
-                df.reference_id,
-                df.reference_value_ng_l,
-                df.year, df.comments
-            )
+            return Reference(*references[0])
         # TODO: fake ref?
         return Reference("dummy", 1, 2024, "Not a true reference")
\ No newline at end of file
@@ -0,0 +1,117 @@
+import dataclasses as dtc
+from typing import Sequence
+
+import numpy as np
+
+from promisces.models.matrix import Matrices, Matrix
+from promisces.models.substance import Substance, SubstanceGroup, Substances
+from promisces.models.treatment import Treatment, TreatmentGroup, Treatments
+
+
+@dtc.dataclass(frozen=True)
+class TrainValidation:
+    """
+    result of `Registry.validate` for n trains: whether every train is valid, the index of the output matrix of
+    the valid ones (-1 otherwise) and the position of the first incompatible treatment (-1 if valid)
+    """
+    valid: np.ndarray
+    output_matrix: np.ndarray
+    failed_step: np.ndarray
+
+
+class Registry:
+    """
+    the predefined matrices, substances and treatments indexed by id and group.
+    `transitions[t, m]` is the index of the output matrix of treatment t applied to matrix m, -1 if t doesn't
+    accept m, so a train is validated with one lookup per step. ids are the `id` fields, which are not always the
+    attribute names (e.g. `Substances.fts_4_2` has the id `_4_2fts`).
+    the objects are the shared definitions, clone them before changing their data.
+    """
+
+    def __init__(self, matrices: Sequence[Matrix], substances: Sequence[Substance], treatments: Sequence[Treatment]):
+        self.matrices: tuple[Matrix, ...] = tuple(matrices)
+        self.substances: tuple[Substance, ...] = tuple(substances)
+        self.treatments: tuple[Treatment, ...] = tuple(treatments)
+        self.matrix_index = {m.id: i for i, m in enumerate(self.matrices)}
+        self.substance_index = {s.id: i for i, s in enumerate(self.substances)}
+        self.treatment_index = {t.id: i for i, t in enumerate(self.treatments)}
+        self.substance_groups: dict[SubstanceGroup, tuple[Substance, ...]] = {
+            group: tuple(s for s in self.substances if s.group == group) for group in SubstanceGroup
+        }
+        self.treatment_groups: dict[TreatmentGroup, tuple[Treatment, ...]] = {
+            group: tuple(t for t in self.treatments if t.group == group) for group in TreatmentGroup
+        }
+
+        self.transitions = np.full((len(self.treatments), len(self.matrices)), -1, dtype=np.int32)
+        for t, treatment in enumerate(self.treatments):
+            for matrix in treatment.input_matrix:
+                m = self.matrix_index[matrix.id]
+                self.transitions[t, m] = self.matrix_index[treatment.get_output_matrix(matrix).id]
+        self.transitions.flags.writeable = False
+        # treatments accepting every matrix, in definition order
+        self.matrix_treatments: dict[str, tuple[Treatment, ...]] = {
+            matrix.id: tuple(self.treatments[t] for t in np.flatnonzero(self.transitions[:, m] >= 0))
+            for m, matrix in enumerate(self.matrices)
+        }
+
+    @staticmethod
+    def from_definitions() -> "Registry":
+        """the registry of `Matrices`, `Substances` and `Treatments`"""
+        return Registry(
+            [v for v in vars(Matrices).values() if isinstance(v, Matrix)],
+            [v for v in vars(Substances).values() if isinstance(v, Substance)],
+            [v for v in vars(Treatments).values() if isinstance(v, Treatment)],
+        )
+
+    @staticmethod
+    def _index(index: dict[str, int], kind: str, id: str) -> int:
+        if id not in index:
+            raise ValueError(f"unknown {kind} '{id}'. expected one of [{' '.join(sorted(index))}]")
+        return index[id]
+
+    def matrix(self, id: str) -> Matrix:
+        return self.matrices[self._index(self.matrix_index, "matrix", id)]
+
+    def substance(self, id: str) -> Substance:
+        return self.substances[self._index(self.substance_index, "substance", id)]
+
+    def treatment(self, id: str) -> Treatment:
+        return self.treatments[self._index(self.treatment_index, "treatment", id)]
+
+    def treatments_for(self, matrix: Matrix | str) -> tuple[Treatment, ...]:
+        """the treatments accepting `matrix`"""
+        return self.matrix_treatments[matrix if isinstance(matrix, str) else matrix.id]
+
+    def resolve(self, trains: Sequence[Sequence[str]]) -> np.ndarray:
+        """treatment indices of trains given by ids, one row per train padded with -1"""
+        lengths = np.fromiter(map(len, trains), dtype=np.int64, count=len(trains))
+        index = self.treatment_index
+        try:
+            flat = [index[id] for train in trains for id in train]
+        except KeyError as e:
+            self._index(index, "treatment", e.args[0])
+        indices = np.full((len(trains), lengths.max(initial=0)), -1, dtype=np.int32)
+        indices[np.arange(indices.shape[1]) < lengths[:, None]] = flat
+        return indices
+
+    def validate(self, input_matrices: Sequence[str] | np.ndarray, trains: np.ndarray) -> TrainValidation:
+        """
+        checks n trains of `resolve` against their input matrices (ids or indices), all trains at once:
+        one lookup in the transition table per position of the longest train
+        """
+        state = np.asarray(input_matrices)
+        if state.dtype.kind in "US":
+            ids, inverse = np.unique(state, return_inverse=True)
+            state = np.array([self._index(self.matrix_index, "matrix", id) for id in ids])[inverse]
+        state = np.broadcast_to(state, (len(trains),)).astype(np.int32)
+        failed_step = np.full(len(trains), -1, dtype=np.int32)
+        for step in range(trains.shape[1]):
+            rows = np.flatnonzero((trains[:, step] >= 0) & (failed_step < 0))
+            output = self.transitions[trains[rows, step], state[rows]]
+            failed_step[rows[output < 0]] = step
+            state[rows[output >= 0]] = output[output >= 0]
+        valid = failed_step < 0
+        return TrainValidation(valid, np.where(valid, state, -1), failed_step)
+
+
+registry = Registry.from_definitions()
@@ -1,13 +1,16 @@
 from __future__ import annotations
-import os
 
 import numpy as np
-import pandas as pd
 import dataclasses as dtc
+from typing import TYPE_CHECKING
 
 from promisces.models.array_container import ArrayContainer
+from promisces.models.literature import literature_store
 from promisces.models.substance import Substance
-import promisces.models.treatment as treatment_model
+
+if TYPE_CHECKING:
+    # treatment imports this module to build `Treatments`
+    import promisces.models.treatment as treatment_model
 
 
 @dtc.dataclass
@@ -19,16 +22,4 @@ class RemovalPercent(ArrayContainer):
     def from_lit(treatment: treatment_model.Treatment, substance: Substance) -> "RemovalPercent":
         if not treatment.with_lit_data:
             return RemovalPercent(np.array([]))
-        df = pd.read_csv(
-            os.path.join("data", "process_removal_lit.csv"),
-            encoding='cp1252',
-            sep=';',
-            na_values="",
-            keep_default_na=False,
-            dtype={"removal_percent": float}
-        )
-        rmv_percent = df.loc[
-            (df.substance_id == substance.id) & (df.treatment_id == treatment.id)
-            ].removal_percent
-        return RemovalPercent(np.round(rmv_percent.values).astype(int))
-
+        return RemovalPercent(literature_store.removal_percent(substance.id, treatment.id).copy())
@@ -1,7 +1,11 @@
 import dataclasses as dtc
+import hashlib
+import json
 from itertools import product
 from typing import Iterator
 
+import numpy as np
+
 from promisces.models.matrix import Matrix
 from promisces.models.substance import Substance
 from promisces.models.treatment import TreatmentTrain
@@ -29,15 +33,32 @@ class Scenario:
         if self.reference is None:
             self.reference = Reference.from_lit(self.treatment_train.output_matrix(self.input_matrix), self.substance)
 
+    def digest(self) -> str:
+        """
+        stable content hash of everything the simulated concentrations depend on: the input matrix, the substance,
+        the data of every treatment of the train and the starting concentration.
+        the name and the reference are left out, they don't change the simulation.
+        """
+        start_c = self.starting_concentration
+        content = json.dumps(dict(
+            input_matrix=self.input_matrix.id,
+            substance=self.substance.id,
+            treatment_train=[t.content() for t in self.treatment_train],
+            starting_concentration=start_c.digest() if start_c is not None else None,
+        ), sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
     def simulate_removal(self,
                          n_runs: int = 10000,
                          rmv_factor_resolution: int = 1000,
+                         seed: int | np.random.SeedSequence | None = None,
                          ):
         from promisces.simulate_removal import simulate_removal
         return simulate_removal(
             self,
             n_runs,
-            rmv_factor_resolution
+            rmv_factor_resolution,
+            seed
         )
 
     @staticmethod
@@ -1,11 +1,10 @@
-import os
 import warnings
 
 import numpy as np
-import pandas as pd
 import dataclasses as dtc
 
 from promisces.models.array_container import ArrayContainer
+from promisces.models.literature import literature_store
 from promisces.models.matrix import Matrix
 
 
@@ -15,26 +14,19 @@ class StartingConcentration(ArrayContainer):
 
     @staticmethod
     def from_lit(substance, matrix: Matrix) -> "StartingConcentration":
-        df = pd.read_csv(os.path.join("data", "starting_concentration.csv"),
-                         encoding='cp1252',
-                         sep=';',
-                         na_values="",
-                         keep_default_na=False,
-                         dtype={"removal_percent": float}
-                         )
-        dff = df.loc[
-            (df.substance_id == substance.id) &
-            (df.matrix_id == matrix.id)
-            ]
-        lit_values = np.concatenate((
-            dff.min_value_ng_l.values,
-            dff.point_value_ng_l.values,
-            dff.max_value_ng_l.values)
-        )
+        lit_values = literature_store.starting_concentration(substance.id, matrix.id)
         if len(~np.isnan(lit_values)) == 0:
             warnings.warn(f"no starting concentration found for {substance.id} - {matrix.id}")
         return StartingConcentration(lit_values[~np.isnan(lit_values)])
 
-    def n_uniform_samples(self, n_samples: int):
+    def n_uniform_samples(self, n_samples: int, rng: np.random.Generator | None = None, stratified: bool = False):
+        """
+        samples in descending order.
+        `stratified` draws one sample in each of the `n_samples` equal-width strata of the range
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        if stratified:
+            u = (np.arange(n_samples) + rng.random(n_samples)) / n_samples
+            return (self.arr.min() + u * (self.arr.max() - self.arr.min()))[::-1]
         # TODO: CHECK SORTING
-        return np.sort(np.random.uniform(self.arr.min(), self.arr.max(), n_samples))[::-1]
+        return np.sort(rng.uniform(self.arr.min(), self.arr.max(), n_samples))[::-1]
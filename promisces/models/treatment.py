@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import dataclasses as dtc
+import hashlib
+import json
 from enum import Enum
 from typing import Iterator
 
@@ -82,6 +84,25 @@ class Treatment:
         mixture = mixture or self.mixture
         return Treatment(id, self.group, name, input_matrix, output_matrix, with_lit_data, removal, mixture)
 
+    def content(self) -> dict:
+        """the data a simulation of the treatment depends on, with the removal values as digest"""
+        return dict(
+            id=self.id,
+            input_matrix=[m.id for m in self.input_matrix],
+            output_matrix=self.output_matrix.id if self.output_matrix is not None else None,
+            with_lit_data=self.with_lit_data,
+            removal=self.removal.digest(),
+            mixture=self.mixture.asdict() if self.mixture is not None else None,
+        )
+
+    def digest(self) -> str:
+        """
+        content hash of the treatment. unlike `hash()`, which only covers the `id`, it changes with the removal
+        and mixture data.
+        """
+        content = json.dumps(self.content(), sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
     def __hash__(self):
         return hash(self.id)
 
@@ -94,12 +115,14 @@ class TreatmentTrain:
         return TreatmentTrain([t.clone() for t in self.treatments])
 
     def validate_matrices(self, input_matrix: Matrix):
-        for i in range(len(self)):
-            if input_matrix not in self[i].input_matrix:
-                raise ValueError(f"incompatible input matrix ('{input_matrix.id}') for treatment '{self[i].id}'"
+        """for many trains of predefined treatments, see `promisces.models.registry.Registry.validate`"""
+        for i, treatment in enumerate(self.treatments):
+            # `in` compares by identity first, the predefined matrices are never compared field by field
+            if input_matrix not in treatment.input_matrix:
+                raise ValueError(f"incompatible input matrix ('{input_matrix.id}') for treatment '{treatment.id}'"
                                  f" at index {i}.\n"
-                                 f"Expected one of [{' '.join([m.id for m in self[i].input_matrix])}]")
-            input_matrix = self[i].get_output_matrix(input_matrix)
+                                 f"Expected one of [{' '.join([m.id for m in treatment.input_matrix])}]")
+            input_matrix = treatment.get_output_matrix(input_matrix)
 
     def validate_mixtures(self):
         for i, treatment in enumerate(self):
@@ -0,0 +1,190 @@
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory, util
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+from promisces.models.literature import literature_store
+from promisces.models.scenario import Scenario
+from promisces.removal_processes import DominantDistribution, ProcessResult, ProcessType
+from promisces.rng import SeedLike, scenario_seeds
+from promisces.simulate_removal import SimulationResult, simulate_removal
+from promisces.storage import ResultCache, _result_dir, _save_index, load_results, save_result
+from promisces.timing import StageTiming
+
+# state of a worker process, set once by `_init_worker`
+_worker_buffers: dict[str, tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+_worker_cache: ResultCache | None = None
+
+
+def _init_worker(
+        concentration_buffer: tuple[str, tuple[int, int]] | None,
+        rmv_factor_buffer: tuple[str, tuple[int, int]] | None,
+        data_dir: str,
+        preload_literature: bool,
+        cache: ResultCache | None = None,
+):
+    for key, buffer in dict(concentration=concentration_buffer, rmv_factor=rmv_factor_buffer).items():
+        if buffer is None:
+            continue
+        name, shape = buffer
+        shm = shared_memory.SharedMemory(name=name)
+        _worker_buffers[key] = shm, np.ndarray(shape, dtype=float, buffer=shm.buf)
+    # worker processes leave through `os._exit`, which skips `atexit` but runs the multiprocessing finalizers
+    util.Finalize(None, _close_worker_buffers, exitpriority=10)
+    global _worker_cache
+    _worker_cache = cache
+    literature_store.data_dir = data_dir
+    if preload_literature:
+        try:
+            literature_store.reload()
+        except FileNotFoundError:
+            # scenarios may not need literature data at all. missing tables are reported on first use.
+            literature_store.invalidate()
+
+
+def _close_worker_buffers():
+    for shm, _ in _worker_buffers.values():
+        shm.close()
+    _worker_buffers.clear()
+
+
+def _shared_array(shm: shared_memory.SharedMemory, shape: tuple[int, int]) -> np.ndarray:
+    """array on the block `shm`, which is closed once neither the array nor any view of it is left"""
+    arr = np.ndarray(shape, dtype=float, buffer=shm.buf)
+    weakref.finalize(arr, shm.close)
+    return arr
+
+
+def _run_chunk(
+        tasks: list[tuple[int, Scenario, np.random.SeedSequence, int, int]],
+        n_runs: int,
+        rmv_factor_resolution: int,
+        output: str | None = None,
+) -> list[tuple[int, list[tuple[ProcessType, DominantDistribution, bool]], list[StageTiming]]]:
+    """
+    simulates every (index, scenario, seed, concentration_row, rmv_factor_row) task and writes the arrays into the shared
+    buffers, or with `save_result` into the subdirectory of `output` of the task. only the small per-stage metadata and
+    the stage timings are sent back to the parent.
+    """
+    out = []
+    for index, scenario, seed, c_row, rmv_row in tasks:
+        result = simulate_removal(scenario, n_runs, rmv_factor_resolution, seed, cache=_worker_cache)
+        if output is not None:
+            save_result(result, os.path.join(output, _result_dir(index)))
+        else:
+            _, concentrations = _worker_buffers["concentration"]
+            _, rmv_factors = _worker_buffers["rmv_factor"]
+            concentrations[c_row] = result.starting_concentration
+            for j, stage in enumerate(result.intermediate_results):
+                concentrations[c_row + 1 + j] = stage.output_concentration
+                rmv_factors[rmv_row + j] = stage.rmv_factors
+        out += [(index, [
+            (stage.process_type, stage.dominant_distribution, stage.average_out)
+            for stage in result.intermediate_results
+        ], result.timings)]
+    return out
+
+
+def run_scenarios(
+        scenarios: Iterable[Scenario],
+        workers: int | None = None,
+        n_runs: int = 10000,
+        rmv_factor_resolution: int = 1000,
+        chunk_size: int = 8,
+        preload_literature: bool = True,
+        seed: SeedLike | Sequence[np.random.SeedSequence] = None,
+        progress: Callable[[int, int], None] | None = None,
+        cache: ResultCache | None = None,
+        output: str | None = None,
+) -> Sequence[SimulationResult]:
+    """
+    runs `Scenario.simulate_removal` for every scenario on a pool of `workers` processes.
+    workers write the concentrations and removal factors into shared memory blocks instead of pickling them back.
+    the arrays of the results are views of these blocks, which stay mapped until the last result is released.
+    scenario i is seeded with `scenario_seeds(seed, len(scenarios))[i]`, so the results don't depend on the number
+    of workers or on the chunk size.
+    with a `cache` and a `seed`, the workers load the scenarios simulated before with the same seed from it and add
+    the others, so that rerunning a changed grid only simulates the changed scenarios.
+    with an `output` directory, the workers write every result with `save_result` as soon as it is simulated instead,
+    and the results are returned as `load_results(output)`: the memory doesn't grow with the number of scenarios.
+    `progress(n_done, n_scenarios)` is called in the parent every time a chunk is finished.
+    returns the results in the order of `scenarios`.
+    """
+    scenarios = list(scenarios)
+    seeds = scenario_seeds(seed, len(scenarios))
+    workers = workers or os.cpu_count()
+    n_stages = [len(s.treatment_train) for s in scenarios]
+    # one row for the starting concentration and one per stage in the concentration buffer
+    c_rows = np.r_[0, np.cumsum([n + 1 for n in n_stages])]
+    rmv_rows = np.r_[0, np.cumsum(n_stages)]
+
+    c_shape, rmv_shape = (int(c_rows[-1]), n_runs), (int(rmv_rows[-1]), n_runs)
+    if output is None:
+        c_shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(c_shape)) * 8, 1))
+        rmv_shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(rmv_shape)) * 8, 1))
+        shms, buffers = [c_shm, rmv_shm], ((c_shm.name, c_shape), (rmv_shm.name, rmv_shape))
+    else:
+        os.makedirs(output, exist_ok=True)
+        shms, buffers = [], (None, None)
+    try:
+        tasks = [(i, s, seeds[i], int(c_rows[i]), int(rmv_rows[i])) for i, s in enumerate(scenarios)]
+        metadata, timings = {}, {}
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(
+                    *buffers,
+                    literature_store.data_dir,
+                    preload_literature,
+                    # results of fresh seeds could never be found again
+                    cache if seed is not None else None,
+                ),
+        ) as executor:
+            futures = [
+                executor.submit(_run_chunk, tasks[start:start + chunk_size], n_runs, rmv_factor_resolution, output)
+                for start in range(0, len(tasks), chunk_size)
+            ]
+            for future in as_completed(futures):
+                for index, stages, stage_timings in future.result():
+                    metadata[index], timings[index] = stages, stage_timings
+                if progress is not None:
+                    progress(len(metadata), len(scenarios))
+    except BaseException:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+        raise
+    if output is not None:
+        _save_index(output, [s.name for s in scenarios])
+        return load_results(output)
+    # the results are views of the shared blocks instead of copies, which would double the peak memory.
+    # the names are removed right away, the memory is released with the last result using it.
+    for shm in shms:
+        shm.unlink()
+    concentrations = _shared_array(c_shm, c_shape)
+    rmv_factors = _shared_array(rmv_shm, rmv_shape)
+
+    results = []
+    for i, scenario in enumerate(scenarios):
+        c_row, rmv_row = c_rows[i], rmv_rows[i]
+        results += [SimulationResult(
+            scenario,
+            n_runs,
+            rmv_factor_resolution,
+            concentrations[c_row],
+            [
+                ProcessResult(
+                    process_type,
+                    concentrations[c_row + 1 + j],
+                    rmv_factors[rmv_row + j],
+                    dominant_distribution,
+                    average_out
+                )
+                for j, (process_type, dominant_distribution, average_out) in enumerate(metadata[i])
+            ],
+            timings=timings[i],
+        )]
+    return results
@@ -118,16 +118,20 @@ def spider_plot(
         case_study_name: str | None = None,
 ):
 
-    rq = [r.final_concentration / r.scenario.reference.ref_value_ng_l for r in sim_results]
-
-    output_c_df = pd.DataFrame(np.column_stack(rq),
-                               columns=[
-                                   f"{case_study_name if case_study_name is not None else f'result {i}'} - {r.scenario.name}"
-                                   for i, r in enumerate(sim_results)]
-                               )
+    # percentiles of the reference quotient, taken from the precomputed summaries
+    percentile_labels = ["50%", "75%", "95%", "99%"]
+    rq = [
+        r.summary.output_c.loc[r.scenario.treatment_train[-1].id, percentile_labels].values
+        / r.scenario.reference.ref_value_ng_l
+        for r in sim_results
+    ]
 
-    percentiles = [0.50, 0.75, 0.95, 0.99]
-    stats = output_c_df.describe(percentiles)
+    stats = pd.DataFrame(np.column_stack(rq),
+                         index=percentile_labels,
+                         columns=[
+                             f"{case_study_name if case_study_name is not None else f'result {i}'} - {r.scenario.name}"
+                             for i, r in enumerate(sim_results)]
+                         )
     categories = stats.columns
     N = len(categories)
     angles = np.linspace(0, 2 * pi, N, endpoint=False)
@@ -1,12 +1,13 @@
 import dataclasses as dtc
-from asyncio.windows_events import INFINITE
 from enum import Enum
-from numpy.random import choice
 
 import numpy as np
-from scipy.stats import norm, beta, truncnorm, lognorm
 
+from promisces.cache import CacheInfo, LRUCache
+from promisces.models.mixture import Mixture
 from promisces.models.removal_percent import RemovalPercent
+from promisces.timing import stage
+from promisces.sampling import DiscreteSampler, lognorm_rvs, norm_pdf, truncated_lognorm_rvs, truncnorm_rvs
 
 
 class ProcessType(Enum):
@@ -31,87 +32,202 @@ class ProcessResult:
     dominant_distribution: DominantDistribution
     average_out: bool
 
+    @property
+    def nbytes(self) -> int:
+        return self.output_concentration.nbytes + self.rmv_factors.nbytes
+
+    def compact(self, rmv_factor_resolution: int) -> "CompactProcessResult":
+        """
+        float32 concentrations. removal factors drawn from the grid of the generic process are stored as
+        their integer grid index, any other removal factors as float32.
+        """
+        codes = np.round(self.rmv_factors / 100 * rmv_factor_resolution)
+        if self.process_type == ProcessType.generic and np.array_equal(
+                codes / rmv_factor_resolution * 100, self.rmv_factors
+        ):
+            rmv_factors = codes.astype(np.uint16 if rmv_factor_resolution <= 2 ** 16 else np.uint32)
+        else:
+            rmv_factors = self.rmv_factors.astype(np.float32)
+        return CompactProcessResult(
+            self.process_type,
+            self.output_concentration.astype(np.float32),
+            rmv_factors,
+            rmv_factor_resolution,
+            self.dominant_distribution,
+            self.average_out
+        )
+
+
+@dtc.dataclass
+class CompactProcessResult:
+    """
+    memory efficient version of `ProcessResult` (see `ProcessResult.compact`).
+    `output_concentration` and `rmv_factors` are decoded to float64 arrays on access.
+    """
+    process_type: ProcessType
+    stored_output_concentration: np.ndarray
+    stored_rmv_factors: np.ndarray
+    rmv_factor_resolution: int
+    dominant_distribution: DominantDistribution
+    average_out: bool
+
+    @property
+    def output_concentration(self) -> np.ndarray:
+        return self.stored_output_concentration.astype(float)
+
+    @property
+    def rmv_factors(self) -> np.ndarray:
+        if np.issubdtype(self.stored_rmv_factors.dtype, np.integer):
+            # same operations as the grid of `to_likelihood`, so the decoded values are exact
+            return self.stored_rmv_factors / self.rmv_factor_resolution * 100
+        return self.stored_rmv_factors.astype(float)
+
+    @property
+    def nbytes(self) -> int:
+        return self.stored_output_concentration.nbytes + self.stored_rmv_factors.nbytes
+
+    def compact(self, rmv_factor_resolution: int) -> "CompactProcessResult":
+        return self
+
+
+# bounded caches for the grids of the generic process. they depend only on the resolution, the prior power
+# and the removal data, so repeated treatments and substances reuse them. cached arrays are read-only.
+factor_grid_cache = LRUCache(maxsize=16)
+prior_cache = LRUCache(maxsize=64)
+prior_fit_cache = LRUCache(maxsize=64)
+likelihood_cache = LRUCache(maxsize=4096)
+sampler_cache = LRUCache(maxsize=1024)
+
+
+def _read_only(arr: np.ndarray) -> np.ndarray:
+    arr.setflags(write=False)
+    return arr
+
+
+def factor_grid(rmv_factor_resolution=1000) -> np.ndarray:
+    return factor_grid_cache.get_or_compute(
+        rmv_factor_resolution,
+        lambda: _read_only(np.arange(1, rmv_factor_resolution) / rmv_factor_resolution)
+    )
+
+
+def likelihood_params(rmv_values: RemovalPercent) -> tuple[float, float] | None:
+    """mean and standard deviation (as fractions) of the normal likelihood of removal data, `None` without data"""
+    if len(rmv_values) == 0:
+        return None
+    conservative_starting = np.r_[0.001, rmv_values / 100]
+    conservative_starting_mean = conservative_starting.mean()
+    data = np.r_[conservative_starting_mean, rmv_values / 100]
+    # !important! ddof=1 ==> sample std (vs population std)
+    return data.mean(), np.std(data, ddof=1)
+
 
 def to_likelihood(rmv_values: RemovalPercent, rmv_factor_resolution=1000):
-    rmv_factor = np.arange(1, rmv_factor_resolution) / rmv_factor_resolution
-    if len(rmv_values) > 0:
-        conservative_starting = np.r_[0.001, rmv_values / 100]
-        conservative_starting_mean = conservative_starting.mean()
-        data = np.r_[conservative_starting_mean, rmv_values / 100]
-        likelihood = norm.pdf(x=rmv_factor, loc=data.mean(),
-                              # !important! ddof=1 ==> sample std (vs population std)
-                              scale=np.std(data, ddof=1))
-        # print(f"mean: {data.mean()}, std: {np.std(data, ddof=1)}")
-        likelihood = likelihood / sum(likelihood)
-    else:
-        likelihood = np.repeat(a=1, repeats=rmv_factor_resolution-1)
-    return rmv_factor*100, likelihood
+    def compute():
+        rmv_factor = factor_grid(rmv_factor_resolution)
+        if len(rmv_values) > 0:
+            mean, sd = likelihood_params(rmv_values)
+            likelihood = norm_pdf(x=rmv_factor, loc=mean, scale=sd)
+            # print(f"mean: {data.mean()}, std: {np.std(data, ddof=1)}")
+            likelihood = likelihood / sum(likelihood)
+        else:
+            likelihood = np.repeat(a=1, repeats=rmv_factor_resolution-1)
+        return _read_only(rmv_factor*100), _read_only(likelihood)
 
+    return likelihood_cache.get_or_compute((rmv_factor_resolution, rmv_values.digest()), compute)
 
-def prior_beta(power=100, rmv_factor_resolution=1000):
-    x_range = np.arange(1, rmv_factor_resolution) / rmv_factor_resolution
-    prior_beta_fit = beta.fit(
+
+def prior_beta_fit(power=100) -> tuple[float, float, float, float]:
+    # scipy.stats takes longer to import than the rest of the package, it is only loaded for the priors
+    from scipy.stats import beta
+    return prior_fit_cache.get_or_compute(power, lambda: beta.fit(
         data=(0 + 1 / power, 1 - 1 / power),
         floc=0,  # minimum (fixed)
         fscale=1  # maximum (fixed)
+    ))
+
+
+def prior_beta(power=100, rmv_factor_resolution=1000):
+    def compute():
+        from scipy.stats import beta
+        x_range = factor_grid(rmv_factor_resolution)
+        fit = prior_beta_fit(power)
+        # print(f"prior beta: a, b = {prior_beta_fit}")
+        prior = beta.pdf(
+            x=x_range,
+            a=fit[0],
+            b=fit[1])
+        return _read_only(prior / sum(prior))
+
+    return prior_cache.get_or_compute((power, rmv_factor_resolution), compute)
+
+
+def grid_cache_info() -> dict[str, CacheInfo]:
+    return dict(
+        factor_grid=factor_grid_cache.info(),
+        prior=prior_cache.info(),
+        prior_fit=prior_fit_cache.info(),
+        likelihood=likelihood_cache.info(),
+        sampler=sampler_cache.info(),
     )
-    # print(f"prior beta: a, b = {prior_beta_fit}")
-    prior = beta.pdf(
-        x=x_range,
-        a=prior_beta_fit[0],
-        b=prior_beta_fit[1])
-    return prior / sum(prior)
 
 
-def apply_generic_process(
-        input_c: np.ndarray,
+def clear_grid_caches():
+    factor_grid_cache.clear()
+    prior_cache.clear()
+    prior_fit_cache.clear()
+    likelihood_cache.clear()
+    sampler_cache.clear()
+
+
+def _dominant_distribution(
+        rmv_factor_pct: np.ndarray,
+        lit_lkl: np.ndarray,
+        cs_lkl: np.ndarray,
+        posterior: np.ndarray,
+        rmv_factor_resolution: int | float,
+) -> DominantDistribution:
+    """which of the distributions has its mode next to the mode of the posterior"""
+    posterior_max: object = rmv_factor_pct[posterior.argmax()]
+    max_cs_prob = (cs_lkl == cs_lkl.max()).nonzero()[0]
+    cs_max = rmv_factor_pct[cs_lkl.argmax()] if len(max_cs_prob) == 1 else 1000 # needs to be outside removal factor range
+    max_lit_prob = (lit_lkl == lit_lkl.max()).nonzero()[0]
+    lit_max = rmv_factor_pct[lit_lkl.argmax()] if len(max_lit_prob) == 1 else 1000
+
+    if abs(cs_max - posterior_max) < 0.05 * 100:
+        dominant_distribution = DominantDistribution.case_study
+    elif abs(lit_max - posterior_max) < 0.05 * 100:
+        dominant_distribution = DominantDistribution.literature
+    elif (posterior_max <= (0 + 1 / rmv_factor_resolution * 100)) | (
+            posterior_max >= (1 - 1 / rmv_factor_resolution * 100)):
+        dominant_distribution = DominantDistribution.prior
+    else:
+        dominant_distribution = DominantDistribution.combination
+    return dominant_distribution
+
+
+def generic_posterior(
         lit_rmv: RemovalPercent,
         cs_rmv: RemovalPercent,
         rmv_factor_resolution: int | float,
         power: int | float = 100,
-        n_runs: int = 10000
-) -> ProcessResult:
+) -> tuple[np.ndarray, np.ndarray, DominantDistribution]:
     """
-    calculates the substance concentration after a process defined only by a removal factor.
-    the removal factor has to be in %
+    combines the prior with the literature and case study likelihoods.
+    returns the removal factor grid (in %), the posterior probabilities on that grid and the dominant distribution
     """
-    # print(lit_rmv.arr)
-    # print(cs_rmv.arr)
-    # print("---------------------------")
     lit_rmv_factor, lit_lkl = to_likelihood(rmv_values=lit_rmv,
                                             rmv_factor_resolution=rmv_factor_resolution)
     cs_rmv_factor, cs_lkl = to_likelihood(rmv_values=cs_rmv,
                                           rmv_factor_resolution=rmv_factor_resolution)
 
-    # print(lit_lkl)
-    # print(cs_lkl)
     prior_probs = prior_beta(power=power, rmv_factor_resolution=rmv_factor_resolution)
     probs_both = lit_lkl * cs_lkl
     posterior = probs_both * prior_probs
     posterior /= sum(posterior)
 
-    posterior_max: object = cs_rmv_factor[posterior.argmax()]
-    max_cs_prob = (cs_lkl == cs_lkl.max()).nonzero()[0]
-    cs_max = cs_rmv_factor[cs_lkl.argmax()] if len(max_cs_prob) == 1 else 1000 # needs to be outside removal factor range
-    max_lit_prob = (lit_lkl == lit_lkl.max()).nonzero()[0]
-    lit_max = lit_rmv_factor[lit_lkl.argmax()] if len(max_lit_prob) == 1 else 1000
-
-    if abs(cs_max - posterior_max) < 0.05 * 100:
-        dominant_distribution = DominantDistribution.case_study
-    elif abs(lit_max - posterior_max) < 0.05 * 100:
-        dominant_distribution = DominantDistribution.literature
-    elif (posterior_max <= (0 + 1 / rmv_factor_resolution * 100)) | (
-            posterior_max >= (1 - 1 / rmv_factor_resolution * 100)):
-        dominant_distribution = DominantDistribution.prior
-    else:
-        dominant_distribution = DominantDistribution.combination
-
-    # Draw removal factors from distributions
-    rmv_factor = choice(
-        a=lit_rmv_factor,  # should be equal to cs_rmv_factor
-        size=n_runs,
-        replace=True,
-        p=posterior  # posterior equal prior if no data is available
+    dominant_distribution = _dominant_distribution(
+        cs_rmv_factor, lit_lkl, cs_lkl, posterior, rmv_factor_resolution
     )
     # import matplotlib.pyplot as plt
     # #
@@ -121,68 +237,275 @@ def apply_generic_process(
     # plt.plot(posterior, label="posterior", alpha=.75)
     # plt.legend()
     # plt.show()
-    # if CS distribution is dominant, the average of the posterior distribution can be expected to be
-    # the real site-specific average. --> no sorting of removal factors
-    if not dominant_distribution == DominantDistribution.case_study:
-        rmv_factor = np.sort(rmv_factor)
-        av_out = False
-    else:
-        av_out = True
+    return lit_rmv_factor, posterior, dominant_distribution
+
+
+@dtc.dataclass(frozen=True)
+class AdaptiveGrid:
+    """
+    settings of a non-uniform removal factor grid, see `adaptive_posterior`.
+    every cell holding more than `mass_floor` of the posterior is at most `quantile_tol` wide and at most
+    `relative_tol` times its distance to 0 and to 100 % wide. so the posterior quantiles between `mass_floor` and
+    `1 - mass_floor` are accurate to `quantile_tol` and the remaining fractions (100 % - removal) to `relative_tol`,
+    up to the integration error of the likelihoods over a cell. high removals like 99.99 % are resolved without a dense grid.
+    """
+    quantile_tol: float = 1e-3
+    relative_tol: float = 1e-2
+    mass_floor: float = 1e-9
+    # cells are not split below this width (as a fraction), it stops the refinement at a singular prior
+    min_width: float = 1e-12
+    # coarse uniform cells the refinement starts from
+    n_initial: int = 64
+    max_iterations: int = 64
+
+    def max_width(self, x: np.ndarray) -> np.ndarray:
+        return np.minimum(self.quantile_tol, self.relative_tol * np.minimum(x, 1 - x))
+
+    def initial_edges(self, likelihoods: list[tuple[float, float]]) -> np.ndarray:
+        """
+        uniform cells with logarithmic refinement towards 0 and 100 %, plus edges around the likelihood means,
+        so that narrow likelihoods are never missed by the coarse cells
+        """
+        decades = 10. ** -np.arange(1, 7)
+        edges = [np.linspace(0, 1, self.n_initial + 1), decades, 1 - decades]
+        for mean, sd in likelihoods:
+            edges += [mean + sd * np.arange(-8, 9)]
+        edges = np.unique(np.concatenate(edges))
+        return edges[(edges >= 0) & (edges <= 1)]
+
+
+def adaptive_posterior(
+        lit_rmv: RemovalPercent,
+        cs_rmv: RemovalPercent,
+        grid: AdaptiveGrid,
+        power: int | float = 100,
+) -> tuple[np.ndarray, np.ndarray, DominantDistribution]:
+    """
+    same as `generic_posterior` on a non-uniform grid refined where the posterior has mass.
+    cells holding more than `grid.mass_floor` are bisected until they are narrower than `grid.max_width`.
+    the grid points are the cell midpoints, their probabilities are the prior mass of the cells times the
+    likelihoods at the midpoints.
+    """
+    from scipy.stats import beta
+    a, b, _, _ = prior_beta_fit(power)
+    lit_params, cs_params = likelihood_params(lit_rmv), likelihood_params(cs_rmv)
+
+    def likelihoods(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        lit = norm_pdf(x, *lit_params) if lit_params is not None else np.ones_like(x)
+        cs = norm_pdf(x, *cs_params) if cs_params is not None else np.ones_like(x)
+        return lit, cs
+
+    def posterior_mass(edges: np.ndarray, mid: np.ndarray) -> np.ndarray:
+        # the prior is integrated exactly over the cells, it is singular at 0 and 100 % for power > 2.
+        # the upper tail is taken from the survival function to keep its precision next to 100 %.
+        prior = np.where(mid < 0.5, np.diff(beta.cdf(edges, a, b)), -np.diff(beta.sf(edges, a, b)))
+        lit, cs = likelihoods(mid)
+        mass = prior * lit * cs
+        return mass / mass.sum()
+
+    edges = grid.initial_edges([p for p in (lit_params, cs_params) if p is not None])
+    for _ in range(grid.max_iterations):
+        mid, width = (edges[:-1] + edges[1:]) / 2, np.diff(edges)
+        refine = (posterior_mass(edges, mid) > grid.mass_floor) \
+            & (width > grid.max_width(mid)) & (width > 2 * grid.min_width)
+        if not refine.any():
+            break
+        edges = np.sort(np.r_[edges, mid[refine]])
+
+    mid = (edges[:-1] + edges[1:]) / 2
+    posterior = posterior_mass(edges, mid)
+    lit_density, cs_density = likelihoods(mid)
+    # modes are compared on the densities, the probabilities are skewed by the cell widths
+    dominant_distribution = _dominant_distribution(
+        mid * 100, lit_density, cs_density, beta.pdf(mid, a, b) * lit_density * cs_density, 1 / grid.quantile_tol
+    )
+    return mid * 100, posterior, dominant_distribution
+
+
+def posterior_sampler(
+        lit_rmv: RemovalPercent,
+        cs_rmv: RemovalPercent,
+        rmv_factor_resolution: int | float,
+        power: int | float = 100,
+        adaptive_grid: AdaptiveGrid | None = None,
+) -> tuple[DiscreteSampler, DominantDistribution]:
+    """
+    sampler of the removal factor posterior of `generic_posterior` and its dominant distribution.
+    with an `adaptive_grid`, the posterior of `adaptive_posterior` is used and the resolution is ignored.
+    cached by the grid, the power and the digests of the removal data, so every scenario with the same
+    literature and case study data shares one sampler.
+    """
+
+    def compute():
+        if adaptive_grid is not None:
+            grid, posterior, dominant_distribution = adaptive_posterior(lit_rmv, cs_rmv, adaptive_grid, power)
+        else:
+            grid, posterior, dominant_distribution = generic_posterior(lit_rmv, cs_rmv, rmv_factor_resolution, power)
+        return DiscreteSampler.from_probs(grid, posterior), dominant_distribution
+
+    return sampler_cache.get_or_compute(
+        (adaptive_grid or rmv_factor_resolution, power, lit_rmv.digest(), cs_rmv.digest()), compute
+    )
+
+
+def sorted_uniforms(size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    `size` uniforms on [0, 1) in ascending order, distributed as the order statistics of `size` iid uniforms.
+    uses normalized cumulative sums of exponential spacings, O(size) instead of sorting.
+    """
+    spacings = np.cumsum(rng.standard_exponential(size + 1))
+    return spacings[:-1] / spacings[-1]
+
+
+def apply_generic_process(
+        input_c: np.ndarray,
+        lit_rmv: RemovalPercent,
+        cs_rmv: RemovalPercent,
+        rmv_factor_resolution: int | float,
+        power: int | float = 100,
+        n_runs: int = 10000,
+        rng: np.random.Generator | None = None,
+        stratified: bool = False,
+        adaptive_grid: AdaptiveGrid | None = None,
+) -> ProcessResult:
+    """
+    calculates the substance concentration after a process defined only by a removal factor.
+    the removal factor has to be in %
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    # print(lit_rmv.arr)
+    # print(cs_rmv.arr)
+    # print("---------------------------")
+    with stage("posterior"):
+        sampler, dominant_distribution = posterior_sampler(
+            lit_rmv, cs_rmv, rmv_factor_resolution, power, adaptive_grid
+        )
+
+    # Draw removal factors from distributions
+    # posterior equal prior if no data is available
+    with stage("sampling") as timing:
+        rmv_factor = sampler.sample(n_runs, rng, stratified)
+        timing.nbytes, timing.n_samples = rmv_factor.nbytes, rmv_factor.size
+    with stage("sorting"):
+        # if CS distribution is dominant, the average of the posterior distribution can be expected to be
+        # the real site-specific average. --> no sorting of removal factors
+        if not dominant_distribution == DominantDistribution.case_study:
+            # stratified draws are already sorted
+            rmv_factor = rmv_factor if stratified else np.sort(rmv_factor)
+            av_out = False
+        else:
+            rmv_factor = rng.permutation(rmv_factor) if stratified else rmv_factor
+            av_out = True
 
-    # TODO: CHECK SORTING
-    input_c = np.sort(input_c)[::-1]
-    output_c = input_c * (1 - rmv_factor / 100)
+        # TODO: CHECK SORTING
+        input_c = np.sort(input_c)[::-1]
+        output_c = input_c * (1 - rmv_factor / 100)
+        output_c = np.sort(output_c)[::-1]
 
     return ProcessResult(
         ProcessType.generic,
         # TODO: CHECK SORTING
-        np.sort(output_c)[::-1], # not needed for calculations
+        output_c, # not needed for calculations
         rmv_factor,
         dominant_distribution,
         av_out
     )
 
 
-def apply_mixture_process(
-        input_c,
+def apply_generic_process_ranked(
+        input_c: np.ndarray,
+        lit_rmv: RemovalPercent,
+        cs_rmv: RemovalPercent,
+        rmv_factor_resolution: int | float,
+        power: int | float = 100,
+        rng: np.random.Generator | None = None,
+) -> ProcessResult:
+    """
+    same as `apply_generic_process` for an `input_c` sorted in descending order, without sorting.
+    the removal factors are drawn in ascending order from multinomial counts on the grid, so the highest
+    concentrations meet the lowest removals and the output comes out in descending order.
+    only a case study dominated process (removal factors in random order) needs to sort its output.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    sampler, dominant_distribution = posterior_sampler(lit_rmv, cs_rmv, rmv_factor_resolution, power)
+    rmv_factor = sampler.sample_sorted(input_c.size, rng)
+
+    if dominant_distribution == DominantDistribution.case_study:
+        rmv_factor = rng.permutation(rmv_factor)
+        output_c = np.sort(input_c * (1 - rmv_factor / 100))[::-1]
+    else:
+        output_c = input_c * (1 - rmv_factor / 100)
+
+    return ProcessResult(
+        ProcessType.generic,
+        output_c,
+        rmv_factor,
+        dominant_distribution,
+        dominant_distribution == DominantDistribution.case_study
+    )
+
+
+def mixture_draws(
+        n_runs: int,
         x2_mean,
         x2_sd,
         c2_mean,
         c2_sd,
-        log_dist=False) -> ProcessResult:
+        log_dist=False,
+        rng: np.random.Generator | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
     """
-    calculates the substance concentration after a mixture process of the main stream into a diluting liquid.
+    draws the fraction of the diluting liquid (x2) and its concentration (c2) of a mixture process
     """
-    n_runs = input_c.size
-
+    rng = rng if rng is not None else np.random.default_rng()
     if x2_sd == 0:
         x2_dist = np.array([x2_mean] * n_runs)
     else:
-        x2_dist = truncnorm.rvs(
+        x2_dist = truncnorm_rvs(
             a=(0 - x2_mean) / x2_sd,
             b=(1 - x2_mean) / x2_sd,
             loc=x2_mean,
             scale=x2_sd,
-            size=n_runs
+            size=n_runs,
+            rng=rng
         )
 
     if c2_sd == 0:
         c2_dist = np.array([c2_mean] * n_runs)
     else:
         if log_dist:
-            c2_dist = lognorm.rvs(
+            c2_dist = lognorm_rvs(
                 s=c2_sd,
                 scale=c2_mean,
-                size=n_runs
+                size=n_runs,
+                rng=rng
             )
         else:
-            c2_dist = truncnorm.rvs(
+            c2_dist = truncnorm_rvs(
                 a=(0 - c2_mean) / c2_sd,
                 b=100,  # the upper limit of distribution is 100 * sd of the normal distribution
                 loc=c2_mean,
                 scale=c2_sd,
-                size=n_runs
+                size=n_runs,
+                rng=rng
             )
+    return x2_dist, c2_dist
+
+
+def apply_mixture_process(
+        input_c,
+        x2_mean,
+        x2_sd,
+        c2_mean,
+        c2_sd,
+        log_dist=False,
+        rng: np.random.Generator | None = None) -> ProcessResult:
+    """
+    calculates the substance concentration after a mixture process of the main stream into a diluting liquid.
+    """
+    with stage("sampling") as timing:
+        x2_dist, c2_dist = mixture_draws(input_c.size, x2_mean, x2_sd, c2_mean, c2_sd, log_dist, rng)
+        timing.nbytes, timing.n_samples = x2_dist.nbytes + c2_dist.nbytes, x2_dist.size + c2_dist.size
 
     output_c = input_c * (1 - x2_dist) + c2_dist * x2_dist
     rmv_factor = (1 - output_c / input_c) * 100
@@ -195,33 +518,182 @@ def apply_mixture_process(
     )
 
 
+def apply_generic_process_batch(
+        input_c: np.ndarray,
+        lit_rmvs: list[RemovalPercent],
+        cs_rmvs: list[RemovalPercent],
+        rmv_factor_resolution: int | float,
+        rngs: list[np.random.Generator],
+        power: int | float = 100,
+) -> list[ProcessResult]:
+    """
+    vectorized version of `apply_generic_process` for a (n_scenarios x n_runs) array of input concentrations.
+    row i is treated with the removal data `lit_rmvs[i]` and `cs_rmvs[i]` and draws from `rngs[i]`,
+    which gives the same rows as `apply_generic_process` called with the same generators.
+    rows passing the same removal data objects share their sampler. the removal factors of rows that are sorted
+    anyway are drawn by sorting all their uniforms at once and counting them per grid value (see
+    `DiscreteSampler.ppf_sorted`) instead of a binary search per draw.
+    """
+    n_scenarios, n_runs = input_c.shape
+    samplers: dict[tuple[int, int], tuple[DiscreteSampler, DominantDistribution]] = {}
+    row_samplers = []
+    for lit_rmv, cs_rmv in zip(lit_rmvs, cs_rmvs):
+        key = (id(lit_rmv), id(cs_rmv))
+        if key not in samplers:
+            samplers[key] = posterior_sampler(lit_rmv, cs_rmv, rmv_factor_resolution, power)
+        row_samplers += [samplers[key]]
+    dominant_distributions = [d for _, d in row_samplers]
+
+    with stage("sampling") as timing:
+        u = np.empty((n_scenarios, n_runs))
+        for i, rng in enumerate(rngs):
+            rng.random(out=u[i])
+        # if CS distribution is dominant, the average of the posterior distribution can be expected to be
+        # the real site-specific average. --> no sorting of removal factors
+        av_out = np.array([d == DominantDistribution.case_study for d in dominant_distributions], dtype=bool)
+        rmv_factor = np.empty((n_scenarios, n_runs))
+        sorted_rows = np.flatnonzero(~av_out)
+        # the sorted removal factors are the inverse cdf of the sorted uniforms
+        if len(sorted_rows) == n_scenarios:
+            u.sort(axis=1)
+        else:
+            u[sorted_rows] = np.sort(u[sorted_rows], axis=1)
+        for i in sorted_rows:
+            rmv_factor[i] = row_samplers[i][0].ppf_sorted(u[i])
+        for i in np.flatnonzero(av_out):
+            rmv_factor[i] = row_samplers[i][0].ppf(u[i])
+        timing.nbytes, timing.n_samples = rmv_factor.nbytes, rmv_factor.size
+
+    with stage("sorting"):
+        # the stages of `simulate_removal_batch` pass descending rows already
+        if not np.all(input_c[:, 1:] <= input_c[:, :-1]):
+            input_c = np.sort(input_c, axis=1)[:, ::-1]
+        output_c = input_c * (1 - rmv_factor / 100)
+        # descending inputs times ascending removal factors are already descending
+        if av_out.any():
+            output_c[av_out] = np.sort(output_c[av_out], axis=1)[:, ::-1]
+
+    return [
+        ProcessResult(
+            ProcessType.generic,
+            output_c[i],
+            rmv_factor[i],
+            dominant_distributions[i],
+            bool(av_out[i])
+        )
+        for i in range(n_scenarios)
+    ]
+
+
+def apply_mixture_process_batch(
+        input_c: np.ndarray,
+        mixtures: list[Mixture],
+        rngs: list[np.random.Generator],
+) -> list[ProcessResult]:
+    """
+    vectorized version of `apply_mixture_process` for several mixtures at once.
+    `input_c` is either a (n_mixtures x n_runs) array (one row per mixture) or a (n_runs,) array shared by all mixtures.
+    mixture i draws from `rngs[i]` the same values as `mixture_draws`. the mixtures with the same kind of distribution
+    are drawn as one (n_mixtures x n_runs) block with one row of bounds per mixture.
+    """
+    n_mixtures = len(mixtures)
+    input_c = np.broadcast_to(input_c, (n_mixtures, np.shape(input_c)[-1]))
+    n_runs = input_c.shape[1]
+    x2_mean, x2_sd, c2_mean, c2_sd = np.array(
+        [[m.x2_mean, m.x2_sd, m.c2_mean, m.c2_sd] for m in mixtures], dtype=float
+    ).reshape(n_mixtures, 4).T[:, :, None]
+    log_dist = np.array([m.log_dist for m in mixtures], dtype=bool)
+
+    def generators(rows: np.ndarray) -> list[np.random.Generator]:
+        return [rngs[i] for i in rows]
+
+    with stage("sampling") as timing:
+        # every row draws x2 before c2 from its own generator, like `mixture_draws`
+        x2_dist = np.repeat(x2_mean, n_runs, axis=1)
+        rows = np.flatnonzero(x2_sd[:, 0] != 0)
+        if len(rows):
+            mean, sd = x2_mean[rows], x2_sd[rows]
+            x2_dist[rows] = truncnorm_rvs((0 - mean) / sd, (1 - mean) / sd, mean, sd, (len(rows), n_runs),
+                                          generators(rows))
+
+        c2_dist = np.repeat(c2_mean, n_runs, axis=1)
+        rows = np.flatnonzero((c2_sd[:, 0] != 0) & log_dist)
+        if len(rows):
+            c2_dist[rows] = lognorm_rvs(c2_sd[rows], c2_mean[rows], (len(rows), n_runs), generators(rows))
+        rows = np.flatnonzero((c2_sd[:, 0] != 0) & ~log_dist)
+        if len(rows):
+            mean, sd = c2_mean[rows], c2_sd[rows]
+            # the upper limit of distribution is 100 * sd of the normal distribution
+            c2_dist[rows] = truncnorm_rvs((0 - mean) / sd, 100, mean, sd, (len(rows), n_runs), generators(rows))
+        timing.nbytes, timing.n_samples = x2_dist.nbytes + c2_dist.nbytes, x2_dist.size + c2_dist.size
+
+    output_c = input_c * (1 - x2_dist) + c2_dist * x2_dist
+    rmv_factor = (1 - output_c / input_c) * 100
+    output_c = np.sort(output_c, axis=1)[:, ::-1]
+    return [
+        ProcessResult(
+            ProcessType.mixture,
+            output_c[i],
+            rmv_factor[i],
+            DominantDistribution.case_study,
+            average_out=True
+        )
+        for i in range(n_mixtures)
+    ]
+
+
 # case study specific data of separation processes are saved and loaded with "mixture" functions
-def apply_separation_process(input_c, x2_mean, x2_sd, c2_mean, c2_sd, distribution) -> ProcessResult:
+def apply_separation_process(
+        input_c,
+        x2_mean,
+        x2_sd,
+        c2_mean,
+        c2_sd,
+        distribution=None,
+        rng: np.random.Generator | None = None,
+        log_dist=False) -> ProcessResult:
     """
     calculates the substance concentration after a mixture process of the main stream into a diluting liquid.
+    the concentration of the separated liquid is at most the inlet concentration. it is a truncated normal
+    distribution, or a truncated lognormal distribution with `log_dist`.
+    another scipy `distribution` with the shape parameters of `truncnorm` is sampled through its `rvs`,
+    `None` (the default) or `scipy.stats.truncnorm` draw with `promisces.sampling.truncnorm_rvs`.
     """
     n_runs = input_c.size
+    rng = rng if rng is not None else np.random.default_rng()
+    rvs = truncnorm_rvs if distribution is None or getattr(distribution, "name", None) == "truncnorm" else \
+        lambda size, rng, **kwargs: distribution.rvs(size=size, random_state=rng, **kwargs)
 
     if x2_sd == 0:
         x2_dist = np.array([x2_mean] * n_runs)
     else:
-        x2_dist = distribution.rvs(
+        x2_dist = rvs(
             a=(0 - x2_mean) / x2_sd,
             b=(1 - x2_mean) / x2_sd,
             loc=x2_mean,
             scale=x2_sd,
-            size=n_runs
+            size=n_runs,
+            rng=rng
         )
 
     if c2_sd == 0:
         c2_dist = np.array([c2_mean] * n_runs)
+    elif log_dist:
+        c2_dist = truncated_lognorm_rvs(
+            s=c2_sd,
+            scale=c2_mean,
+            upper=input_c,  # the upper limit is the concentration of the inlet
+            size=n_runs,
+            rng=rng
+        )
     else:
-        c2_dist = distribution.rvs(
+        c2_dist = rvs(
             a=(0 - c2_mean) / c2_sd,  # lower limit is 0
             b=(input_c - c2_mean) / c2_sd,  # the upper limit is the concentration of the inlet
             loc=c2_mean,
             scale=c2_sd,
-            size=n_runs
+            size=n_runs,
+            rng=rng
         )
 
     output_c = (input_c - c2_dist * x2_dist) / (1 - x2_dist)
@@ -242,20 +714,25 @@ def apply_separation_sludge_process(
         rmv_factor_resolution: int | float,
         prior_power: int | float = 100,
         x_eff_mean=0.9,
-        x_eff_sd=0.02
+        x_eff_sd=0.02,
+        rng: np.random.Generator | None = None,
+        stratified: bool = False,
+        adaptive_grid: AdaptiveGrid | None = None,
 ) -> ProcessResult:
     """
     calculates the substance concentration in sludge after dewatering
     """
     # separation_sludge
     n_runs = input_c.size
+    rng = rng if rng is not None else np.random.default_rng()
 
-    x_eff_dist = np.sort(truncnorm.rvs(
+    x_eff_dist = np.sort(truncnorm_rvs(
         a=(0 - x_eff_mean) / x_eff_sd,
         b=(1 - x_eff_mean) / x_eff_sd,
         loc=x_eff_mean,
         scale=x_eff_sd,
-        size=n_runs
+        size=n_runs,
+        rng=rng
     ))
 
     # concentration of effluent can be estimated by the process wwtt
@@ -265,7 +742,7 @@ def apply_separation_sludge_process(
         lit_rmv,  # TODO: in this case we might need an other t.id ("wwtt")?
         cs_rmv,
         rmv_factor_resolution,
-        power=prior_power, n_runs=n_runs
+        power=prior_power, n_runs=n_runs, rng=rng, stratified=stratified, adaptive_grid=adaptive_grid
     )
     c_eff_dist = result.output_concentration
     output_c = (input_c - c_eff_dist * x_eff_dist) / (1 - x_eff_dist)
@@ -0,0 +1,46 @@
+from typing import Sequence
+
+import numpy as np
+
+SeedLike = int | np.random.SeedSequence | None
+
+
+def as_seed_sequence(seed: SeedLike) -> np.random.SeedSequence:
+    """`None` draws fresh entropy from the OS"""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def child_seed(seed: SeedLike, *keys: int) -> np.random.SeedSequence:
+    """
+    deterministic child of `seed` identified by `keys`.
+    unlike `SeedSequence.spawn`, it doesn't depend on how many children were spawned before.
+    """
+    seq = as_seed_sequence(seed)
+    return np.random.SeedSequence(seq.entropy, spawn_key=(*seq.spawn_key, *keys), pool_size=seq.pool_size)
+
+
+def scenario_seeds(seed: SeedLike | Sequence[np.random.SeedSequence], n_scenarios: int) -> list[np.random.SeedSequence]:
+    """
+    one seed per scenario of a grid: the i-th scenario gets the child `i` of `seed`.
+    a list of seeds is returned as is, which lets a shard of a grid reuse the seeds of the full grid.
+    """
+    if isinstance(seed, Sequence):
+        if len(seed) != n_scenarios:
+            raise ValueError(f"expected {n_scenarios} seeds, got {len(seed)}")
+        return list(seed)
+    root = as_seed_sequence(seed)
+    return [child_seed(root, i) for i in range(n_scenarios)]
+
+
+def simulation_rngs(seed: SeedLike, n_treatments: int) -> tuple[np.random.Generator, list[np.random.Generator]]:
+    """
+    independent generators for the starting concentration and for every treatment of a train,
+    so that the draws of a treatment don't depend on the treatments after it.
+    """
+    seq = as_seed_sequence(seed)
+    return (
+        np.random.default_rng(child_seed(seq, 0)),
+        [np.random.default_rng(child_seed(seq, 1 + i)) for i in range(n_treatments)]
+    )
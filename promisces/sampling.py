@@ -0,0 +1,116 @@
+import dataclasses as dtc
+from typing import Sequence
+
+import numpy as np
+from scipy.special import log_ndtr, ndtri_exp
+
+# one generator, or one generator per row of a 2-d `size`
+Generators = np.random.Generator | Sequence[np.random.Generator]
+
+
+@dtc.dataclass(frozen=True)
+class DiscreteSampler:
+    """
+    discrete distribution over the values of `grid`, set up once and drawn from many times.
+    `cdf` is the normalized cumulative sum of the probabilities, so a draw costs one binary search on the grid.
+    """
+    grid: np.ndarray
+    probs: np.ndarray
+    cdf: np.ndarray
+
+    @staticmethod
+    def from_probs(grid: np.ndarray, probs: np.ndarray) -> "DiscreteSampler":
+        # copies, the frozen arrays must not be the caller's
+        grid = np.array(grid, dtype=float)
+        probs = np.array(probs, dtype=float)
+        cdf = np.cumsum(probs)
+        cdf /= cdf[-1]
+        probs /= probs.sum()
+        for arr in (grid, probs, cdf):
+            arr.flags.writeable = False
+        return DiscreteSampler(grid, probs, cdf)
+
+    def sample(self, size: int, rng: np.random.Generator, stratified: bool = False) -> np.ndarray:
+        """
+        same draws as `rng.choice(grid, size, p=probs)`.
+        `stratified` draws one uniform in each of `size` equal-width strata of [0, 1), the values come out sorted.
+        """
+        if stratified:
+            u = (np.arange(size) + rng.random(size)) / size
+        else:
+            u = rng.random(size)
+        return self.ppf(u)
+
+    def sample_sorted(self, size: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        `size` iid draws in ascending order, without sorting:
+        the number of draws of every grid value is multinomial, so the sorted sample is a repeat of the grid.
+        """
+        counts = rng.multinomial(size, self.probs)
+        return np.repeat(self.grid, counts)
+
+    def ppf(self, u: np.ndarray) -> np.ndarray:
+        """inverse cdf of uniforms on [0, 1), monotonic in `u`"""
+        return self.grid[np.searchsorted(self.cdf, u, side="right")]
+
+    def ppf_sorted(self, u: np.ndarray) -> np.ndarray:
+        """
+        same values as `ppf` for ascending uniforms on [0, 1), without searching every uniform:
+        the uniforms below every cdf value are counted and the grid is repeated by the counts.
+        """
+        return np.repeat(self.grid, np.diff(np.searchsorted(u, self.cdf, side="left"), prepend=0))
+
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def norm_pdf(x, loc=0., scale=1.) -> np.ndarray:
+    """same values as `scipy.stats.norm.pdf`, without importing `scipy.stats`"""
+    z = (x - loc) / scale
+    return np.exp(-z ** 2 / 2.0) / _SQRT_2PI / scale
+
+
+def _random(size, rng: Generators, method: str) -> np.ndarray:
+    """`rng.<method>(size)`, or row i of a (n_rows, n_runs) `size` drawn from `rng[i]` with the same values"""
+    if isinstance(rng, np.random.Generator):
+        return getattr(rng, method)(size)
+    out = np.empty(size)
+    for row, row_rng in zip(out, rng, strict=True):
+        getattr(row_rng, method)(out=row)
+    return out
+
+
+def truncnorm_rvs(a, b, loc, scale, size: int | tuple[int, int], rng: Generators) -> np.ndarray:
+    """
+    draws of a normal distribution truncated to [a, b] (in standard deviations from `loc`, like `scipy.stats.truncnorm`).
+    `a`, `b`, `loc` and `scale` may be arrays broadcasting to `size`, e.g. one upper bound per run.
+    with a (n_rows, n_runs) `size` and one generator per row, row i has the values of a draw of n_runs from `rng[i]`,
+    so that several distributions (bounds of shape (n_rows, 1)) are drawn in one call.
+    inverse cdf in log space on the lower tail (intervals in the upper half are mirrored), so bounds far in the tails
+    and infinite bounds are fine.
+    """
+    # the cdf at the bounds is only evaluated once for scalar bounds
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    mirror = a + b > 0
+    lower, upper = np.where(mirror, -b, a), np.where(mirror, -a, b)
+    log_cdf_upper = log_ndtr(upper)
+    ratio = np.exp(log_ndtr(lower) - log_cdf_upper)
+    # u in (0, 1], u = 1 gives the upper bound
+    u = 1 - _random(size, rng, "random")
+    x = ndtri_exp(log_cdf_upper + np.log(u + (1 - u) * ratio))
+    return loc + scale * np.where(mirror, -x, x)
+
+
+def lognorm_rvs(s, scale, size: int | tuple[int, int], rng: Generators) -> np.ndarray:
+    """
+    draws of `scipy.stats.lognorm(s, scale=scale)`, i.e. `scale * exp(s * z)` with z standard normal.
+    `size` and `rng` like `truncnorm_rvs`.
+    """
+    return scale * np.exp(s * _random(size, rng, "standard_normal"))
+
+
+def truncated_lognorm_rvs(s, scale, upper, size: int, rng: np.random.Generator) -> np.ndarray:
+    """draws of `scipy.stats.lognorm(s, scale=scale)` truncated to (0, upper], `upper` may be one bound per run"""
+    with np.errstate(divide="ignore"):
+        b = np.log(np.asarray(upper, dtype=float) / scale) / s
+    return scale * np.exp(s * truncnorm_rvs(-np.inf, b, 0, 1, size, rng))
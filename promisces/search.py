@@ -0,0 +1,250 @@
+import dataclasses as dtc
+from typing import TYPE_CHECKING, Callable, Iterator, Sequence
+
+import numpy as np
+
+from promisces.models.matrix import Matrix
+from promisces.models.mixture import Mixture
+from promisces.models.reference import Reference
+from promisces.models.registry import Registry, registry
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substance
+from promisces.models.treatment import Treatment, TreatmentTrain
+from promisces.rng import SeedLike, as_seed_sequence
+from promisces.simulate_removal import simulate_removal
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# standard deviations above its mean bounding the share of the diluting stream of a mixture
+MIXTURE_SDS = 5
+
+
+@dtc.dataclass
+class TrainCandidate:
+    treatments: tuple[Treatment, ...]
+    # optimistic percentile of the final concentration per substance, see `stage_factors`
+    bound: np.ndarray
+    references: np.ndarray
+    # simulated percentile of the final concentration per substance, `None` if the train was not simulated
+    percentiles: np.ndarray | None = None
+
+    @property
+    def ids(self) -> tuple[str, ...]:
+        return tuple(t.id for t in self.treatments)
+
+    @property
+    def ratio(self) -> float:
+        """worst ratio of the (simulated, otherwise bounded) percentile to the reference value over the substances"""
+        values = self.percentiles if self.percentiles is not None else self.bound
+        return float(np.max(values / self.references))
+
+    @property
+    def feasible(self) -> bool:
+        return self.percentiles is not None and bool(np.all(self.percentiles < self.references))
+
+
+@dtc.dataclass
+class SearchResult:
+    substances: list[Substance]
+    percentile: float
+    # every train that reaches the output matrix and passed the bounds, in enumeration order
+    candidates: list[TrainCandidate]
+    # feasible candidates, best ratio first
+    shortlist: list[TrainCandidate]
+    # branches cut by the bounds
+    n_pruned: int
+
+    def to_frame(self) -> "pd.DataFrame":
+        import pandas as pd
+        return pd.DataFrame([
+            dict(
+                treatment_train=" ".join(c.ids),
+                length=len(c.treatments),
+                feasible=c.feasible,
+                ratio=c.ratio,
+                **{f"{s.id}_bound": b for s, b in zip(self.substances, c.bound)},
+                **({f"{s.id}_{self.percentile * 100:g}%": p for s, p in zip(self.substances, c.percentiles)}
+                   if c.percentiles is not None else {}),
+            )
+            for c in self.candidates
+        ])
+
+
+def stage_factors(treatment: Treatment, substances: Sequence[Substance], removal_margin: float = 5.) -> np.ndarray:
+    """
+    optimistic ratio of output to input concentration of `treatment` per substance: one minus the best
+    literature or case study removal plus `removal_margin` percent points, one minus the share of the diluting
+    stream `MIXTURE_SDS` standard deviations above its mean for mixtures (whose own concentration is at least 0),
+    and 0 where nothing bounds the removal (no data, separation processes).
+    this is a heuristic, not a strict lower bound: the posterior can put some weight on removals above the
+    margin, so a train close to the reference value may be pruned although its percentile would pass.
+    """
+    if treatment.requires_mixture:
+        mixture = treatment.mixture
+        if treatment.id == "sepev" or mixture is None:
+            return np.zeros(len(substances))
+        return np.full(len(substances), 1 - min(1., mixture.x2_mean + MIXTURE_SDS * mixture.x2_sd))
+    if treatment.id == "wwsl":
+        return np.zeros(len(substances))
+    factors = np.zeros(len(substances))
+    for j, substance in enumerate(substances):
+        removals = np.r_[RemovalPercent.from_lit(treatment, substance).arr, treatment.removal.arr]
+        if len(removals) > 0:
+            factors[j] = 1 - min(100., removals.max() + removal_margin) / 100
+    return factors
+
+
+def _best_factors(
+        transitions: np.ndarray,
+        factors: np.ndarray,
+        target: int,
+        max_length: int,
+) -> np.ndarray:
+    """
+    `best[d, m, s]`: smallest product of the stage factors of substance s over the paths of at most d treatments
+    from matrix m to the `target` matrix (inf without a path). treatments may repeat on the paths, which only
+    makes the bound weaker.
+    """
+    n_treatments, n_matrices = transitions.shape
+    best = np.full((max_length + 1, n_matrices, factors.shape[1]), np.inf)
+    best[0, target] = 1
+    for d in range(1, max_length + 1):
+        best[d] = best[d - 1]
+        for t in range(n_treatments):
+            accepted = np.flatnonzero(transitions[t] >= 0)
+            remaining = best[d - 1, transitions[t, accepted]]
+            # a factor of 0 doesn't make a missing path reachable
+            with np.errstate(invalid="ignore"):
+                product = np.where(np.isinf(remaining), np.inf, factors[t] * remaining)
+            best[d, accepted] = np.minimum(best[d, accepted], product)
+    return best
+
+
+def _walk(
+        graph: Registry,
+        source: int,
+        target: int,
+        max_length: int,
+        extend: Callable[[tuple[int, ...], int, int], bool] = lambda prefix, t, out: True,
+) -> Iterator[tuple[int, ...]]:
+    """
+    indices of the trains of at most `max_length` different treatments of `graph` from matrix `source` to `target`,
+    depth first so that trains sharing a prefix follow each other. `extend(prefix, t, out)` decides whether
+    the prefix is continued with treatment t, whose output matrix is `out`.
+    """
+    def visit(prefix: tuple[int, ...], matrix: int) -> Iterator[tuple[int, ...]]:
+        if prefix and matrix == target:
+            yield prefix
+        if len(prefix) == max_length:
+            return
+        for t in np.flatnonzero(graph.transitions[:, matrix] >= 0):
+            t, out = int(t), int(graph.transitions[t, matrix])
+            if t not in prefix and extend(prefix, t, out):
+                yield from visit(prefix + (t,), out)
+
+    yield from visit((), source)
+
+
+def enumerate_trains(
+        input_matrix: Matrix | str,
+        output_matrix: Matrix | str,
+        max_length: int = 3,
+        treatments: Sequence[Treatment] | None = None,
+) -> Iterator[tuple[Treatment, ...]]:
+    """every train of at most `max_length` different `treatments` (default: all predefined ones) between the matrices"""
+    graph = Registry(registry.matrices, [], treatments if treatments is not None else registry.treatments)
+    source, target = (graph.matrix_index[m if isinstance(m, str) else m.id] for m in (input_matrix, output_matrix))
+    for train in _walk(graph, source, target, max_length):
+        yield tuple(graph.treatments[t] for t in train)
+
+
+def search_trains(
+        input_matrix: Matrix | str,
+        output_matrix: Matrix | str,
+        substances: Sequence[Substance],
+        max_length: int = 3,
+        percentile: float = 0.95,
+        treatments: Sequence[Treatment] | None = None,
+        mixtures: dict[str, Mixture] | None = None,
+        n_runs: int = 2000,
+        rmv_factor_resolution: int = 1000,
+        seed: SeedLike = 0,
+        removal_margin: float = 5.,
+        shortlist: int = 10,
+) -> SearchResult:
+    """
+    searches the trains of at most `max_length` `treatments` (default: all predefined ones) from `input_matrix`
+    to `output_matrix` that keep the `percentile` of the final concentration below the reference value of
+    every substance.
+    mixing and separation treatments take their data from `mixtures` (by id), those without any are left out.
+    branches are pruned when their optimistic (heuristic, see `stage_factors`) bound, times the best reduction
+    still reachable on the way to `output_matrix`, can't get below a reference value. the remaining trains are
+    simulated depth first with one seed and `cache_prefixes`, so trains with a common prefix share its stages.
+    returns the candidates with the `shortlist` best feasible ones, ranked by their worst ratio to the reference.
+    """
+    mixtures = mixtures or {}
+    pool = [
+        t.clone(mixture=mixtures[t.id]) if t.id in mixtures else t
+        for t in (treatments if treatments is not None else registry.treatments)
+    ]
+    graph = Registry(registry.matrices, [], [t for t in pool if not t.requires_mixture or t.mixture is not None])
+    input_matrix = registry.matrix(input_matrix) if isinstance(input_matrix, str) else input_matrix
+    output_matrix = registry.matrix(output_matrix) if isinstance(output_matrix, str) else output_matrix
+    source, target = graph.matrix_index[input_matrix.id], graph.matrix_index[output_matrix.id]
+    substances = list(substances)
+    if not substances:
+        raise ValueError("expected at least one substance to search trains for")
+
+    start = np.array([_starting_percentile(s, input_matrix, percentile) for s in substances])
+    references = np.array([_reference(s, output_matrix).ref_value_ng_l for s in substances], dtype=float)
+    factors = np.array([stage_factors(t, substances, removal_margin) for t in graph.treatments])
+    factors = factors.reshape(len(graph.treatments), len(substances))
+    best = _best_factors(graph.transitions, factors, target, max_length)
+
+    n_pruned = 0
+
+    def extend(prefix: tuple[int, ...], t: int, out: int) -> bool:
+        nonlocal n_pruned
+        remaining = best[max_length - len(prefix) - 1, out]
+        if np.isinf(remaining[0]):
+            # the output matrix is out of reach, not a pruned branch
+            return False
+        bound = start * factors[list(prefix + (t,))].prod(axis=0) * remaining
+        if np.any(bound >= references):
+            n_pruned += 1
+            return False
+        return True
+
+    candidates = [
+        TrainCandidate(tuple(graph.treatments[t] for t in train), start * factors[list(train)].prod(axis=0), references)
+        for train in _walk(graph, source, target, max_length, extend)
+    ]
+
+    seed = as_seed_sequence(seed)
+    percentiles = np.empty((len(candidates), len(substances)))
+    # substance by substance, so that the prefixes of consecutive trains are still cached
+    for j, substance in enumerate(substances):
+        for i, candidate in enumerate(candidates):
+            scenario = Scenario(f"search-{i}", input_matrix, substance, TreatmentTrain(list(candidate.treatments)))
+            result = simulate_removal(scenario, n_runs, rmv_factor_resolution, seed, cache_prefixes=True)
+            percentiles[i, j] = np.quantile(result.final_concentration, percentile)
+    for candidate, values in zip(candidates, percentiles):
+        candidate.percentiles = values
+
+    ranked = sorted((c for c in candidates if c.feasible), key=lambda c: (c.ratio, len(c.treatments)))
+    return SearchResult(substances, percentile, candidates, ranked[:shortlist], n_pruned)
+
+
+def _starting_percentile(substance: Substance, input_matrix: Matrix, percentile: float) -> float:
+    """the percentile of the uniform starting concentration, as sampled by `StartingConcentration`"""
+    start_c = substance.starting_concentration
+    if start_c is None:
+        start_c = StartingConcentration.from_lit(substance, input_matrix)
+    return float(start_c.arr.min() + percentile * (start_c.arr.max() - start_c.arr.min()))
+
+
+def _reference(substance: Substance, output_matrix: Matrix) -> Reference:
+    return substance.reference if substance.reference is not None else Reference.from_lit(output_matrix, substance)
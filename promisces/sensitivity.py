@@ -0,0 +1,176 @@
+import dataclasses as dtc
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.treatment import TreatmentTrain
+from promisces.removal_processes import ProcessType
+from promisces.rng import SeedLike, as_seed_sequence, child_seed
+from promisces.simulate_removal import SimulationResult, _process_type, _resolve_starting_concentration, \
+    simulate_removal_batch
+
+INPUT = "input"
+
+
+@dtc.dataclass(frozen=True)
+class Factor:
+    """
+    an uncertain input of a scenario, varied uniformly between `lower` and `upper`.
+    `treatment_index` is `None` for the starting concentration.
+    parameters: `x2_mean`, `x2_sd`, `c2_mean` and `c2_sd` of a mixture, `removal_shift` (added to the case study
+    removal in %), `start_low` and `start_high` (factors on the bounds of the starting concentration).
+    """
+    treatment: str
+    parameter: str
+    treatment_index: int | None
+    lower: float
+    upper: float
+
+    @property
+    def name(self) -> str:
+        return f"{self.treatment}.{self.parameter}"
+
+
+def default_factors(scenario: Scenario, relative_range: float = 0.2, removal_shift: float = 10.) -> list[Factor]:
+    """
+    the bounds of the starting concentration and the mixture means within +-`relative_range`,
+    and the case study removals of generic processes shifted by up to +-`removal_shift` percent points
+    """
+    low, high = 1 - relative_range, 1 + relative_range
+    factors = [Factor(INPUT, "start_low", None, low, high), Factor(INPUT, "start_high", None, low, high)]
+    for i, treatment in enumerate(scenario.treatment_train):
+        label = f"{i}:{treatment.id}"
+        if treatment.mixture is not None:
+            mixture = treatment.mixture
+            factors += [
+                Factor(label, "x2_mean", i, max(0., mixture.x2_mean * low), min(1., mixture.x2_mean * high)),
+                Factor(label, "c2_mean", i, mixture.c2_mean * low, mixture.c2_mean * high),
+            ]
+        elif _process_type(treatment) == ProcessType.generic and len(treatment.removal) > 0:
+            factors += [Factor(label, "removal_shift", i, -removal_shift, removal_shift)]
+    # factors without a range (e.g. a mixture mean of 0) have no effect
+    return [f for f in factors if f.upper > f.lower]
+
+
+def perturb(scenario: Scenario, factors: list[Factor], values: np.ndarray) -> Scenario:
+    """copy of `scenario` with `factors[j]` set to `values[j]`"""
+    start_c = _resolve_starting_concentration(scenario).arr
+    start_low, start_high = start_c.min(), start_c.max()
+    treatments = [t.clone() for t in scenario.treatment_train]
+    for factor, value in zip(factors, values):
+        if factor.parameter == "start_low":
+            start_low *= value
+        elif factor.parameter == "start_high":
+            start_high *= value
+        elif factor.parameter == "removal_shift":
+            treatment = treatments[factor.treatment_index]
+            treatment.removal = RemovalPercent(np.clip(treatment.removal.arr + value, 0, 100))
+        else:
+            treatment = treatments[factor.treatment_index]
+            treatment.mixture = dtc.replace(treatment.mixture, **{factor.parameter: value})
+    start_c = StartingConcentration(np.array([start_low, start_high]))
+    # `Scenario.__post_init__` prefers the starting concentration of the substance, so it carries the perturbed one
+    substance = scenario.substance
+    if substance.starting_concentration is not None:
+        substance = dtc.replace(substance, starting_concentration=start_c)
+    return dtc.replace(
+        scenario,
+        substance=substance,
+        treatment_train=TreatmentTrain(treatments),
+        starting_concentration=start_c
+    )
+
+
+def exceedance_probability(result: SimulationResult) -> float:
+    """share of runs with a final concentration above the reference value"""
+    return float((result.final_concentration > result.scenario.reference.ref_value_ng_l).mean())
+
+
+@dtc.dataclass
+class SensitivityResult:
+    factors: list[Factor]
+    # model outputs of the sample matrices A and B, and of A with column j from B (one row per factor)
+    y_a: np.ndarray
+    y_b: np.ndarray
+    y_ab: np.ndarray
+
+    @property
+    def variance(self) -> float:
+        return float(np.var(np.r_[self.y_a, self.y_b], ddof=1))
+
+    @property
+    def first_order(self) -> np.ndarray:
+        """Saltelli (2010) estimator"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.mean(self.y_b * (self.y_ab - self.y_a), axis=1) / self.variance
+
+    @property
+    def total(self) -> np.ndarray:
+        """Jansen (1999) estimator"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.mean((self.y_a - self.y_ab) ** 2, axis=1) / 2 / self.variance
+
+    @property
+    def indices(self) -> pd.DataFrame:
+        return pd.DataFrame(dict(
+            treatment=[f.treatment for f in self.factors],
+            parameter=[f.parameter for f in self.factors],
+            S1=self.first_order,
+            ST=self.total,
+        ))
+
+
+def sobol_indices(
+        scenario: Scenario,
+        factors: list[Factor] | None = None,
+        n_samples: int = 256,
+        n_runs: int = 2000,
+        rmv_factor_resolution: int = 1000,
+        seed: SeedLike = None,
+        output: Callable[[SimulationResult], float] = exceedance_probability,
+        max_batch_size: int = 256,
+) -> SensitivityResult:
+    """
+    first-order and total Sobol indices of `output` (default: the probability of exceeding the reference value)
+    for `factors` (default: `default_factors(scenario)`).
+    the Saltelli design of `n_samples` x (n_factors + 2) perturbed scenarios is drawn from a scrambled Sobol
+    sequence and simulated with `simulate_removal_batch`, `max_batch_size` scenarios at a time.
+    every scenario uses the same seed (common random numbers), so the differences of the outputs come from the
+    factors and not from the Monte Carlo noise of `n_runs` runs.
+    """
+    factors = factors if factors is not None else default_factors(scenario)
+    n_factors = len(factors)
+    seed = as_seed_sequence(seed)
+    lower, upper = np.array([f.lower for f in factors]), np.array([f.upper for f in factors])
+    design = qmc.Sobol(2 * n_factors, seed=np.random.default_rng(child_seed(seed, 0))).random(n_samples)
+    a = qmc.scale(design[:, :n_factors], lower, upper)
+    b = qmc.scale(design[:, n_factors:], lower, upper)
+    ab = np.repeat(a[None], n_factors, axis=0)
+    for j in range(n_factors):
+        ab[j, :, j] = b[:, j]
+
+    samples = np.concatenate([a, b, ab.reshape(-1, n_factors)])
+    simulation_seed = child_seed(seed, 1)
+    y = np.empty(len(samples))
+    for start in range(0, len(samples), max_batch_size):
+        chunk = samples[start:start + max_batch_size]
+        results = simulate_removal_batch(
+            [perturb(scenario, factors, values) for values in chunk],
+            n_runs,
+            rmv_factor_resolution,
+            max_batch_size,
+            seed=[simulation_seed] * len(chunk)
+        )
+        y[start:start + len(chunk)] = [output(r) for r in results]
+
+    return SensitivityResult(
+        factors,
+        y[:n_samples],
+        y[n_samples:2 * n_samples],
+        y[2 * n_samples:].reshape(n_factors, n_samples),
+    )
@@ -0,0 +1,174 @@
+import dataclasses as dtc
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from promisces.cache import LRUCache
+from promisces.config import build_scenario
+from promisces.models.literature import literature_store
+from promisces.models.scenario import Scenario
+from promisces.removal_processes import grid_cache_info, prior_beta
+from promisces.simulate_removal import SUMMARY_PERCENTILES, SimulationResult, prefix_cache, simulate_removal
+
+DEFAULT_REQUEST = dict(n_runs=10000, resolution=1000, seed=0, percentiles=list(SUMMARY_PERCENTILES))
+
+
+def request_key(data) -> str:
+    """sha256 of the canonical JSON of `data`, equal for requests that only differ in key order or whitespace"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _records(frame: pd.DataFrame) -> dict[str, dict[str, float | None]]:
+    return {
+        index: {column: None if np.isnan(value) else float(value) for column, value in row.items()}
+        for index, row in frame.to_dict(orient="index").items()
+    }
+
+
+def result_response(result: SimulationResult, percentiles: tuple[float, ...]) -> dict:
+    """the JSON body of a simulation: per-stage summaries, the exceedance probability and the stage timings"""
+    summary = result.summarize(percentiles)
+    reference = result.scenario.reference
+    return dict(
+        name=result.scenario.name,
+        n_runs=result.n_runs,
+        reference_ng_l=reference.ref_value_ng_l,
+        exceedance=float((result.final_concentration > reference.ref_value_ng_l).mean()),
+        output_c=_records(summary.output_c),
+        removal=_records(summary.removal),
+        timings=[dtc.asdict(t) for t in result.timings],
+    )
+
+
+class SimulationService:
+    """
+    simulations of scenarios given by id (see `promisces.config.build_scenario`), run on a pool of `workers`
+    threads of this process so that the literature tables, priors, samplers and stage prefixes stay warm
+    between requests. responses are memoized by the hash of the request, built scenarios by the hash of
+    their definition. requests without a seed use seed 0, so that equal requests give equal results.
+    """
+
+    def __init__(self, workers: int | None = None, max_responses: int = 1024, max_scenarios: int = 1024):
+        self.executor = ThreadPoolExecutor(workers)
+        self.responses = LRUCache(max_responses)
+        self.scenarios = LRUCache(max_scenarios)
+
+    def warm(self, resolutions: tuple[int, ...] = (1000,), power: int = 100):
+        """parses the literature tables and computes the priors before the first request"""
+        try:
+            literature_store.reload()
+        except FileNotFoundError:
+            # scenarios with their own data don't need the literature tables
+            literature_store.invalidate()
+        for resolution in resolutions:
+            prior_beta(power, resolution)
+
+    def scenario(self, data: dict) -> Scenario:
+        return self.scenarios.get_or_compute(request_key(data), lambda: build_scenario(data))
+
+    def simulate(self, request: dict) -> tuple[dict, bool]:
+        """the response to `request` and whether it was memoized"""
+        request = {**DEFAULT_REQUEST, **request}
+        key = request_key(request)
+        response = self.responses.get(key)
+        if response is not None:
+            return response, True
+        scenario = self.scenario(request["scenario"])
+        result = self.executor.submit(
+            simulate_removal,
+            scenario,
+            request["n_runs"],
+            request["resolution"],
+            request["seed"],
+            cache_prefixes=True,
+        ).result()
+        response = dict(key=key, **result_response(result, tuple(request["percentiles"])))
+        self.responses.put(key, response)
+        return response, False
+
+    def health(self) -> dict:
+        caches = dict(
+            responses=self.responses.info(),
+            scenarios=self.scenarios.info(),
+            prefix=prefix_cache.info(),
+            **grid_cache_info(),
+        )
+        return dict(status="ok", caches={name: dtc.asdict(info) for name, info in caches.items()})
+
+    def close(self):
+        self.executor.shutdown()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    `GET /health` and `POST /simulate` with a JSON body of a `scenario` and optionally `n_runs`, `resolution`,
+    `seed` and `percentiles`. errors are JSON bodies: 400 for an invalid request, 422 for a scenario without
+    literature data and 500 otherwise.
+    """
+    server: "SimulationServer"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(HTTPStatus.OK, self.server.service.health())
+        else:
+            self._send(HTTPStatus.NOT_FOUND, dict(error=f"unknown path '{self.path}'"))
+
+    def do_POST(self):
+        if self.path != "/simulate":
+            self._send(HTTPStatus.NOT_FOUND, dict(error=f"unknown path '{self.path}'"))
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            response, cached = self.server.service.simulate(request)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, dict(error=f"{type(e).__name__}: {e}"))
+            return
+        except RuntimeError as e:
+            # a valid scenario without the literature data it needs
+            self._send(HTTPStatus.UNPROCESSABLE_ENTITY, dict(error=f"{type(e).__name__}: {e}"))
+            return
+        except Exception as e:
+            # e.g. a missing literature table, the client gets an answer instead of a closed connection
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, dict(error=f"{type(e).__name__}: {e}"))
+            return
+        self._send(HTTPStatus.OK, dict(response, cached=cached))
+
+    def _send(self, status: HTTPStatus, body: dict):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class SimulationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: SimulationService, quiet: bool = False):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+        self.quiet = quiet
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, workers: int | None = None, warm: bool = True):
+    """runs a `SimulationService` on http://`host`:`port` until interrupted"""
+    service = SimulationService(workers)
+    if warm:
+        service.warm()
+    with SimulationServer((host, port), service) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
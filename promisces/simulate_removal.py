@@ -1,47 +1,179 @@
+from __future__ import annotations
+
 import dataclasses as dtc
+import hashlib
+import json
+import warnings
+from functools import cached_property
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Sequence
+
 import numpy as np
-import pandas as pd
+from scipy.special import ndtri
 
+from promisces.cache import LRUCache
+from promisces.models.mixture import Mixture
 from promisces.models.removal_percent import RemovalPercent
 from promisces.models.starting_concentration import StartingConcentration
 from promisces.models.scenario import Scenario
+from promisces.models.substance import Substance
+from promisces.models.treatment import Treatment, TreatmentTrain
+from promisces.timing import StageTimer, StageTiming, stage
+from promisces.rng import SeedLike, as_seed_sequence, child_seed, scenario_seeds, simulation_rngs
 from promisces.removal_processes import (
+    AdaptiveGrid,
+    CompactProcessResult,
     ProcessResult,
+    ProcessType,
     apply_generic_process,\
+    apply_generic_process_batch,\
+    apply_generic_process_ranked,\
     apply_mixture_process,\
+    apply_mixture_process_batch,\
     apply_separation_process,\
-    apply_separation_sludge_process
+    apply_separation_sludge_process,\
+    sorted_uniforms
 )
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from promisces.storage import ResultCache
+
+
+SUMMARY_PERCENTILES = (0.5, 0.75, 0.9, 0.95, 0.975, 0.99)
+
+
+@dtc.dataclass(frozen=True)
+class ResultSummary:
+    """
+    per-stage statistics of a `SimulationResult`, with the columns of `pd.DataFrame.describe`:
+    count, mean, std, min, one column per percentile and max. one row per column of `output_c_df`/`rmv_factor_df`.
+    """
+    percentiles: tuple[float, ...]
+    output_c: pd.DataFrame
+    removal: pd.DataFrame
+
+    @staticmethod
+    def from_arrays(arrays: dict[str, np.ndarray], percentiles: tuple[float, ...]) -> pd.DataFrame:
+        import pandas as pd
+        data = np.stack(list(arrays.values())) if arrays else np.empty((0, 0))
+        with np.errstate(invalid="ignore"):
+            stats = np.column_stack([
+                (~np.isnan(data)).sum(axis=1),
+                np.nanmean(data, axis=1),
+                np.nanstd(data, axis=1, ddof=1),
+                np.nanmin(data, axis=1),
+                *np.nanpercentile(data, np.array(percentiles) * 100, axis=1),
+                np.nanmax(data, axis=1),
+            ]) if len(data) else np.empty((0, len(percentiles) + 5))
+        return pd.DataFrame(
+            stats,
+            index=list(arrays),
+            columns=["count", "mean", "std", "min", *[f"{p * 100:g}%" for p in percentiles], "max"]
+        )
+
+
+@dtc.dataclass(frozen=True)
+class Convergence:
+    """
+    precision of the final concentration of an adaptive run with `n_runs` runs, as half-widths of the
+    `confidence` intervals: relative for the `percentiles` (from order statistics), absolute for the exceedance
+    probability of the reference value (normal approximation).
+    `history` holds (n_runs, worst relative percentile precision, exceedance precision) for every step.
+    """
+    n_runs: int
+    converged: bool
+    confidence: float
+    percentiles: tuple[float, ...]
+    percentile_values: tuple[float, ...]
+    percentile_precision: tuple[float, ...]
+    exceedance: float | None
+    exceedance_precision: float | None
+    history: tuple[tuple[int, float, float | None], ...] = ()
+
 
 @dtc.dataclass
 class SimulationResult:
+    """
+    the dataframes and the summary are built on first access and cached on the instance.
+    a result is not meant to be modified, call `invalidate_cache()` after changing its arrays or scenario.
+    compact results (see `compact()`) only cache the summary and the treatment table, so that the decoded
+    float64 dataframes don't outlive their use.
+    """
     scenario: Scenario
     n_runs: int
     rmv_factor_resolution: int
     starting_concentration: np.ndarray
-    intermediate_results: list[ProcessResult]
+    intermediate_results: list[ProcessResult | CompactProcessResult]
+    # precision reached by `simulate_removal_adaptive`, `None` for a fixed number of runs
+    convergence: "Convergence | None" = None
+    # wall time, array bytes and samples of every stage of `simulate_removal`, see `promisces.timing`.
+    # kept by `save_result`; a hit of the `ResultCache` of `simulate_removal` only reports the lookup
+    timings: list[StageTiming] = dtc.field(default_factory=list)
 
     @property
     def final_concentration(self) -> np.ndarray:
         return self.intermediate_results[-1].output_concentration
 
     @property
-    def output_c_df(self):
-        df = dict(input=self.starting_concentration)
-        for result, treatment in zip(self.intermediate_results, self.scenario.treatment_train):
-            df.update({treatment.id: result.output_concentration})
-        return pd.DataFrame(df)
+    def nbytes(self) -> int:
+        return self.starting_concentration.nbytes + sum(r.nbytes for r in self.intermediate_results)
 
     @property
-    def rmv_factor_df(self):
-        return pd.DataFrame({
+    def is_compact(self) -> bool:
+        return any(isinstance(r, CompactProcessResult) for r in self.intermediate_results)
+
+    def compact(self) -> "SimulationResult":
+        """
+        copy of the result holding float32 concentrations and integer coded removal factors
+        (see `ProcessResult.compact`). the dataframes decode them back to float64 when they are built.
+        """
+        return dtc.replace(
+            self,
+            starting_concentration=self.starting_concentration.astype(np.float32),
+            intermediate_results=[r.compact(self.rmv_factor_resolution) for r in self.intermediate_results]
+        )
+
+    def invalidate_cache(self):
+        for name in ("_output_c_df", "_rmv_factor_df", "treatment_df", "summary"):
+            self.__dict__.pop(name, None)
+
+    def _output_c_arrays(self) -> dict[str, np.ndarray]:
+        arrays = dict(input=np.asarray(self.starting_concentration, dtype=float))
+        for result, treatment in zip(self.intermediate_results, self.scenario.treatment_train):
+            arrays.update({treatment.id: result.output_concentration})
+        return arrays
+
+    def _rmv_factor_arrays(self) -> dict[str, np.ndarray]:
+        return {
             treatment.id: result.rmv_factors
             for result, treatment in zip(self.intermediate_results, self.scenario.treatment_train)
-        })
+        }
+
+    @property
+    def output_c_df(self):
+        if "_output_c_df" in self.__dict__:
+            return self.__dict__["_output_c_df"]
+        import pandas as pd
+        df = pd.DataFrame(self._output_c_arrays())
+        if not self.is_compact:
+            self.__dict__["_output_c_df"] = df
+        return df
 
     @property
+    def rmv_factor_df(self):
+        if "_rmv_factor_df" in self.__dict__:
+            return self.__dict__["_rmv_factor_df"]
+        import pandas as pd
+        df = pd.DataFrame(self._rmv_factor_arrays())
+        if not self.is_compact:
+            self.__dict__["_rmv_factor_df"] = df
+        return df
+
+    @cached_property
     def treatment_df(self):
+        import pandas as pd
         in_mat, out_mat = [self.scenario.input_matrix], []
         for treatment in self.scenario.treatment_train:
             out_mat += [treatment.get_output_matrix(in_mat[-1])]
@@ -59,76 +191,461 @@ class SimulationResult:
 
         ))
 
+    @cached_property
+    def summary(self) -> ResultSummary:
+        return self.summarize(SUMMARY_PERCENTILES)
+
+    def summarize(self, percentiles: tuple[float, ...]) -> ResultSummary:
+        """uncached summary for other percentiles than `SUMMARY_PERCENTILES`"""
+        return ResultSummary(
+            tuple(percentiles),
+            ResultSummary.from_arrays(self._output_c_arrays(), percentiles),
+            ResultSummary.from_arrays(self._rmv_factor_arrays(), percentiles),
+        )
+
     def export_excel(self, filename):
+        import pandas as pd
         with pd.ExcelWriter(filename) as excel_writer:
             self.treatment_df.to_excel(excel_writer, sheet_name='info', index=False)
-            self.output_c_df.describe(
-                percentiles=[0.5, 0.75, 0.9, 0.95, 0.975, 0.99]
-            ).T.to_excel(excel_writer, sheet_name='output_c', index=False)
-            self.rmv_factor_df.describe(
-                percentiles=[0.5, 0.75, 0.9, 0.95, 0.975, 0.99]
-            ).T.to_excel(excel_writer, sheet_name='removal', index=False)
+            self.summary.output_c.to_excel(excel_writer, sheet_name='output_c', index=False)
+            self.summary.removal.to_excel(excel_writer, sheet_name='removal', index=False)
+
+    def save(self, path: str):
+        """writes the complete result into the directory `path`, see `promisces.storage.save_result`"""
+        from promisces.storage import save_result
+        save_result(self, path)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> "SimulationResult":
+        """reads a result written by `save`, its arrays are memory-mapped with `mmap`"""
+        from promisces.storage import load_result
+        return load_result(path, mmap)
+
+
+def _resolve_starting_concentration(scenario: Scenario) -> StartingConcentration:
+    starting_concentration = scenario.starting_concentration
+    if starting_concentration is None:
+        starting_concentration = scenario.substance.starting_concentration
+    if starting_concentration is None:
+        starting_concentration = StartingConcentration.from_lit(scenario.substance, scenario.input_matrix)
+    # `Scenario.__post_init__` already stores the empty literature lookup
+    if len(starting_concentration) == 0:
+        raise RuntimeError("No starting concentration found in the literature for"
+                           f" substance {scenario.substance.id} and input matrix {scenario.input_matrix.id}.\n"
+                           f"Please provide one or try an other substance/matrix pair.")
+    return starting_concentration
+
+
+def _process_type(treatment) -> ProcessType:
+    if treatment.id.startswith("dil"):
+        return ProcessType.mixture
+    if treatment.id == "sepev":
+        return ProcessType.separation
+    if treatment.id == "wwsl":
+        return ProcessType.separation_sludge
+    return ProcessType.generic
+
+
+# stage results of treatment train prefixes, see `simulate_removal(..., cache_prefixes=True)`.
+# every entry holds the arrays of one stage, limit their number with `prefix_cache.maxsize`.
+prefix_cache = LRUCache(maxsize=64)
+
+
+def _prefix_keys(
+        scenario: Scenario,
+        starting_concentration: StartingConcentration,
+        lit_removals: list[RemovalPercent],
+        n_runs: int,
+        rmv_factor_resolution: int,
+        seed: np.random.SeedSequence,
+        adaptive_grid: AdaptiveGrid | None,
+) -> list[tuple]:
+    """
+    the key of the starting concentration, then one key per treatment.
+    the key of treatment i covers everything its result depends on: the inputs of the scenario, the seed and
+    the removal and mixture data of the treatments up to i.
+    """
+    key = (
+        scenario.input_matrix.id,
+        scenario.substance.id,
+        starting_concentration.digest(),
+        seed.entropy,
+        seed.spawn_key,
+        seed.pool_size,
+        n_runs,
+        rmv_factor_resolution,
+        adaptive_grid,
+    )
+    keys = [key]
+    for treatment, lit_rmv in zip(scenario.treatment_train, lit_removals):
+        key = key + ((
+            treatment.id,
+            treatment.with_lit_data,
+            treatment.removal.digest(),
+            lit_rmv.digest(),
+            dtc.astuple(treatment.mixture) if treatment.mixture is not None else None,
+        ),)
+        keys += [key]
+    return keys
+
+
+def result_key(
+        scenario: Scenario,
+        starting_concentration: StartingConcentration,
+        lit_removals: list[RemovalPercent],
+        n_runs: int,
+        rmv_factor_resolution: int,
+        seed: np.random.SeedSequence,
+        adaptive_grid: AdaptiveGrid | None = None,
+        compact: bool = False,
+) -> str:
+    """
+    key of a result in a `promisces.storage.ResultCache`: `Scenario.digest()` with the literature data the
+    scenario resolves to, the seed and the settings of `simulate_removal`
+    """
+    content = json.dumps(dict(
+        scenario=scenario.digest(),
+        starting_concentration=starting_concentration.digest(),
+        lit_removals=[r.digest() for r in lit_removals],
+        n_runs=n_runs,
+        rmv_factor_resolution=rmv_factor_resolution,
+        seed=[seed.entropy, list(seed.spawn_key), seed.pool_size],
+        adaptive_grid=dtc.asdict(adaptive_grid) if adaptive_grid is not None else None,
+        compact=compact,
+    ), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(content.encode(), digest_size=20).hexdigest()
+
+
+def _freeze(value: np.ndarray | ProcessResult):
+    for arr in [value] if isinstance(value, np.ndarray) else [value.output_concentration, value.rmv_factors]:
+        arr.setflags(write=False)
 
 
 def simulate_removal(
         scenario: Scenario,
         n_runs: int = 10000,
         rmv_factor_resolution: int = 1000,
+        seed: SeedLike = None,
+        compact: bool = False,
+        adaptive_grid: AdaptiveGrid | None = None,
+        cache_prefixes: bool = False,
+        cache: "ResultCache | None" = None,
 ) -> SimulationResult:
-    input_matrix, substance, treatment_train, starting_concentration, reference = \
+    """
+    the starting concentration and every treatment draw from their own stream derived from `seed`,
+    see `promisces.rng.simulation_rngs`. the same seed always gives the same result.
+    `compact` returns `SimulationResult.compact()`.
+    `adaptive_grid` draws the removal factors of generic processes from a non-uniform grid instead of the
+    uniform grid of `rmv_factor_resolution` points, see `promisces.removal_processes.adaptive_posterior`.
+    `cache_prefixes` reuses the stages of the longest prefix of the treatment train simulated before with the
+    same inputs and seed (see `prefix_cache`), so that only the changed end of a train runs again.
+    it needs a `seed`, the arrays of cached stages are shared between results and read-only.
+    `cache` returns the result stored under `result_key` if there is one and stores the new result otherwise.
+    results without a `seed` are never cached, a failed write only warns.
+    """
+    input_matrix, substance, treatment_train = \
         scenario.input_matrix, \
         scenario.substance, \
-        scenario.treatment_train, \
-        scenario.starting_concentration, \
-        scenario.reference
+        scenario.treatment_train
 
     treatment_train.validate_matrices(input_matrix)
     treatment_train.validate_mixtures()
 
-    if starting_concentration is None:
-        starting_concentration = substance.starting_concentration
-    if starting_concentration is None:
-        starting_concentration = StartingConcentration.from_lit(substance, input_matrix)
-        if len(starting_concentration) == 0:
-            raise RuntimeError("No starting concentration found in the literature for"
-                               f" substance {substance.id} and input matrix {input_matrix.id}.\n"
-                               f"Please provide one or try an other substance/matrix pair.")
-    start_c = input_c = starting_concentration.n_uniform_samples(n_runs)
+    timer = StageTimer()
+    with timer.active():
+        with stage("literature") as timing:
+            starting_concentration = _resolve_starting_concentration(scenario)
+            lit_removals = [RemovalPercent.from_lit(treatment, substance) for treatment in treatment_train]
+            timing.n_samples = len(starting_concentration) + sum(len(r) for r in lit_removals)
+
+        cache_key = None
+        if cache is not None and seed is not None:
+            seed = as_seed_sequence(seed)
+            with stage("result_cache"):
+                cache_key = result_key(scenario, starting_concentration, lit_removals, n_runs,
+                                       rmv_factor_resolution, seed, adaptive_grid, compact)
+                cached = cache.get(cache_key)
+            if cached is not None:
+                return dtc.replace(cached, scenario=scenario, timings=timer.timings)
+
+        prefix, keys = None, []
+        if cache_prefixes and seed is not None:
+            seed = as_seed_sequence(seed)
+            keys = _prefix_keys(scenario, starting_concentration, lit_removals, n_runs, rmv_factor_resolution, seed,
+                                adaptive_grid)
+            cached_start_c = prefix_cache.get(keys[0])
+            if cached_start_c is not None:
+                cached_stages = []
+                for key in keys[1:]:
+                    cached_stage = prefix_cache.get(key)
+                    if cached_stage is None:
+                        break
+                    cached_stages += [cached_stage]
+                prefix = cached_start_c, cached_stages
+
+        start_c, results = _run_treatment_train(
+            treatment_train,
+            starting_concentration,
+            lit_removals,
+            n_runs,
+            rmv_factor_resolution,
+            seed,
+            adaptive_grid=adaptive_grid,
+            prefix=prefix
+        )
+    for key, value in zip(keys, [start_c, *results]):
+        if key not in prefix_cache:
+            _freeze(value)
+            prefix_cache.put(key, value)
+    result = SimulationResult(
+        scenario,
+        n_runs,
+        rmv_factor_resolution,
+        start_c,
+        results,
+        timings=timer.timings,
+    )
+    result = result.compact() if compact else result
+    if cache_key is not None:
+        try:
+            cache.put(cache_key, result)
+        except (OSError, TypeError, ValueError) as e:
+            # the result is still valid, it is only not stored
+            warnings.warn(f"result of '{scenario.name}' not cached: {type(e).__name__}: {e}")
+    return result
+
 
+def _run_treatment_train(
+        treatment_train: TreatmentTrain,
+        starting_concentration: StartingConcentration,
+        lit_removals: list[RemovalPercent],
+        n_runs: int,
+        rmv_factor_resolution: int,
+        seed: SeedLike,
+        stratified: bool = False,
+        adaptive_grid: AdaptiveGrid | None = None,
+        prefix: tuple[np.ndarray, list[ProcessResult]] | None = None,
+) -> tuple[np.ndarray, list[ProcessResult]]:
+    """
+    `prefix` holds the starting concentration and the results of the first treatments of a run with the same seed,
+    only the treatments after them are simulated.
+    """
+    start_rng, treatment_rngs = simulation_rngs(seed, len(treatment_train))
+    if prefix is None:
+        with stage("input") as timing:
+            start_c = input_c = starting_concentration.n_uniform_samples(n_runs, start_rng, stratified)
+            timing.nbytes, timing.n_samples = start_c.nbytes, start_c.size
+        results = []
+    else:
+        start_c, results = prefix[0], list(prefix[1])
+        input_c = np.sort(results[-1].output_concentration) if results else start_c
+
+    for i, (treatment, lit_rmv, rng) in islice(enumerate(
+            zip(treatment_train, lit_removals, treatment_rngs)
+    ), len(results), None):
+        with stage(treatment.id) as timing:
+            # fix input_c based on treatment id
+            if treatment.id != "wwsl":
+                # TODO: CHECK SORTING
+                input_c = np.flip(input_c)
+            # dispatch to removal functions:
+            if treatment.id.startswith("dil"):
+                result = apply_mixture_process(input_c, **treatment.mixture.asdict(), rng=rng)
+            elif treatment.id == "sepev":
+                result = apply_separation_process(input_c, **treatment.mixture.asdict(), rng=rng)
+            elif treatment.id == "wwsl":
+                result = apply_separation_sludge_process(
+                    input_c,
+                    lit_rmv,
+                    treatment.removal,
+                    rmv_factor_resolution,
+                    rng=rng,
+                    stratified=stratified,
+                    adaptive_grid=adaptive_grid
+                )
+            else:
+                result = apply_generic_process(
+                    input_c,
+                    lit_rmv,
+                    treatment.removal,
+                    rmv_factor_resolution,
+                    n_runs=n_runs,
+                    rng=rng,
+                    stratified=stratified,
+                    adaptive_grid=adaptive_grid
+                )
+
+            results += [result]
+            # TODO: CHECK SORTING
+            input_c = np.sort(result.output_concentration)
+            timing.nbytes, timing.n_samples = result.nbytes, result.output_concentration.size
+    return start_c, results
+
+
+def _final_precision(
+        final_c: np.ndarray,
+        percentiles: tuple[float, ...],
+        reference: float | None,
+        confidence: float,
+) -> tuple[list[float], list[float], float | None, float | None]:
+    """percentile values with their relative precision and exceedance probability with its absolute precision"""
+    x = np.sort(final_c)
+    n = len(x)
+    z = ndtri(0.5 + confidence / 2)
+    values, precisions = [], []
+    for p in percentiles:
+        # distribution-free interval of the p quantile between two order statistics
+        half = z * np.sqrt(n * p * (1 - p))
+        lo, hi = int(np.clip(np.floor(n * p - half), 0, n - 1)), int(np.clip(np.ceil(n * p + half), 0, n - 1))
+        value = np.quantile(x, p)
+        values += [float(value)]
+        if value != 0:
+            precisions += [float((x[hi] - x[lo]) / 2 / abs(value))]
+        else:
+            precisions += [0.0 if x[hi] == x[lo] else np.inf]
+    if reference is None:
+        return values, precisions, None, None
+    exceedance = float((x > reference).mean())
+    # Agresti-Coull interval, not degenerate for an exceedance of 0 or 1
+    n_adjusted = n + z ** 2
+    p_adjusted = (exceedance * n + z ** 2 / 2) / n_adjusted
+    return values, precisions, exceedance, float(z * np.sqrt(p_adjusted * (1 - p_adjusted) / n_adjusted))
+
+
+def simulate_removal_adaptive(
+        scenario: Scenario,
+        percentiles: tuple[float, ...] = (0.95, 0.99),
+        rel_tol: float = 0.01,
+        exceedance_tol: float = 0.005,
+        confidence: float = 0.95,
+        initial_runs: int = 1000,
+        max_runs: int = 1_000_000,
+        rmv_factor_resolution: int = 1000,
+        seed: SeedLike = None,
+) -> SimulationResult:
+    """
+    simulates batches of runs, doubling the number of runs every time, until the `percentiles` of the final
+    concentration are known within `rel_tol` (relative) and the exceedance probability of the reference value
+    within `exceedance_tol` (absolute), both at the `confidence` level, or until `max_runs` runs.
+    batch k is seeded with `child_seed(seed, k)`. every batch is rank-coupled like a run of `simulate_removal`,
+    the stages of the batches are merged and sorted again.
+    the number of runs and the precision reached are recorded in `SimulationResult.convergence`.
+    """
+    treatment_train = scenario.treatment_train
+    treatment_train.validate_matrices(scenario.input_matrix)
+    treatment_train.validate_mixtures()
+    starting_concentration = _resolve_starting_concentration(scenario)
+    lit_removals = [RemovalPercent.from_lit(t, scenario.substance) for t in treatment_train]
+    reference = scenario.reference.ref_value_ng_l if scenario.reference is not None else None
+
+    seed = as_seed_sequence(seed)
+    batches: list[tuple[np.ndarray, list[ProcessResult]]] = []
+    history = []
+    n_runs, batch_runs = 0, min(initial_runs, max_runs)
+    while True:
+        batches += [_run_treatment_train(
+            treatment_train,
+            starting_concentration,
+            lit_removals,
+            batch_runs,
+            rmv_factor_resolution,
+            child_seed(seed, len(batches))
+        )]
+        n_runs += batch_runs
+        final_c = np.concatenate([results[-1].output_concentration if results else start_c
+                                  for start_c, results in batches])
+        values, precisions, exceedance, exceedance_precision = _final_precision(
+            final_c, percentiles, reference, confidence
+        )
+        history += [(n_runs, max(precisions, default=0.), exceedance_precision)]
+        converged = all(p <= rel_tol for p in precisions) and \
+            (exceedance_precision is None or exceedance_precision <= exceedance_tol)
+        if converged or n_runs >= max_runs:
+            break
+        batch_runs = min(n_runs, max_runs - n_runs)
+
+    stages = []
+    for j in range(len(treatment_train)):
+        first = batches[0][1][j]
+        stages += [ProcessResult(
+            first.process_type,
+            np.sort(np.concatenate([results[j].output_concentration for _, results in batches]))[::-1],
+            np.concatenate([results[j].rmv_factors for _, results in batches]),
+            first.dominant_distribution,
+            first.average_out
+        )]
+    return SimulationResult(
+        scenario,
+        n_runs,
+        rmv_factor_resolution,
+        np.sort(np.concatenate([start_c for start_c, _ in batches]))[::-1],
+        stages,
+        Convergence(
+            n_runs,
+            converged,
+            confidence,
+            tuple(percentiles),
+            tuple(values),
+            tuple(precisions),
+            exceedance,
+            exceedance_precision,
+            tuple(history),
+        )
+    )
+
+
+def simulate_removal_ranked(
+        scenario: Scenario,
+        n_runs: int = 10000,
+        rmv_factor_resolution: int = 1000,
+        seed: SeedLike = None,
+) -> SimulationResult:
+    """
+    engine with the comonotonic semantics of `simulate_removal` that keeps every stage as an array in
+    descending order instead of sorting it again at each step.
+    sorted samples are generated directly (order statistics of uniforms), so generic stages cost O(n_runs).
+    mixture, separation and case study dominated stages still sort their random output once.
+    """
+    input_matrix, substance, treatment_train = \
+        scenario.input_matrix, \
+        scenario.substance, \
+        scenario.treatment_train
+
+    treatment_train.validate_matrices(input_matrix)
+    treatment_train.validate_mixtures()
+
+    starting_concentration = _resolve_starting_concentration(scenario)
     lit_removals = [RemovalPercent.from_lit(treatment, substance) for treatment in treatment_train]
+    start_rng, treatment_rngs = simulation_rngs(seed, len(treatment_train))
+    low, high = starting_concentration.arr.min(), starting_concentration.arr.max()
+    start_c = input_c = low + sorted_uniforms(n_runs, start_rng)[::-1] * (high - low)
 
     results = []
-    for i, (treatment, lit_rmv) in enumerate(
-            zip(treatment_train, lit_removals)
-    ):
-        # fix input_c based on treatment id
-        if treatment.id != "wwsl":
-            # TODO: CHECK SORTING
-            input_c = np.flip(input_c)
-        # dispatch to removal functions:
-        if treatment.id.startswith("dil"):
-            result = apply_mixture_process(input_c, **treatment.mixture.asdict())
-        elif treatment.id == "sepev":
-            result = apply_separation_process(input_c, **treatment.mixture.asdict())
-        elif treatment.id == "wwsl":
+    for i, (treatment, lit_rmv, rng) in enumerate(zip(treatment_train, lit_removals, treatment_rngs)):
+        process_type = _process_type(treatment)
+        if process_type == ProcessType.mixture:
+            result = apply_mixture_process(input_c, **treatment.mixture.asdict(), rng=rng)
+        elif process_type == ProcessType.separation:
+            result = apply_separation_process(input_c, **treatment.mixture.asdict(), rng=rng)
+        elif process_type == ProcessType.separation_sludge:
+            # the sludge process gets the ascending concentrations of the previous stage in simulate_removal
             result = apply_separation_sludge_process(
-                input_c,
+                input_c if i == 0 else input_c[::-1],
                 lit_rmv,
                 treatment.removal,
                 rmv_factor_resolution,
+                rng=rng
             )
         else:
-            result = apply_generic_process(
+            result = apply_generic_process_ranked(
                 input_c,
                 lit_rmv,
                 treatment.removal,
                 rmv_factor_resolution,
-                n_runs=n_runs
+                rng=rng
             )
-
         results += [result]
-        # TODO: CHECK SORTING
-        input_c = np.sort(result.output_concentration)
+        input_c = result.output_concentration
 
     return SimulationResult(
         scenario,
@@ -137,3 +654,183 @@ def simulate_removal(
         start_c,
         results,
     )
+
+
+def _run_stages_batch(
+        input_c: np.ndarray,
+        trains: list[Sequence[Treatment]],
+        substances: list[Substance],
+        rngs: list[list[np.random.Generator]],
+        rmv_factor_resolution: int,
+) -> list[list[ProcessResult]]:
+    """
+    runs the treatments `trains[i]` on the row i of the (n_rows x n_runs) array `input_c` with the generators `rngs[i]`,
+    like `_run_treatment_train` does for a single row. all trains must have the same sequence of process types.
+    returns the results per stage, then per row.
+    the literature removals are looked up once per treatment and substance and shared by their rows.
+    """
+    lit_rmvs: dict[tuple[str, bool, str], RemovalPercent] = {}
+
+    def lit_rmv(treatment: Treatment, substance: Substance) -> RemovalPercent:
+        key = (treatment.id, treatment.with_lit_data, substance.id)
+        if key not in lit_rmvs:
+            lit_rmvs[key] = RemovalPercent.from_lit(treatment, substance)
+        return lit_rmvs[key]
+
+    stages: list[list[ProcessResult]] = []
+    for j, process_type in enumerate(_process_type(t) for t in trains[0]):
+        treatments = [train[j] for train in trains]
+        stage_rngs = [row_rngs[j] for row_rngs in rngs]
+        if process_type != ProcessType.separation_sludge:
+            input_c = input_c[:, ::-1]
+        if process_type == ProcessType.mixture:
+            stage_results = apply_mixture_process_batch(input_c, [t.mixture for t in treatments], stage_rngs)
+        elif process_type == ProcessType.separation:
+            stage_results = [
+                apply_separation_process(c, **t.mixture.asdict(), rng=rng)
+                for c, t, rng in zip(input_c, treatments, stage_rngs)
+            ]
+        elif process_type == ProcessType.separation_sludge:
+            stage_results = [
+                apply_separation_sludge_process(
+                    c,
+                    lit_rmv(t, substance),
+                    t.removal,
+                    rmv_factor_resolution,
+                    rng=rng
+                )
+                for c, t, substance, rng in zip(input_c, treatments, substances, stage_rngs)
+            ]
+        else:
+            stage_results = apply_generic_process_batch(
+                input_c,
+                [lit_rmv(t, substance) for t, substance in zip(treatments, substances)],
+                [t.removal for t in treatments],
+                rmv_factor_resolution,
+                stage_rngs,
+            )
+        stages += [stage_results]
+        # outputs are sorted in descending order, reversing them equals np.sort
+        input_c = np.stack([r.output_concentration for r in stage_results])[:, ::-1]
+    return stages
+
+
+def simulate_mixture_sweep(
+        scenario: Scenario,
+        mixtures: Sequence[Mixture],
+        treatment_index: int | None = None,
+        n_runs: int = 10000,
+        rmv_factor_resolution: int = 1000,
+        seed: SeedLike = None,
+) -> list[SimulationResult]:
+    """
+    simulates `scenario` once per mixture, with the mixture at `treatment_index` (default: the first dilution)
+    replaced by every element of `mixtures`.
+    the treatments before it run once and are shared by all results, the dilution is a single
+    (n_mixtures x n_runs) operation and the treatments after it run as a batch.
+    result i is the same as `simulate_removal` of the scenario with `mixtures[i]` and the same seed, so all results
+    share their random numbers and differ only by the effect of the mixture.
+    """
+    train = scenario.treatment_train
+    if treatment_index is None:
+        treatment_index = next((i for i, t in enumerate(train) if _process_type(t) == ProcessType.mixture), None)
+    if treatment_index is None or _process_type(train[treatment_index]) != ProcessType.mixture:
+        raise ValueError(f"expected a dilution treatment at index {treatment_index} of the treatment train of"
+                         f" scenario '{scenario.name}'")
+    train.validate_matrices(scenario.input_matrix)
+    if len(mixtures) == 0:
+        return []
+
+    seed = as_seed_sequence(seed)
+    start_c, upstream = _run_treatment_train(
+        TreatmentTrain(train[:treatment_index]),
+        _resolve_starting_concentration(scenario),
+        [RemovalPercent.from_lit(t, scenario.substance) for t in train[:treatment_index]],
+        n_runs,
+        rmv_factor_resolution,
+        seed
+    )
+    input_c = np.sort(upstream[-1].output_concentration) if upstream else start_c
+    trains = [
+        [*train[:treatment_index], train[treatment_index].clone(mixture=mixture), *train[treatment_index + 1:]]
+        for mixture in mixtures
+    ]
+    for t in trains:
+        TreatmentTrain(t).validate_mixtures()
+    # every row draws from the streams of a single run of its train
+    rngs = [simulation_rngs(seed, len(train))[1][treatment_index:] for _ in mixtures]
+    downstream = _run_stages_batch(
+        np.broadcast_to(input_c, (len(mixtures), n_runs)),
+        [t[treatment_index:] for t in trains],
+        [scenario.substance] * len(mixtures),
+        rngs,
+        rmv_factor_resolution
+    )
+    return [
+        SimulationResult(
+            dtc.replace(scenario, name=f"{scenario.name} [mixture {i}]", treatment_train=TreatmentTrain(t)),
+            n_runs,
+            rmv_factor_resolution,
+            start_c,
+            upstream + [stage[i] for stage in downstream],
+        )
+        for i, t in enumerate(trains)
+    ]
+
+
+def simulate_removal_batch(
+        scenarios: Iterable[Scenario],
+        n_runs: int = 10000,
+        rmv_factor_resolution: int = 1000,
+        max_batch_size: int = 256,
+        seed: SeedLike | Sequence[np.random.SeedSequence] = None,
+        compact: bool = False,
+) -> list[SimulationResult]:
+    """
+    simulates many scenarios at once.
+    scenarios whose treatment trains have the same sequence of process types are grouped and every stage
+    of the group is computed on a single (n_scenarios x n_runs) array.
+    at most `max_batch_size` scenarios are held in memory together.
+    scenario i is seeded with `scenario_seeds(seed, len(scenarios))[i]` and gives the same result as
+    `simulate_removal` with that seed.
+    `compact` stores every result with `SimulationResult.compact()` as soon as its batch is done.
+    returns the results in the order of `scenarios`.
+    """
+    scenarios = list(scenarios)
+    seeds = scenario_seeds(seed, len(scenarios))
+    groups: dict[tuple[ProcessType, ...], list[int]] = {}
+    for i, scenario in enumerate(scenarios):
+        scenario.treatment_train.validate_matrices(scenario.input_matrix)
+        scenario.treatment_train.validate_mixtures()
+        groups.setdefault(tuple(_process_type(t) for t in scenario.treatment_train), []).append(i)
+
+    results: list[SimulationResult | None] = [None] * len(scenarios)
+    for process_types, indices in groups.items():
+        for start in range(0, len(indices), max_batch_size):
+            batch = [scenarios[i] for i in indices[start:start + max_batch_size]]
+            start_rngs, treatment_rngs = zip(*(
+                simulation_rngs(seeds[i], len(process_types)) for i in indices[start:start + max_batch_size]
+            ))
+            start_c = np.stack([
+                _resolve_starting_concentration(s).n_uniform_samples(n_runs, rng)
+                for s, rng in zip(batch, start_rngs)
+            ])
+            stages = _run_stages_batch(
+                start_c,
+                [s.treatment_train for s in batch],
+                [s.substance for s in batch],
+                list(treatment_rngs),
+                rmv_factor_resolution
+            )
+
+            for k, i in enumerate(indices[start:start + max_batch_size]):
+                results[i] = SimulationResult(
+                    scenarios[i],
+                    n_runs,
+                    rmv_factor_resolution,
+                    start_c[k],
+                    [stage[k] for stage in stages],
+                )
+                if compact:
+                    results[i] = results[i].compact()
+    return results
@@ -0,0 +1,340 @@
+import dataclasses as dtc
+import json
+import os
+import shutil
+import tempfile
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from promisces.models.matrix import Matrix
+from promisces.models.mixture import Mixture
+from promisces.models.reference import Reference
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substance, SubstanceGroup
+from promisces.models.treatment import Treatment, TreatmentGroup, TreatmentTrain
+from promisces.removal_processes import CompactProcessResult, DominantDistribution, ProcessResult, ProcessType
+from promisces.simulate_removal import Convergence, SimulationResult
+from promisces.timing import StageTiming
+
+FORMAT = "promisces-result"
+VERSION = 1
+METADATA_FILE = "result.json"
+INDEX_FILE = "results.json"
+
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _reference_to_dict(reference: Reference) -> dict:
+    """missing values of the literature tables (pd.NA, NaN) are written as null"""
+    import pandas as pd
+    return {key: None if pd.api.types.is_scalar(value) and pd.isna(value) else value
+            for key, value in dtc.asdict(reference).items()}
+
+
+def _reference_from_dict(data: dict) -> Reference:
+    import pandas as pd
+    return Reference(**{key: pd.NA if value is None else value for key, value in data.items()})
+
+
+def _matrix_to_dict(matrix: Matrix) -> dict:
+    return dtc.asdict(matrix)
+
+
+def _treatment_to_dict(treatment: Treatment) -> dict:
+    return dict(
+        id=treatment.id,
+        group=treatment.group.value,
+        name=treatment.name,
+        input_matrix=[_matrix_to_dict(m) for m in treatment.input_matrix],
+        output_matrix=_matrix_to_dict(treatment.output_matrix),
+        with_lit_data=treatment.with_lit_data,
+        removal=np.asarray(treatment.removal.arr, dtype=float),
+        mixture=dtc.asdict(treatment.mixture) if treatment.mixture is not None else None,
+    )
+
+
+def _treatment_from_dict(data: dict) -> Treatment:
+    return Treatment(
+        data["id"],
+        TreatmentGroup(data["group"]),
+        data["name"],
+        [Matrix(**m) for m in data["input_matrix"]],
+        Matrix(**data["output_matrix"]),
+        data["with_lit_data"],
+        RemovalPercent(np.array(data["removal"], dtype=float)),
+        Mixture(**data["mixture"]) if data["mixture"] is not None else None,
+    )
+
+
+def _scenario_to_dict(scenario: Scenario) -> dict:
+    substance = scenario.substance
+    return dict(
+        name=scenario.name,
+        input_matrix=_matrix_to_dict(scenario.input_matrix),
+        substance=dict(id=substance.id, group=substance.group.value, name=substance.name, CAS=substance.CAS),
+        treatment_train=[_treatment_to_dict(t) for t in scenario.treatment_train],
+        starting_concentration=np.asarray(scenario.starting_concentration.arr, dtype=float)
+        if scenario.starting_concentration is not None else None,
+        reference=_reference_to_dict(scenario.reference) if scenario.reference is not None else None,
+    )
+
+
+def _scenario_from_dict(data: dict) -> Scenario:
+    """rebuilds the scenario by value, without looking up the literature or the predefined models"""
+    substance = data["substance"]
+    # `Scenario.__post_init__` is skipped, it would fill missing values from the literature
+    scenario = object.__new__(Scenario)
+    scenario.__dict__.update(
+        name=data["name"],
+        input_matrix=Matrix(**data["input_matrix"]),
+        substance=Substance(substance["id"], SubstanceGroup(substance["group"]), substance["name"], substance["CAS"]),
+        treatment_train=TreatmentTrain([_treatment_from_dict(t) for t in data["treatment_train"]]),
+        starting_concentration=StartingConcentration(np.array(data["starting_concentration"], dtype=float))
+        if data["starting_concentration"] is not None else None,
+        reference=_reference_from_dict(data["reference"]) if data["reference"] is not None else None,
+    )
+    return scenario
+
+
+def _convergence_from_dict(data: dict | None) -> Convergence | None:
+    if data is None:
+        return None
+    return Convergence(**{
+        key: tuple(tuple(v) if isinstance(v, list) else v for v in value) if isinstance(value, list) else value
+        for key, value in data.items()
+    })
+
+
+def _stage_files(j: int) -> tuple[str, str]:
+    return f"stage_{j:03d}.output_concentration.npy", f"stage_{j:03d}.rmv_factors.npy"
+
+
+def save_result(result: SimulationResult, path: str):
+    """
+    writes `result` into the directory `path`: one .npy file per array and the metadata, including the stage
+    timings, in `result.json`. compact results keep their float32/uint16 arrays.
+    """
+    os.makedirs(path, exist_ok=True)
+    stages = []
+    for j, stage in enumerate(result.intermediate_results):
+        c_file, rmv_file = _stage_files(j)
+        if isinstance(stage, CompactProcessResult):
+            output_c, rmv_factors = stage.stored_output_concentration, stage.stored_rmv_factors
+        else:
+            output_c, rmv_factors = stage.output_concentration, stage.rmv_factors
+        np.save(os.path.join(path, c_file), output_c)
+        np.save(os.path.join(path, rmv_file), rmv_factors)
+        stages += [dict(
+            process_type=stage.process_type.name,
+            dominant_distribution=stage.dominant_distribution.name,
+            average_out=stage.average_out,
+            compact=isinstance(stage, CompactProcessResult),
+            output_concentration=c_file,
+            rmv_factors=rmv_file,
+        )]
+    np.save(os.path.join(path, "starting_concentration.npy"), result.starting_concentration)
+    with open(os.path.join(path, METADATA_FILE), "w") as f:
+        json.dump(dict(
+            format=FORMAT,
+            version=VERSION,
+            n_runs=result.n_runs,
+            rmv_factor_resolution=result.rmv_factor_resolution,
+            scenario=_scenario_to_dict(result.scenario),
+            stages=stages,
+            convergence=dtc.asdict(result.convergence) if result.convergence is not None else None,
+            timings=[dtc.asdict(t) for t in result.timings],
+        ), f, default=_to_json, indent=1)
+
+
+def load_result(path: str, mmap: bool = True) -> SimulationResult:
+    """
+    reads a result written by `save_result`.
+    with `mmap`, the arrays are read-only memory maps: opening is instant and only the pages that are used are read.
+    """
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    if metadata.get("format") != FORMAT or metadata.get("version", VERSION + 1) > VERSION:
+        raise ValueError(f"'{path}' is not a promisces result of version {VERSION} or lower")
+
+    def array(file: str) -> np.ndarray:
+        return np.load(os.path.join(path, file), mmap_mode="r" if mmap else None)
+
+    stages = []
+    for stage in metadata["stages"]:
+        process_type = ProcessType[stage["process_type"]]
+        dominant_distribution = DominantDistribution[stage["dominant_distribution"]]
+        if stage["compact"]:
+            stages += [CompactProcessResult(
+                process_type,
+                array(stage["output_concentration"]),
+                array(stage["rmv_factors"]),
+                metadata["rmv_factor_resolution"],
+                dominant_distribution,
+                stage["average_out"],
+            )]
+        else:
+            stages += [ProcessResult(
+                process_type,
+                array(stage["output_concentration"]),
+                array(stage["rmv_factors"]),
+                dominant_distribution,
+                stage["average_out"],
+            )]
+    return SimulationResult(
+        _scenario_from_dict(metadata["scenario"]),
+        metadata["n_runs"],
+        metadata["rmv_factor_resolution"],
+        array("starting_concentration.npy"),
+        stages,
+        _convergence_from_dict(metadata.get("convergence")),
+        [StageTiming(**t) for t in metadata.get("timings", [])],
+    )
+
+
+class ResultDirectory(Sequence[SimulationResult]):
+    """
+    results written by `save_results`, loaded on first access of every single result.
+    `names` are the scenario names, read from the index without opening any result.
+    """
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        self.mmap = mmap
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.names: list[str] = [entry["name"] for entry in index["results"]]
+        self._dirs: list[str] = [entry["path"] for entry in index["results"]]
+        self._loaded: dict[int, SimulationResult] = {}
+
+    def __len__(self) -> int:
+        return len(self._dirs)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        item = range(len(self))[item]
+        if item not in self._loaded:
+            self._loaded[item] = load_result(os.path.join(self.path, self._dirs[item]), self.mmap)
+        return self._loaded[item]
+
+    def __iter__(self) -> Iterator[SimulationResult]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+def save_results(results: Sequence[SimulationResult], path: str):
+    """writes every result with `save_result` into a subdirectory of `path`, plus an index of the results"""
+    os.makedirs(path, exist_ok=True)
+    for i, result in enumerate(results):
+        save_result(result, os.path.join(path, _result_dir(i)))
+    _save_index(path, [result.scenario.name for result in results])
+
+
+def _result_dir(index: int) -> str:
+    return f"{index:06d}"
+
+
+def _save_index(path: str, names: Sequence[str]):
+    """index of the results `names[i]` written to the subdirectories `_result_dir(i)` of `path`"""
+    entries = [dict(name=name, path=_result_dir(i)) for i, name in enumerate(names)]
+    with open(os.path.join(path, INDEX_FILE), "w") as f:
+        json.dump(dict(format=FORMAT, version=VERSION, results=entries), f, indent=1)
+
+
+def load_results(path: str, mmap: bool = True) -> ResultDirectory:
+    return ResultDirectory(path, mmap)
+
+
+class ResultCache:
+    """
+    content-addressed directory of results written with `save_result`, one subdirectory per key
+    (see `promisces.simulate_removal.result_key`). after every `put` the least recently used entries are removed
+    until the directory holds at most `max_bytes`.
+    several processes may share the directory: entries are written to a temporary directory and renamed.
+    the keys don't cover the code, clear the cache after an update that changes the simulation.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 2 ** 30, mmap: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+        os.makedirs(path, exist_ok=True)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def get(self, key: str) -> SimulationResult | None:
+        path = self._entry(key)
+        try:
+            result = load_result(path, self.mmap)
+            # the modification time orders the entries for the eviction
+            os.utime(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        except (KeyError, ValueError, OSError):
+            # a truncated or foreign entry (e.g. of another format version) is a miss, the next put replaces it
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        return result
+
+    def put(self, key: str, result: SimulationResult):
+        if os.path.isdir(self._entry(key)):
+            return
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.path)
+        try:
+            save_result(result, tmp)
+        except BaseException:
+            # `entries` skips the temporary directories, nothing else would remove it
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        try:
+            os.rename(tmp, self._entry(key))
+        except OSError:
+            # written by another process in the meantime
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def entries(self) -> list[tuple[str, float, int]]:
+        """(key, last use, bytes) of every entry, least recently used first"""
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                files = list(os.scandir(entry.path))
+                entries += [(entry.name, entry.stat().st_mtime, sum(f.stat().st_size for f in files))]
+            except FileNotFoundError:
+                continue
+        return sorted(entries, key=lambda e: e[1])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(nbytes for _, _, nbytes in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(nbytes for _, _, nbytes in entries)
+        for key, _, nbytes in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= nbytes
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isdir(self._entry(key))
+
+    def __len__(self) -> int:
+        return len(self.entries())
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import dataclasses as dtc
+
+import numpy as np
+import pandas as pd
+
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.removal_processes import DominantDistribution
+from promisces.rng import SeedLike, as_seed_sequence, child_seed
+from promisces.simulate_removal import _resolve_starting_concentration, _run_treatment_train
+
+
+class _BucketStore:
+    """dense counts of consecutive integer bucket keys, starting at `offset`"""
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, keys: np.ndarray, counts: np.ndarray | None = None):
+        if len(keys) == 0:
+            return
+        lo, hi = int(keys.min()), int(keys.max())
+        self._extend(lo, hi)
+        self.counts += np.bincount(keys - self.offset, weights=counts, minlength=len(self.counts)).astype(np.int64)
+
+    def merge(self, other: _BucketStore):
+        if len(other.counts) == 0:
+            return
+        self._extend(other.offset, other.offset + len(other.counts) - 1)
+        start = other.offset - self.offset
+        self.counts[start:start + len(other.counts)] += other.counts
+
+    def _extend(self, lo: int, hi: int):
+        if len(self.counts) == 0:
+            self.offset, self.counts = lo, np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+        new_lo, new_hi = min(lo, self.offset), max(hi, self.offset + len(self.counts) - 1)
+        if (new_lo, new_hi) != (self.offset, self.offset + len(self.counts) - 1):
+            counts = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+            counts[self.offset - new_lo:self.offset - new_lo + len(self.counts)] = self.counts
+            self.offset, self.counts = new_lo, counts
+
+
+class QuantileSketch:
+    """
+    mergeable histogram with logarithmic buckets (after DDSketch, Masson et al. 2019).
+    its quantiles are within `relative_accuracy` of the exact sample quantiles, whatever the number of values,
+    and its memory only grows with the log of the range of the values.
+    mean and standard deviation are exact. non-finite values are counted in `n_nonfinite` and otherwise ignored.
+    """
+
+    def __init__(self, relative_accuracy: float = 1e-3):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self._positive = _BucketStore()
+        self._negative = _BucketStore()
+        self.zero_count = 0
+        self.count = 0
+        self.n_nonfinite = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.mean = 0.
+        self._m2 = 0.
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        finite = np.isfinite(values)
+        self.n_nonfinite += int((~finite).sum())
+        values = values[finite]
+        if len(values) == 0:
+            return
+        self._positive.add(self._keys(values[values > 0]))
+        self._negative.add(self._keys(-values[values < 0]))
+        self.zero_count += int((values == 0).sum())
+        self.min, self.max = min(self.min, values.min()), max(self.max, values.max())
+        self._merge_moments(len(values), values.mean(), ((values - values.mean()) ** 2).sum())
+
+    def merge(self, other: QuantileSketch):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("can only merge sketches with the same relative accuracy")
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        self.n_nonfinite += other.n_nonfinite
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        if other.count:
+            self._merge_moments(other.count, other.mean, other._m2)
+
+    def quantile(self, q: float | np.ndarray) -> float | np.ndarray:
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        neg_keys = self._negative.offset + np.arange(len(self._negative.counts))
+        pos_keys = self._positive.offset + np.arange(len(self._positive.counts))
+        values = np.r_[-self._value(neg_keys)[::-1], 0., self._value(pos_keys)]
+        counts = np.r_[self._negative.counts[::-1], self.zero_count, self._positive.counts]
+        rank = np.asarray(q) * (self.count - 1)
+        out = values[np.searchsorted(np.cumsum(counts), rank, side="right")]
+        out = np.clip(out, self.min, self.max)
+        return out if np.ndim(q) else float(out)
+
+    @property
+    def std(self) -> float:
+        return np.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def _keys(self, values: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+
+    def _value(self, keys: np.ndarray) -> np.ndarray:
+        return 2 * self.gamma ** keys / (self.gamma + 1)
+
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        # parallel variance algorithm (Chan et al.)
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+
+@dtc.dataclass
+class StageStatistics:
+    name: str
+    concentration: QuantileSketch
+    rmv_factors: QuantileSketch | None
+    # number of runs above each threshold of `StreamingResult.thresholds`
+    exceedances: np.ndarray
+    dominant_distribution: DominantDistribution | None = None
+
+    def merge(self, other: StageStatistics):
+        self.concentration.merge(other.concentration)
+        if self.rmv_factors is not None:
+            self.rmv_factors.merge(other.rmv_factors)
+        self.exceedances += other.exceedances
+
+
+@dtc.dataclass
+class StreamingResult:
+    scenario: Scenario
+    n_runs: int
+    chunk_size: int
+    rmv_factor_resolution: int
+    thresholds: np.ndarray
+    # starting concentration first, then one entry per treatment
+    stages: list[StageStatistics]
+
+    @property
+    def final(self) -> StageStatistics:
+        return self.stages[-1]
+
+    def percentiles(self, percentiles=(0.5, 0.75, 0.9, 0.95, 0.975, 0.99)) -> pd.DataFrame:
+        return pd.DataFrame(
+            [
+                [s.concentration.count, s.concentration.mean, s.concentration.std, s.concentration.min,
+                 *s.concentration.quantile(np.array(percentiles)), s.concentration.max]
+                for s in self.stages
+            ],
+            index=[s.name for s in self.stages],
+            columns=["count", "mean", "std", "min", *[f"{p * 100:g}%" for p in percentiles], "max"]
+        )
+
+    def exceedance_probability(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [s.exceedances / self.n_runs for s in self.stages],
+            index=[s.name for s in self.stages],
+            columns=self.thresholds
+        )
+
+    def merge(self, other: StreamingResult) -> StreamingResult:
+        """adds the runs of `other`, a result of the same scenario and thresholds (e.g. from another worker)"""
+        if not np.array_equal(self.thresholds, other.thresholds) or len(self.stages) != len(other.stages):
+            raise ValueError("can only merge results with the same treatment train and thresholds")
+        for stage, other_stage in zip(self.stages, other.stages):
+            stage.merge(other_stage)
+        self.n_runs += other.n_runs
+        return self
+
+
+def simulate_removal_streaming(
+        scenario: Scenario,
+        n_runs: int,
+        rmv_factor_resolution: int = 1000,
+        chunk_size: int = 1_000_000,
+        seed: SeedLike = None,
+        thresholds: list[float] | None = None,
+        relative_accuracy: float = 1e-3,
+) -> StreamingResult:
+    """
+    Monte Carlo simulation of `n_runs` runs in chunks of at most `chunk_size` runs, with memory independent of n_runs.
+    only per-stage sketches and exceedance counts of `thresholds` (default: the reference value) are kept.
+
+    every chunk draws stratified samples (one per equal-probability stratum), so each chunk spans the whole
+    quantile range and the rank coupling of `simulate_removal` (highest concentrations with lowest removals)
+    holds across chunks as it would in a single run.
+    chunk k is seeded with `child_seed(seed, k)`.
+    """
+    scenario.treatment_train.validate_matrices(scenario.input_matrix)
+    scenario.treatment_train.validate_mixtures()
+    if thresholds is None:
+        thresholds = [scenario.reference.ref_value_ng_l] if scenario.reference is not None else []
+    thresholds = np.asarray(thresholds, dtype=float)
+
+    starting_concentration = _resolve_starting_concentration(scenario)
+    lit_removals = [RemovalPercent.from_lit(t, scenario.substance) for t in scenario.treatment_train]
+
+    def new_stage(name: str, with_rmv_factors: bool = True) -> StageStatistics:
+        return StageStatistics(
+            name,
+            QuantileSketch(relative_accuracy),
+            QuantileSketch(relative_accuracy) if with_rmv_factors else None,
+            np.zeros(len(thresholds), dtype=np.int64)
+        )
+
+    stages = [new_stage("input", with_rmv_factors=False)] + [new_stage(t.id) for t in scenario.treatment_train]
+    seed = as_seed_sequence(seed)
+    for k, start in enumerate(range(0, n_runs, chunk_size)):
+        start_c, results = _run_treatment_train(
+            scenario.treatment_train,
+            starting_concentration,
+            lit_removals,
+            min(chunk_size, n_runs - start),
+            rmv_factor_resolution,
+            child_seed(seed, k),
+            stratified=True
+        )
+        for stage, c, result in zip(stages, [start_c] + [r.output_concentration for r in results], [None] + results):
+            stage.concentration.add(c)
+            stage.exceedances += (c[:, None] > thresholds).sum(axis=0)
+            if result is not None:
+                stage.rmv_factors.add(result.rmv_factors)
+                stage.dominant_distribution = result.dominant_distribution
+
+    return StreamingResult(scenario, n_runs, chunk_size, rmv_factor_resolution, thresholds, stages)
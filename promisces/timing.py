@@ -0,0 +1,95 @@
+import dataclasses as dtc
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@dtc.dataclass
+class StageTiming:
+    """
+    wall time of a stage of a simulation, with the bytes of the arrays it produced and the number of samples.
+    nested stages are named `parent/child`.
+    """
+    stage: str
+    seconds: float = 0.
+    nbytes: int = 0
+    n_samples: int = 0
+
+
+class StageHook:
+    """base class of hooks for external profilers, called around every timed stage"""
+
+    def start(self, stage: str):
+        pass
+
+    def end(self, timing: StageTiming):
+        pass
+
+
+_hooks: list[StageHook] = []
+
+
+def add_stage_hook(hook: StageHook):
+    _hooks.append(hook)
+
+
+def remove_stage_hook(hook: StageHook):
+    _hooks.remove(hook)
+
+
+class StageTimer:
+    """collects the timings of the stages run in `active()`"""
+
+    def __init__(self):
+        self.timings: list[StageTiming] = []
+
+    @contextmanager
+    def active(self) -> Iterator["StageTimer"]:
+        token = _current.set((self, ""))
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def to_frame(self) -> "pd.DataFrame":
+        return timings_frame(self.timings)
+
+
+# the timer of the running simulation and the name of the enclosing stage
+_current: ContextVar[tuple[StageTimer, str] | None] = ContextVar("promisces_stage_timer", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[StageTiming]:
+    """
+    times the enclosed code as a stage of the active `StageTimer`. the code may set `nbytes` and `n_samples`
+    on the yielded timing. without an active timer nothing is recorded, so kernels can always call it.
+    """
+    current = _current.get()
+    if current is None:
+        yield StageTiming(name)
+        return
+    timer, parent = current
+    timing = StageTiming(f"{parent}/{name}" if parent else name)
+    # stages are listed in the order they start, nested stages after their parent
+    timer.timings.append(timing)
+    for hook in _hooks:
+        hook.start(timing.stage)
+    token = _current.set((timer, timing.stage))
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.seconds = time.perf_counter() - start
+        _current.reset(token)
+        for hook in _hooks:
+            hook.end(timing)
+
+
+def timings_frame(timings: list[StageTiming]) -> "pd.DataFrame":
+    import pandas as pd
+    return pd.DataFrame([dtc.asdict(t) for t in timings], columns=[f.name for f in dtc.fields(StageTiming)])
@@ -0,0 +1,45 @@
+import dataclasses as dtc
+
+import numpy as np
+
+from promisces.models.matrix import Matrices
+from promisces.models.mixture import Mixture
+from promisces.models.reference import Reference
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substances
+from promisces.models.treatment import Treatments, TreatmentTrain
+
+STARTING_CONCENTRATION = (10., 100.)
+
+
+def make_train(removal=(50., 60.), mixture: Mixture = Mixture(0.5, 0.05, 1, 0.5)) -> TreatmentTrain:
+    """tertiary treatment with case study removals followed by a dilution by surface water, without literature data"""
+    return TreatmentTrain([
+        Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array(removal, dtype=float))),
+        Treatments.dilsw.clone(with_lit_data=False, mixture=mixture),
+    ])
+
+
+def make_scenario(
+        name: str = "test",
+        train: TreatmentTrain | None = None,
+        reference_value: float = 20.,
+        substance_start: bool = False,
+) -> Scenario:
+    """
+    pfoa in raw wastewater, starting between 10 and 100 ng/l, through `train` (default: `make_train()`).
+    with `substance_start`, the starting concentration is carried by a copy of the substance instead of the
+    scenario, like substances defined with their own data, which `Scenario.__post_init__` gives precedence.
+    """
+    start_c = StartingConcentration(np.array(STARTING_CONCENTRATION))
+    substance = dtc.replace(Substances.pfoa, starting_concentration=start_c) if substance_start else Substances.pfoa
+    return Scenario(
+        name,
+        Matrices.rww,
+        substance,
+        train if train is not None else make_train(),
+        None if substance_start else start_c,
+        Reference("test", reference_value, 2024, "")
+    )
@@ -0,0 +1,109 @@
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from assertpy import assert_that
+
+from promisces.cli import ProgressReporter, main
+from promisces.config import build_scenarios, load_config
+from promisces.storage import load_results
+
+CONFIG = dict(
+    name="nightly",
+    input_matrices=["rww"],
+    substances=["pfoa", "pfos"],
+    trains=[
+        [{"id": "wwtt", "with_lit_data": False, "removal": [40, 60]}],
+        [
+            {"id": "wwtt", "with_lit_data": False, "removal": [40, 60]},
+            {"id": "dilsw", "with_lit_data": False, "mixture": {"x2_min": 0.4, "x2_max": 0.6, "c2_min": 0,
+                                                                "c2_max": 2}},
+        ],
+    ],
+    starting_concentrations=[[10, 100]],
+    references=[{"id": "test", "ref_value_ng_l": 20, "year": 2024, "comments": ""}],
+    run=dict(n_runs=500, resolution=100, seed=3, workers=2, chunk_size=1),
+)
+
+TOML = """
+name = "nightly"
+input_matrices = ["rww"]
+substances = ["pfoa"]
+trains = [[{ id = "wwtt", with_lit_data = false, removal = [40, 60] }]]
+starting_concentrations = [[10, 100]]
+
+[run]
+n_runs = 500
+"""
+
+
+class TestCli(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_should_build_grid_of_scenarios(self):
+        scenarios = build_scenarios(CONFIG)
+
+        assert_that(scenarios).is_length(4)
+        assert_that([s.name for s in scenarios]).is_equal_to([f"nightly-{i}" for i in range(4)])
+        assert_that(scenarios[1].treatment_train[1].mixture.x2_mean).is_close_to(0.5, 1e-12)
+        assert_that(scenarios[0].treatment_train[0].removal.arr.tolist()).is_equal_to([40, 60])
+
+    def test_should_reject_unknown_ids(self):
+        config = dict(CONFIG, trains=[["nope"]])
+
+        assert_that(build_scenarios).raises(ValueError).when_called_with(config).contains("unknown treatment 'nope'")
+
+    def test_should_expand_substance_groups_and_validate_trains(self):
+        scenarios = build_scenarios(dict(CONFIG, substances=[{"group": "iPM(T)"}]))
+        invalid = dict(CONFIG, input_matrices=["drw"])
+
+        assert_that({s.substance.group.value for s in scenarios}).is_equal_to({"iPM(T)"})
+        assert_that(build_scenarios).raises(ValueError).when_called_with(invalid) \
+            .contains("incompatible input matrix ('drw') for treatment 'wwtt'")
+
+    def test_should_read_toml(self):
+        config = load_config(self.write("grid.toml", TOML))
+
+        assert_that(config["run"]["n_runs"]).is_equal_to(500)
+        assert_that(config["trains"][0][0]["removal"]).is_equal_to([40, 60])
+
+    def test_should_run_grid_and_write_results(self):
+        config = self.write("grid.json", json.dumps(CONFIG))
+        output = os.path.join(self.tmp.name, "out")
+
+        with redirect_stderr(io.StringIO()) as stderr:
+            exit_code = main(["run", config, "--output", output, "--n-runs", "300"])
+
+        assert_that(exit_code).is_equal_to(0)
+        assert_that(stderr.getvalue()).contains("4/4 scenarios")
+        results = load_results(output)
+        assert_that(results.names).is_equal_to([f"nightly-{i}" for i in range(4)])
+        assert_that(results[3].final_concentration).is_length(300)
+        summary = pd.read_csv(os.path.join(output, "summary.csv"))
+        assert_that(summary["substance"].tolist()).is_equal_to(["pfoa", "pfoa", "pfos", "pfos"])
+        assert_that(np.allclose(summary["mean"], [r.final_concentration.mean() for r in results])).is_true()
+
+    def test_should_estimate_time_left(self):
+        times = iter([0., 10.])
+        stream = io.StringIO()
+        reporter = ProgressReporter(stream, clock=lambda: next(times))
+
+        reporter(1, 4)
+
+        assert_that(stream.getvalue()).contains("1/4 scenarios (25%), elapsed 00:10, eta 00:30")
@@ -0,0 +1,61 @@
+import ast
+import importlib
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from assertpy import assert_that
+
+import promisces
+import promisces.models
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(statement: str) -> set[str]:
+    """the modules loaded by `statement` in a fresh interpreter"""
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+
+def public_definitions(module: str) -> set[str]:
+    with open(importlib.import_module(module).__file__) as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.Assign):
+            names.update(t.id for t in node.targets if isinstance(t, ast.Name))
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            names.add(node.target.id)
+    return {name for name in names if not name.startswith("_")}
+
+
+class TestLazyImports(TestCase):
+
+    def test_simulation_should_not_load_pandas_plotting_or_scipy_stats(self):
+        modules = loaded_modules("import promisces.simulate_removal")
+
+        assert_that(modules).contains("numpy", "scipy.special")
+        assert_that(modules).does_not_contain(
+            "pandas", "scipy.stats", "matplotlib", "seaborn", "promisces.plots", "promisces.models.case_study",
+            "asyncio",
+        )
+
+    def test_should_load_submodule_on_first_access(self):
+        modules = loaded_modules("import promisces; promisces.spider_plot")
+
+        assert_that(modules).contains("promisces.plots", "matplotlib")
+
+    def test_exports_should_cover_public_definitions(self):
+        for package in (promisces, promisces.models):
+            for module, names in package.exports.items():
+                qualified = importlib.import_module(module, package.__name__).__name__
+                assert_that(set(names)).described_as(qualified).is_equal_to(public_definitions(qualified))
+
+    def test_package_attribute_should_be_the_simulation_function(self):
+        assert_that(callable(promisces.simulate_removal)).is_true()
+        assert_that(promisces.Scenario).is_same_as(promisces.models.scenario.Scenario)
@@ -0,0 +1,46 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.literature import LiteratureStore
+
+
+def write_tables(data_dir: str, removal_rows: list[str]):
+    with open(os.path.join(data_dir, "process_removal_lit.csv"), "w", encoding="cp1252") as f:
+        f.write("substance_id;treatment_id;removal_percent\n" + "\n".join(removal_rows) + "\n")
+    with open(os.path.join(data_dir, "starting_concentration.csv"), "w", encoding="cp1252") as f:
+        f.write("substance_id;matrix_id;min_value_ng_l;point_value_ng_l;max_value_ng_l\n"
+                "pfoa;rww;1.5;;20\n"
+                "pfoa;rww;;7;\n")
+    with open(os.path.join(data_dir, "reference_lit.csv"), "w", encoding="cp1252") as f:
+        f.write("substance_id;matrix_id;reference_value_ng_l;reference_id;year;comments\n"
+                "pfoa;drw;4.4;ref;2020;a comment\n")
+
+
+class TestLiteratureStore(TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+        write_tables(self.data_dir.name, ["pfoa;wwt1;10.4", "pfoa;wwt1;49.6", "pfos;wwt1;80"])
+        self.store = LiteratureStore(self.data_dir.name)
+
+    def tearDown(self):
+        self.data_dir.cleanup()
+
+    def test_should_index_tables_by_ids(self):
+        assert_that(self.store.removal_percent("pfoa", "wwt1").tolist()).is_equal_to([10, 50])
+        assert_that(self.store.removal_percent("pfoa", "wwro")).is_empty()
+        starting_c = self.store.starting_concentration("pfoa", "rww")
+        assert_that(starting_c[~np.isnan(starting_c)].tolist()).is_equal_to([1.5, 7, 20])
+        assert_that(self.store.references("pfoa", "drw")[0][:2]).is_equal_to(("ref", 4.4))
+
+    def test_should_only_see_file_changes_after_reload(self):
+        self.store.removal_percent("pfoa", "wwt1")
+        write_tables(self.data_dir.name, ["pfoa;wwt1;90"])
+
+        assert_that(self.store.removal_percent("pfoa", "wwt1").tolist()).is_equal_to([10, 50])
+        self.store.reload()
+        assert_that(self.store.removal_percent("pfoa", "wwt1").tolist()).is_equal_to([90])
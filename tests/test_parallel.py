@@ -0,0 +1,99 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.matrix import Matrices
+from promisces.models.reference import Reference
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substances
+from promisces.models.treatment import Treatments, TreatmentTrain
+from promisces.parallel import run_scenarios
+from promisces.rng import scenario_seeds
+from promisces.simulate_removal import simulate_removal
+from promisces.storage import ResultCache, ResultDirectory
+
+
+def make_scenarios(n: int) -> list[Scenario]:
+    return [
+        Scenario(
+            f"scenario {i}",
+            Matrices.rww,
+            Substances.pfoa,
+            TreatmentTrain([
+                Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array([50]))),
+                Treatments.wwuf.clone(with_lit_data=False),
+            ][:1 + i % 2]),
+            StartingConcentration(np.array([i + 1., i + 2.])),
+            Reference("test", 1, 2024, "")
+        )
+        for i in range(n)
+    ]
+
+
+class TestRunScenarios(TestCase):
+
+    def test_should_collect_results_from_workers_in_order(self):
+        scenarios = make_scenarios(5)
+
+        results = run_scenarios(scenarios, workers=2, n_runs=500, chunk_size=2, preload_literature=False)
+
+        assert_that([r.scenario.name for r in results]).is_equal_to([s.name for s in scenarios])
+        for i, result in enumerate(results):
+            assert_that(result.intermediate_results).is_length(1 + i % 2)
+            assert_that(result.starting_concentration.min()).is_between(i + 1., i + 2.)
+            assert_that(result.final_concentration.shape).is_equal_to((500,))
+            assert_that([t.stage for t in result.timings]).contains("literature", "input", "wwtt")
+        # views of one shared block, not copies
+        assert_that(results[1].final_concentration.base).is_same_as(results[0].final_concentration.base)
+
+    def test_should_reproduce_serial_run_with_same_seed(self):
+        scenarios = make_scenarios(4)
+        seeds = scenario_seeds(123, len(scenarios))
+
+        serial = [simulate_removal(s, 300, 100, seed) for s, seed in zip(scenarios, seeds)]
+        sharded = run_scenarios(scenarios, workers=3, n_runs=300, rmv_factor_resolution=100, chunk_size=1,
+                                preload_literature=False, seed=123)
+
+        for expected, actual in zip(serial, sharded):
+            assert_that(np.array_equal(actual.starting_concentration, expected.starting_concentration)).is_true()
+            for expected_stage, actual_stage in zip(expected.intermediate_results, actual.intermediate_results):
+                assert_that(np.array_equal(actual_stage.output_concentration,
+                                           expected_stage.output_concentration)).is_true()
+                assert_that(np.array_equal(actual_stage.rmv_factors, expected_stage.rmv_factors)).is_true()
+
+    def test_should_write_results_as_they_are_finished(self):
+        scenarios = make_scenarios(4)
+        written = []
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "out")
+
+            results = run_scenarios(scenarios, workers=2, n_runs=300, chunk_size=1, preload_literature=False, seed=5,
+                                    progress=lambda n_done, _: written.append((n_done, len(os.listdir(output)))),
+                                    output=output)
+            in_memory = run_scenarios(scenarios, workers=2, n_runs=300, preload_literature=False, seed=5)
+
+            assert_that(results).is_instance_of(ResultDirectory)
+            assert_that(results.names).is_equal_to([s.name for s in scenarios])
+            for actual, expected in zip(results, in_memory):
+                assert_that(np.array_equal(actual.final_concentration, expected.final_concentration)).is_true()
+                assert_that([t.stage for t in actual.timings]).contains("literature", "input", "wwtt")
+        assert_that(all(n_dirs >= n_done for n_done, n_dirs in written)).is_true()
+
+    def test_should_only_simulate_changed_scenarios_with_cache(self):
+        scenarios = make_scenarios(4)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(tmp)
+            first = run_scenarios(scenarios, workers=2, n_runs=300, preload_literature=False, seed=1, cache=cache)
+            scenarios[2].treatment_train[0].removal = RemovalPercent(np.array([60]))
+
+            second = run_scenarios(scenarios, workers=2, n_runs=300, preload_literature=False, seed=1, cache=cache)
+
+            assert_that(cache).is_length(5)
+        for i in (0, 1, 3):
+            assert_that(np.array_equal(second[i].final_concentration, first[i].final_concentration)).is_true()
+        assert_that(np.array_equal(second[2].final_concentration, first[2].final_concentration)).is_false()
@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.matrix import Matrices
+from promisces.models.registry import registry
+from promisces.models.substance import SubstanceGroup, Substances
+from promisces.models.treatment import TreatmentGroup, Treatments, TreatmentTrain
+
+
+def is_valid(train: list[str], input_matrix: str) -> bool:
+    try:
+        TreatmentTrain([registry.treatment(id) for id in train]).validate_matrices(registry.matrix(input_matrix))
+    except ValueError:
+        return False
+    return True
+
+
+class TestRegistry(TestCase):
+
+    def test_should_look_up_by_id(self):
+        assert_that(registry.substance("_4_2fts")).is_same_as(Substances.fts_4_2)
+        assert_that(registry.treatment("wwtt")).is_same_as(Treatments.wwtt)
+        assert_that(registry.matrix).raises(ValueError).when_called_with("nope").contains("unknown matrix 'nope'")
+
+    def test_should_index_groups_and_input_matrices(self):
+        assert_that(registry.substance_groups[SubstanceGroup.PFAS]).contains(Substances.pfoa, Substances.fts_4_2)
+        assert_that(registry.treatment_groups[TreatmentGroup.WWT]).contains(Treatments.wwtt)
+        assert_that(set(registry.treatments_for(Matrices.rww))).is_equal_to({
+            t for t in registry.treatments if Matrices.rww in t.input_matrix
+        })
+
+    def test_transitions_should_match_treatment_definitions(self):
+        for t, treatment in enumerate(registry.treatments):
+            for m, matrix in enumerate(registry.matrices):
+                expected = registry.matrix_index[treatment.get_output_matrix(matrix).id] \
+                    if matrix in treatment.input_matrix else -1
+                assert_that(int(registry.transitions[t, m])).is_equal_to(expected)
+
+    def test_bulk_validation_should_match_treatment_trains(self):
+        rng = np.random.default_rng(0)
+        ids = [t.id for t in registry.treatments]
+        trains = [list(rng.choice(ids, rng.integers(1, 5))) for _ in range(2000)]
+        input_matrices = rng.choice(["rww", "tww", "suw", "grw"], len(trains))
+
+        result = registry.validate(input_matrices, registry.resolve(trains))
+
+        expected = [is_valid(train, m) for train, m in zip(trains, input_matrices)]
+        assert_that(result.valid.tolist()).is_equal_to(expected)
+        assert_that(expected).contains(True, False)
+        for k in np.flatnonzero(result.valid)[:50]:
+            train = TreatmentTrain([registry.treatment(id) for id in trains[k]])
+            output = train.output_matrix(registry.matrix(input_matrices[k]))
+            assert_that(registry.matrices[result.output_matrix[k]]).is_same_as(output)
+
+    def test_resolve_should_pad_and_reject_unknown_ids(self):
+        indices = registry.resolve([["wwtt"], ["wwtt", "dilsw"]])
+
+        assert_that(indices.tolist()).is_equal_to([
+            [registry.treatment_index["wwtt"], -1],
+            [registry.treatment_index["wwtt"], registry.treatment_index["dilsw"]],
+        ])
+        assert_that(registry.resolve).raises(ValueError).when_called_with([["nope"]]) \
+            .contains("unknown treatment 'nope'")
@@ -0,0 +1,124 @@
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.removal_percent import RemovalPercent
+from promisces.removal_processes import (
+    AdaptiveGrid,
+    adaptive_posterior,
+    apply_generic_process,
+    apply_generic_process_ranked,
+    apply_mixture_process,
+    clear_grid_caches,
+    grid_cache_info,
+    prior_beta,
+    sorted_uniforms,
+    to_likelihood,
+)
+
+
+class TestGridCaches(TestCase):
+
+    def setUp(self):
+        clear_grid_caches()
+
+    def test_should_reuse_prior_for_same_power_and_resolution(self):
+        first = prior_beta(100, 500)
+        second = prior_beta(100, 500)
+        prior_beta(50, 500)
+
+        assert_that(second).is_same_as(first)
+        assert_that(grid_cache_info()["prior"].hits).is_equal_to(1)
+        assert_that(grid_cache_info()["prior"].misses).is_equal_to(2)
+
+    def test_should_key_likelihood_by_removal_content(self):
+        _, first = to_likelihood(RemovalPercent(np.array([50, 60])), 500)
+        _, same_values = to_likelihood(RemovalPercent(np.array([50., 60.])), 500)
+        _, other_values = to_likelihood(RemovalPercent(np.array([50, 61])), 500)
+
+        assert_that(same_values).is_same_as(first)
+        assert_that(other_values).is_not_same_as(first)
+        assert_that(first.flags.writeable).is_false()
+
+
+class TestRankedGenericProcess(TestCase):
+
+    def test_sorted_uniforms_should_be_ascending_and_uniform(self):
+        u = sorted_uniforms(100_000, np.random.default_rng(0))
+
+        assert_that(np.all(np.diff(u) >= 0)).is_true()
+        assert_that(u.min()).is_greater_than_or_equal_to(0)
+        assert_that(u.max()).is_less_than(1)
+        assert_that(np.abs(np.quantile(u, [0.1, 0.5, 0.9]) - [0.1, 0.5, 0.9]).max()).is_less_than(0.01)
+
+    def test_should_keep_output_sorted_and_match_generic_process(self):
+        input_c = np.sort(np.random.default_rng(1).uniform(1, 100, 50_000))[::-1]
+        lit_rmv, cs_rmv = RemovalPercent(np.array([30, 50, 70])), RemovalPercent(np.array([]))
+
+        ranked = apply_generic_process_ranked(input_c, lit_rmv, cs_rmv, 1000, rng=np.random.default_rng(2))
+        generic = apply_generic_process(input_c, lit_rmv, cs_rmv, 1000, n_runs=50_000,
+                                        rng=np.random.default_rng(3))
+
+        assert_that(np.all(np.diff(ranked.output_concentration) <= 0)).is_true()
+        assert_that(ranked.dominant_distribution).is_equal_to(generic.dominant_distribution)
+        for p in (0.05, 0.5, 0.95):
+            assert_that(np.quantile(ranked.output_concentration, p)).is_close_to(
+                np.quantile(generic.output_concentration, p), 1
+            )
+
+
+class TestAdaptiveGrid(TestCase):
+
+    def quantiles(self, grid: AdaptiveGrid, q: np.ndarray) -> tuple[np.ndarray, int]:
+        rmv_factors, posterior, _ = adaptive_posterior(
+            RemovalPercent(np.array([99.9, 99.95, 99.99])), RemovalPercent(np.array([])), grid
+        )
+        return rmv_factors[np.searchsorted(np.cumsum(posterior), q)] / 100, len(rmv_factors)
+
+    def test_should_meet_quantile_accuracy_with_few_points(self):
+        q = np.array([0.01, 0.5, 0.95, 0.99])
+        grid = AdaptiveGrid(quantile_tol=1e-3, relative_tol=1e-2)
+        reference, _ = self.quantiles(AdaptiveGrid(quantile_tol=1e-4, relative_tol=1e-3, min_width=1e-14), q)
+
+        actual, n_points = self.quantiles(grid, q)
+
+        assert_that(n_points).is_less_than(10_000)
+        assert_that(np.abs(actual - reference).max()).is_less_than(grid.quantile_tol)
+        remaining = 1 - reference
+        assert_that((np.abs(actual - reference) / remaining).max()).is_less_than(grid.relative_tol)
+        # a uniform grid of 1000 points can't resolve removals above 99.9 %
+        assert_that(1 - actual[-1]).is_less_than(1e-6)
+
+    def test_generic_process_should_draw_from_adaptive_grid(self):
+        input_c = np.linspace(100, 1, 1000)
+        result = apply_generic_process(input_c, RemovalPercent(np.array([40, 60])), RemovalPercent(np.array([])),
+                                       1000, n_runs=1000, rng=np.random.default_rng(0), adaptive_grid=AdaptiveGrid())
+
+        assert_that(np.all(np.diff(result.rmv_factors) >= 0)).is_true()
+        # removal factors are off the uniform grid, so they are stored as floats
+        assert_that(result.compact(1000).stored_rmv_factors.dtype).is_equal_to(np.float32)
+
+
+class TestCompactProcessResult(TestCase):
+
+    def test_should_store_generic_removal_factors_as_exact_grid_indices(self):
+        input_c = np.linspace(100, 1, 1000)
+        result = apply_generic_process(input_c, RemovalPercent(np.array([40, 60])), RemovalPercent(np.array([])),
+                                       1000, n_runs=1000, rng=np.random.default_rng(0))
+
+        compact = result.compact(1000)
+
+        assert_that(compact.stored_rmv_factors.dtype).is_equal_to(np.uint16)
+        assert_that(compact.stored_output_concentration.dtype).is_equal_to(np.float32)
+        assert_that(np.array_equal(compact.rmv_factors, result.rmv_factors)).is_true()
+        assert_that(compact.nbytes * 2).is_less_than(result.nbytes)
+
+    def test_should_keep_continuous_removal_factors_as_float32(self):
+        result = apply_mixture_process(np.linspace(100, 1, 1000), 0.5, 0.05, 1, 0.5,
+                                       rng=np.random.default_rng(0))
+
+        compact = result.compact(1000)
+
+        assert_that(compact.stored_rmv_factors.dtype).is_equal_to(np.float32)
+        assert_that(np.allclose(compact.rmv_factors, result.rmv_factors, rtol=1e-6)).is_true()
@@ -0,0 +1,94 @@
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+from scipy.stats import kstest, lognorm, truncnorm
+
+from promisces.models.removal_percent import RemovalPercent
+from promisces.removal_processes import clear_grid_caches, grid_cache_info, posterior_sampler
+from promisces.sampling import DiscreteSampler, lognorm_rvs, truncated_lognorm_rvs, truncnorm_rvs
+
+
+class TestDiscreteSampler(TestCase):
+
+    def setUp(self):
+        self.grid = np.arange(1, 100) / 100 * 100
+        probs = np.exp(-(self.grid - 70) ** 2 / 50)
+        self.probs = probs / probs.sum()
+        self.sampler = DiscreteSampler.from_probs(self.grid, self.probs)
+
+    def test_should_draw_like_numpy_choice(self):
+        expected = np.random.default_rng(1).choice(self.grid, 10_000, p=self.probs)
+        actual = self.sampler.sample(10_000, np.random.default_rng(1))
+
+        assert_that(np.array_equal(actual, expected)).is_true()
+
+    def test_should_count_sorted_uniforms_like_the_inverse_cdf(self):
+        u = np.sort(np.random.default_rng(4).random(10_000))
+
+        assert_that(np.array_equal(self.sampler.ppf_sorted(u), self.sampler.ppf(u))).is_true()
+
+    def test_should_leave_the_input_arrays_writeable(self):
+        assert_that(self.grid.flags.writeable).is_true()
+        assert_that(self.probs.flags.writeable).is_true()
+        assert_that(self.sampler.probs.flags.writeable).is_false()
+        assert_that(self.sampler.grid.flags.writeable).is_false()
+
+    def test_should_draw_sorted_samples_with_the_posterior_distribution(self):
+        samples = self.sampler.sample_sorted(200_000, np.random.default_rng(2))
+        reference = self.sampler.sample(200_000, np.random.default_rng(3))
+
+        assert_that(samples).is_length(200_000)
+        assert_that(np.all(np.diff(samples) >= 0)).is_true()
+        for p in (0.05, 0.5, 0.95):
+            assert_that(np.quantile(samples, p)).is_close_to(np.quantile(reference, p), 1)
+
+    def test_should_share_posterior_sampler_across_equal_removal_data(self):
+        clear_grid_caches()
+        first, _ = posterior_sampler(RemovalPercent(np.array([60, 70])), RemovalPercent(np.array([])), 500)
+        second, _ = posterior_sampler(RemovalPercent(np.array([60., 70.])), RemovalPercent(np.array([])), 500)
+
+        assert_that(second).is_same_as(first)
+        assert_that(grid_cache_info()["sampler"].hits).is_equal_to(1)
+        assert_that(first.cdf.flags.writeable).is_false()
+
+
+class TestTruncatedDistributions(TestCase):
+
+    def test_should_match_scipy_truncnorm_for_scalar_and_tail_bounds(self):
+        rng = np.random.default_rng(0)
+        for a, b in [(-1, 2), (6, 8), (-40, -38), (-np.inf, 0.5), (-1.4, 100)]:
+            samples = truncnorm_rvs(a, b, 2, 3, 50_000, rng)
+
+            assert_that(kstest(samples, truncnorm(a, b, loc=2, scale=3).cdf).pvalue).is_greater_than(0.001)
+
+    def test_should_match_scipy_truncnorm_for_per_element_bounds(self):
+        rng = np.random.default_rng(1)
+        b = rng.uniform(-0.2, 5, 50_000)
+
+        samples = truncnorm_rvs(-0.3, b, 1, 0.5, 50_000, rng)
+
+        assert_that(np.all(samples <= 1 + 0.5 * b)).is_true()
+        # every sample transformed by its own cdf is uniform
+        assert_that(kstest(truncnorm.cdf(samples, -0.3, b, loc=1, scale=0.5), "uniform").pvalue).is_greater_than(0.001)
+
+    def test_should_draw_rows_from_their_own_generators(self):
+        a, b = np.array([[-1.], [0.5], [-np.inf]]), np.array([[1.], [3.], [0.]])
+
+        rows = truncnorm_rvs(a, b, 2, 3, (3, 1000), [np.random.default_rng(i) for i in range(3)])
+
+        for i in range(3):
+            expected = truncnorm_rvs(a[i, 0], b[i, 0], 2, 3, 1000, np.random.default_rng(i))
+            assert_that(np.array_equal(rows[i], expected)).is_true()
+
+    def test_should_match_scipy_lognorm(self):
+        rng = np.random.default_rng(2)
+        upper = rng.uniform(0.5, 5, 50_000)
+
+        samples = lognorm_rvs(0.8, 2, 50_000, rng)
+        truncated = truncated_lognorm_rvs(0.8, 2, upper, 50_000, rng)
+
+        assert_that(kstest(samples, lognorm(0.8, scale=2).cdf).pvalue).is_greater_than(0.001)
+        assert_that(np.all(truncated <= upper)).is_true()
+        pit = lognorm.cdf(truncated, 0.8, scale=2) / lognorm.cdf(upper, 0.8, scale=2)
+        assert_that(kstest(pit, "uniform").pvalue).is_greater_than(0.001)
@@ -0,0 +1,82 @@
+import dataclasses as dtc
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.matrix import Matrices
+from promisces.models.reference import Reference
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substances
+from promisces.models.treatment import Treatments, TreatmentTrain
+from promisces.search import enumerate_trains, search_trains
+from promisces.simulate_removal import prefix_cache
+
+
+def treatment(definition, removal):
+    return definition.clone(with_lit_data=False, removal=RemovalPercent(np.array(removal, dtype=float)))
+
+
+TREATMENTS = [
+    treatment(Treatments.wwt2, [10, 20]),
+    treatment(Treatments.wwtt, [40, 60]),
+    treatment(Treatments.wwro, [95, 99]),
+    treatment(Treatments.wwuf, [20, 30]),
+    treatment(Treatments.dwro, [95, 99]),
+    treatment(Treatments.dwac, [50, 60]),
+]
+SUBSTANCES = [
+    dtc.replace(Substances.pfoa, starting_concentration=StartingConcentration(np.array([10., 100.])),
+                reference=Reference("test", 15, 2024, "")),
+    dtc.replace(Substances.pfos, starting_concentration=StartingConcentration(np.array([1., 50.])),
+                reference=Reference("test", 8, 2024, "")),
+]
+
+
+class TestSearch(TestCase):
+
+    def search(self, **kwargs):
+        return search_trains("rww", "drw", SUBSTANCES, max_length=3, treatments=TREATMENTS, n_runs=1000, seed=1,
+                             **kwargs)
+
+    def test_should_enumerate_valid_trains_without_repeats(self):
+        trains = list(enumerate_trains(Matrices.rww, Matrices.drw, 3, TREATMENTS))
+
+        assert_that(trains).is_not_empty()
+        for train in trains:
+            assert_that(len(set(t.id for t in train))).is_equal_to(len(train))
+            assert_that(TreatmentTrain(list(train)).output_matrix(Matrices.rww)).is_equal_to(Matrices.drw)
+        assert_that([t.id for t in trains[0]]).is_equal_to(["wwt2", "wwro", "dwro"])
+
+    def test_should_prune_without_losing_feasible_trains(self):
+        result = self.search()
+        exhaustive = self.search(removal_margin=100.)
+
+        assert_that(result.n_pruned).is_greater_than(0)
+        assert_that(exhaustive.n_pruned).is_equal_to(0)
+        assert_that(len(result.candidates)).is_less_than(len(exhaustive.candidates))
+        assert_that(exhaustive.candidates).is_length(len(list(enumerate_trains("rww", "drw", 3, TREATMENTS))))
+        assert_that({c.ids for c in result.shortlist}).is_equal_to({c.ids for c in exhaustive.shortlist})
+
+    def test_should_rank_feasible_trains(self):
+        result = self.search(shortlist=3)
+
+        assert_that(result.shortlist).is_not_empty().is_length(3)
+        ratios = [c.ratio for c in result.shortlist]
+        assert_that(ratios).is_sorted()
+        for candidate in result.shortlist:
+            assert_that(candidate.feasible).is_true()
+            assert_that(np.all(candidate.percentiles >= candidate.bound)).is_true()
+        assert_that(result.to_frame()).is_length(len(result.candidates))
+
+    def test_should_require_substances(self):
+        with self.assertRaises(ValueError):
+            search_trains("rww", "drw", [], treatments=TREATMENTS)
+
+    def test_should_share_simulated_prefixes(self):
+        prefix_cache.clear()
+
+        self.search()
+
+        assert_that(prefix_cache.info().hits).is_greater_than(0)
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.mixture import Mixture
+from promisces.sensitivity import Factor, default_factors, perturb, sobol_indices
+from tests.helpers import make_scenario, make_train
+
+
+class TestSensitivity(TestCase):
+
+    def test_should_build_factors_per_treatment(self):
+        factors = default_factors(make_scenario("sensitivity", make_train(mixture=Mixture(0.5, 0.05, 0, 0))))
+
+        assert_that([f.name for f in factors]).is_equal_to(
+            ["input.start_low", "input.start_high", "0:wwtt.removal_shift", "1:dilsw.x2_mean"]
+        )
+
+    def test_should_perturb_a_copy_of_the_scenario(self):
+        scenario = make_scenario("sensitivity", make_train(mixture=Mixture(0.5, 0.05, 0, 0)))
+        factors = default_factors(scenario)
+
+        perturbed = perturb(scenario, factors, np.array([0.8, 1.2, 10, 0.6]))
+
+        assert_that(perturbed.starting_concentration.arr.tolist()).is_equal_to([8., 120.])
+        assert_that(perturbed.treatment_train[0].removal.arr.tolist()).is_equal_to([60, 70])
+        assert_that(perturbed.treatment_train[1].mixture.x2_mean).is_equal_to(0.6)
+        assert_that(scenario.treatment_train[1].mixture.x2_mean).is_equal_to(0.5)
+
+    def test_should_find_the_driving_factors(self):
+        # without dilution, the concentration of the diluting water has no effect
+        scenario = make_scenario("sensitivity", make_train(mixture=Mixture(0, 0, 5, 1)))
+        factors = [
+            Factor("input", "start_high", None, 0.5, 1.5),
+            Factor("0:wwtt", "removal_shift", 0, -5, 5),
+            Factor("1:dilsw", "c2_mean", 1, 4, 6),
+        ]
+
+        result = sobol_indices(scenario, factors, n_samples=64, n_runs=500, rmv_factor_resolution=100, seed=0,
+                               output=lambda r: r.final_concentration.mean())
+        indices = result.indices.set_index("parameter")
+
+        assert_that(result.y_ab.shape).is_equal_to((3, 64))
+        assert_that(indices.loc["c2_mean", "ST"]).is_close_to(0, 1e-12)
+        assert_that(indices.loc["start_high", "ST"]).is_greater_than(indices.loc["removal_shift", "ST"])
+        assert_that(indices.loc["start_high", "S1"]).is_between(0.5, 1.1)
+
+    def test_should_vary_the_starting_concentration_of_the_substance(self):
+        scenario = make_scenario("sensitivity", make_train(mixture=Mixture(0, 0, 5, 1)), substance_start=True)
+        factors = [Factor("input", "start_low", None, 0.5, 1.5), Factor("input", "start_high", None, 0.5, 1.5)]
+
+        perturbed = perturb(scenario, factors, np.array([0.8, 1.2]))
+        result = sobol_indices(scenario, factors, n_samples=32, n_runs=500, rmv_factor_resolution=100, seed=0,
+                               output=lambda r: r.final_concentration.mean())
+
+        assert_that(perturbed.starting_concentration.arr.tolist()).is_equal_to([8., 120.])
+        assert_that(perturbed.substance.starting_concentration.arr.tolist()).is_equal_to([8., 120.])
+        assert_that(result.indices["ST"].min()).is_greater_than(0)
@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import threading
+from unittest import TestCase
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from assertpy import assert_that
+
+from promisces.models.literature import literature_store
+from promisces.service import SimulationServer, SimulationService, request_key
+
+SCENARIO = dict(
+    name="service",
+    input_matrix="rww",
+    substance="pfoa",
+    train=[
+        {"id": "wwtt", "with_lit_data": False, "removal": [40, 60]},
+        {"id": "dilsw", "with_lit_data": False, "mixture": {"x2_mean": 0.5, "x2_sd": 0.05, "c2_mean": 1,
+                                                            "c2_sd": 0.5}},
+    ],
+    starting_concentration=[10, 100],
+    reference={"id": "test", "ref_value_ng_l": 20, "year": 2024, "comments": ""},
+)
+
+
+class TestSimulationService(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = SimulationService(workers=2)
+        cls.server = SimulationServer(("127.0.0.1", 0), cls.service, quiet=True)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+
+    def post(self, body) -> dict:
+        request = Request(f"{self.url}/simulate", json.dumps(body).encode(), {"Content-Type": "application/json"})
+        with urlopen(request) as response:
+            return json.loads(response.read())
+
+    def test_request_key_should_ignore_key_order(self):
+        assert_that(request_key(dict(a=1, b=[1, 2]))).is_equal_to(request_key(dict(b=[1, 2], a=1)))
+        assert_that(request_key(dict(a=1))).is_not_equal_to(request_key(dict(a=2)))
+
+    def test_should_memoize_equal_requests(self):
+        body = dict(scenario=SCENARIO, n_runs=2000, seed=5)
+
+        first = self.post(body)
+        second = self.post(dict(reversed(list(body.items()))))
+
+        assert_that(first["cached"]).is_false()
+        assert_that(second["cached"]).is_true()
+        assert_that(second["output_c"]).is_equal_to(first["output_c"])
+        assert_that(list(first["output_c"])).is_length(3)
+        assert_that(first["output_c"]["dilsw"]["count"]).is_equal_to(2000)
+        assert_that(first["exceedance"]).is_between(0, 1)
+
+    def test_should_reuse_upstream_stages_of_changed_request(self):
+        changed = json.loads(json.dumps(SCENARIO))
+        changed["train"][1]["mixture"]["c2_mean"] = 2
+        self.post(dict(scenario=SCENARIO, n_runs=3000, seed=7))
+        hits = self.service.health()["caches"]["prefix"]["hits"]
+
+        response = self.post(dict(scenario=changed, n_runs=3000, seed=7))
+
+        assert_that(response["cached"]).is_false()
+        assert_that(self.service.health()["caches"]["prefix"]["hits"]).is_greater_than(hits)
+
+    def test_should_reject_invalid_scenario(self):
+        with self.assertRaises(HTTPError) as error:
+            self.post(dict(scenario=dict(SCENARIO, substance="nope")))
+
+        assert_that(error.exception.code).is_equal_to(400)
+        assert_that(json.loads(error.exception.read())["error"]).contains("unknown substance 'nope'")
+
+    def test_should_answer_scenarios_without_literature_data(self):
+        data_dir = literature_store.data_dir
+        # starting concentration, but not for pfos in rww
+        without_start_c = {key: value for key, value in SCENARIO.items() if key != "starting_concentration"}
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                literature_store.reload(tmp)
+            except FileNotFoundError:
+                pass
+            with self.assertRaises(HTTPError) as missing_tables:
+                self.post(dict(scenario=without_start_c))
+
+            with open(os.path.join(tmp, "process_removal_lit.csv"), "w", encoding="cp1252") as f:
+                f.write("substance_id;treatment_id;removal_percent\npfoa;wwtt;50\n")
+            with open(os.path.join(tmp, "starting_concentration.csv"), "w", encoding="cp1252") as f:
+                f.write("substance_id;matrix_id;min_value_ng_l;point_value_ng_l;max_value_ng_l\npfoa;rww;1;;20\n")
+            with open(os.path.join(tmp, "reference_lit.csv"), "w", encoding="cp1252") as f:
+                f.write("substance_id;matrix_id;reference_value_ng_l;reference_id;year;comments\n")
+            literature_store.reload()
+            try:
+                with self.assertRaises(HTTPError) as missing_data:
+                    self.post(dict(scenario=dict(without_start_c, substance="pfos")))
+            finally:
+                literature_store.data_dir = data_dir
+                literature_store.invalidate()
+
+        assert_that(missing_tables.exception.code).is_equal_to(500)
+        assert_that(json.loads(missing_tables.exception.read())["error"]).starts_with("FileNotFoundError")
+        assert_that(missing_data.exception.code).is_equal_to(422)
+        assert_that(json.loads(missing_data.exception.read())["error"]) \
+            .contains("No starting concentration found in the literature for substance pfos and input matrix rww")
+
+    def test_should_report_health(self):
+        with urlopen(f"{self.url}/health") as response:
+            health = json.loads(response.read())
+
+        assert_that(health["status"]).is_equal_to("ok")
+        assert_that(health["caches"]).contains_key("responses", "sampler", "prefix")
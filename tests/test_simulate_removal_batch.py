@@ -0,0 +1,151 @@
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.mixture import Mixture
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.treatment import Treatments, TreatmentTrain
+from promisces.removal_processes import ProcessType
+from promisces.rng import scenario_seeds
+from promisces.simulate_removal import (
+    SimulationResult,
+    prefix_cache,
+    simulate_mixture_sweep,
+    simulate_removal,
+    simulate_removal_batch,
+)
+from tests.helpers import make_scenario
+
+
+class TestSimulateRemovalBatch(TestCase):
+
+    def test_should_return_results_in_input_order(self):
+        generic = TreatmentTrain([
+            Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array([50, 60]))),
+            Treatments.wwuf.clone(with_lit_data=False),
+        ])
+        mixture = TreatmentTrain([
+            Treatments.wwtt.clone(with_lit_data=False),
+            Treatments.dilsw.clone(with_lit_data=False, mixture=Mixture(0.5, 0.05, 0, 0)),
+        ])
+        scenarios = [
+            make_scenario("generic-0", generic),
+            make_scenario("mixture-0", mixture),
+            make_scenario("generic-1", generic),
+        ]
+
+        results = simulate_removal_batch(scenarios, n_runs=1000, rmv_factor_resolution=100, max_batch_size=1)
+
+        assert_that(results).is_length(3)
+        assert_that([r.scenario.name for r in results]).is_equal_to(["generic-0", "mixture-0", "generic-1"])
+        for result in results:
+            assert_that(result).is_instance_of(SimulationResult)
+            assert_that(result.final_concentration.shape).is_equal_to((1000,))
+            assert_that(np.all(np.diff(result.final_concentration) <= 0)).is_true()
+        assert_that(results[1].intermediate_results[1].process_type).is_equal_to(ProcessType.mixture)
+
+    def test_should_apply_case_study_removal(self):
+        train = TreatmentTrain([
+            Treatments.wwt1.clone(with_lit_data=False, removal=RemovalPercent(np.array([100, 100, 100]))),
+        ])
+
+        result, = simulate_removal_batch([make_scenario("full removal", train)], n_runs=100)
+
+        assert_that(result.final_concentration.mean()).is_less_than(0.25 * result.starting_concentration.mean())
+
+    def test_should_match_serial_runs_with_sorted_and_averaged_removal_factors(self):
+        trains = [
+            TreatmentTrain([
+                Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array(removal))),
+                Treatments.wwuf.clone(with_lit_data=False, removal=RemovalPercent(np.array([30, 40]))),
+            ])
+            for removal in ([50, 60], np.linspace(55, 65, 30), [])
+        ]
+        scenarios = [make_scenario(f"scenario-{i}", trains[i % 3]) for i in range(7)]
+
+        results = simulate_removal_batch(scenarios, n_runs=2000, rmv_factor_resolution=500, seed=3)
+
+        assert_that({r.intermediate_results[0].average_out for r in results}).is_equal_to({True, False})
+        for scenario, seed, result in zip(scenarios, scenario_seeds(3, len(scenarios)), results):
+            expected = simulate_removal(scenario, 2000, 500, seed)
+            for actual, serial in zip(result.intermediate_results, expected.intermediate_results):
+                assert_that(np.array_equal(actual.rmv_factors, serial.rmv_factors)).is_true()
+                assert_that(np.array_equal(actual.output_concentration, serial.output_concentration)).is_true()
+
+
+class TestSimulateMixtureSweep(TestCase):
+
+    def test_should_match_serial_runs_of_every_mixture(self):
+        train = TreatmentTrain([
+            Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array([50, 60]))),
+            Treatments.dilsw.clone(with_lit_data=False, mixture=Mixture(0.5, 0.05, 0, 0)),
+            Treatments.npbk.clone(with_lit_data=False, removal=RemovalPercent(np.array([20]))),
+        ])
+        mixtures = [
+            Mixture(0.715, 0.058, 0, 0),
+            Mixture(0.5, 0.058, 0, 0),
+            Mixture(0.715, 0.058, 10, 2),
+            Mixture(0.3, 0, 5, 1),
+            Mixture(0.6, 0.05, 2, 0.5, log_dist=True),
+        ]
+
+        results = simulate_mixture_sweep(make_scenario("sweep", train), mixtures, n_runs=1000,
+                                         rmv_factor_resolution=100, seed=7)
+
+        assert_that(results).is_length(5)
+        for mixture, result in zip(mixtures, results):
+            expected = simulate_removal(make_scenario("serial", TreatmentTrain([
+                train[0], train[1].clone(mixture=mixture), train[2]
+            ])), 1000, 100, seed=7)
+            assert_that(result.scenario.treatment_train[1].mixture).is_equal_to(mixture)
+            assert_that(np.array_equal(result.starting_concentration, expected.starting_concentration)).is_true()
+            for actual_stage, expected_stage in zip(result.intermediate_results, expected.intermediate_results):
+                assert_that(np.array_equal(actual_stage.output_concentration,
+                                           expected_stage.output_concentration)).is_true()
+                assert_that(np.array_equal(actual_stage.rmv_factors, expected_stage.rmv_factors)).is_true()
+        # the upstream treatment is only simulated once
+        assert_that(results[1].intermediate_results[0]).is_same_as(results[0].intermediate_results[0])
+
+    def test_should_reject_trains_without_dilution(self):
+        train = TreatmentTrain([Treatments.wwtt.clone(with_lit_data=False)])
+
+        assert_that(simulate_mixture_sweep).raises(ValueError).when_called_with(
+            make_scenario("no dilution", train), [Mixture(0.5, 0.05, 0, 0)]
+        )
+
+
+class TestPrefixCache(TestCase):
+
+    def setUp(self):
+        prefix_cache.clear()
+
+    def train(self, last_removal: float) -> TreatmentTrain:
+        return TreatmentTrain([
+            Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array([50, 60]))),
+            Treatments.dilsw.clone(with_lit_data=False, mixture=Mixture(0.5, 0.05, 1, 0.2)),
+            Treatments.npbk.clone(with_lit_data=False, removal=RemovalPercent(np.array([last_removal]))),
+        ])
+
+    def test_should_only_rerun_the_changed_end_of_the_train(self):
+        first = simulate_removal(make_scenario("first", self.train(20)), 1000, 100, seed=3, cache_prefixes=True)
+        second = simulate_removal(make_scenario("second", self.train(80)), 1000, 100, seed=3, cache_prefixes=True)
+        expected = simulate_removal(make_scenario("expected", self.train(80)), 1000, 100, seed=3)
+
+        assert_that(second.intermediate_results[1]).is_same_as(first.intermediate_results[1])
+        assert_that(second.intermediate_results[2]).is_not_same_as(first.intermediate_results[2])
+        for actual_stage, expected_stage in zip(second.intermediate_results, expected.intermediate_results):
+            assert_that(np.array_equal(actual_stage.output_concentration,
+                                       expected_stage.output_concentration)).is_true()
+            assert_that(np.array_equal(actual_stage.rmv_factors, expected_stage.rmv_factors)).is_true()
+
+    def test_should_not_share_stages_across_seeds_or_removal_data(self):
+        first = simulate_removal(make_scenario("first", self.train(20)), 1000, 100, seed=3, cache_prefixes=True)
+        other_seed = simulate_removal(make_scenario("seed", self.train(20)), 1000, 100, seed=4, cache_prefixes=True)
+        train = self.train(20)
+        train[0].removal = RemovalPercent(np.array([50, 61]))
+        other_removal = simulate_removal(make_scenario("removal", train), 1000, 100, seed=3, cache_prefixes=True)
+
+        assert_that(other_seed.starting_concentration).is_not_same_as(first.starting_concentration)
+        assert_that(other_removal.starting_concentration).is_same_as(first.starting_concentration)
+        assert_that(other_removal.intermediate_results[0]).is_not_same_as(first.intermediate_results[0])
@@ -0,0 +1,80 @@
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.mixture import Mixture
+from promisces.simulate_removal import SUMMARY_PERCENTILES, simulate_removal, simulate_removal_adaptive
+from tests.helpers import make_scenario, make_train
+
+
+def make_result():
+    return simulate_removal(make_scenario("summary", make_train(removal=(40., 60.))), 2000, 100, seed=0)
+
+
+class TestSimulationResult(TestCase):
+
+    def test_summary_should_match_describe(self):
+        result = make_result()
+
+        expected = result.output_c_df.describe(percentiles=list(SUMMARY_PERCENTILES)).T
+
+        assert_that(list(result.summary.output_c.columns)).is_equal_to(list(expected.columns))
+        assert_that(np.allclose(result.summary.output_c.values, expected.values)).is_true()
+        assert_that(result.summary.removal.index.tolist()).is_equal_to(["wwtt", "dilsw"])
+
+    def test_should_cache_dataframes_until_invalidated(self):
+        result = make_result()
+        output_c_df, summary = result.output_c_df, result.summary
+
+        assert_that(result.output_c_df).is_same_as(output_c_df)
+        assert_that(result.summary).is_same_as(summary)
+
+        result.invalidate_cache()
+        assert_that(result.output_c_df).is_not_same_as(output_c_df)
+        assert_that(result.summary).is_not_same_as(summary)
+
+    def test_compact_result_should_not_keep_decoded_dataframes(self):
+        result = make_result().compact()
+
+        assert_that(result.output_c_df).is_not_same_as(result.output_c_df)
+        assert_that(result.summary).is_same_as(result.summary)
+
+
+class TestSimulateRemovalAdaptive(TestCase):
+
+    def test_should_add_runs_until_the_percentiles_are_precise(self):
+        scenario = make_scenario("summary", make_train(removal=(40., 60.)))
+
+        coarse = simulate_removal_adaptive(scenario, rel_tol=0.05, exceedance_tol=1, seed=0)
+        fine = simulate_removal_adaptive(scenario, rel_tol=0.01, exceedance_tol=1, seed=0)
+
+        assert_that(coarse.convergence.converged).is_true()
+        assert_that(fine.convergence.n_runs).is_greater_than(coarse.convergence.n_runs)
+        assert_that(max(fine.convergence.percentile_precision)).is_less_than_or_equal_to(0.01)
+        assert_that(fine.n_runs).is_equal_to(fine.convergence.n_runs)
+        assert_that(fine.final_concentration).is_length(fine.n_runs)
+        assert_that(np.all(np.diff(fine.final_concentration) <= 0)).is_true()
+        # the first batches are the same for the same seed
+        assert_that(fine.convergence.history[:len(coarse.convergence.history)]).is_equal_to(
+            coarse.convergence.history
+        )
+
+    def test_should_converge_when_every_run_is_removed(self):
+        # clean surface water replaces the whole effluent
+        scenario = make_scenario("removed", make_train(mixture=Mixture(1, 0, 0, 0)))
+
+        result = simulate_removal_adaptive(scenario, exceedance_tol=1, initial_runs=500, seed=0)
+
+        assert_that(result.convergence.converged).is_true()
+        assert_that(result.n_runs).is_equal_to(500)
+        assert_that(result.convergence.percentile_precision).is_equal_to((0.0, 0.0))
+
+    def test_should_stop_at_the_budget(self):
+        scenario = make_scenario("summary", make_train(removal=(40., 60.)))
+
+        result = simulate_removal_adaptive(scenario, rel_tol=1e-6, initial_runs=500, max_runs=3000, seed=0)
+
+        assert_that(result.convergence.converged).is_false()
+        assert_that(result.n_runs).is_equal_to(3000)
+        assert_that([n for n, _, _ in result.convergence.history]).is_equal_to([500, 1000, 2000, 3000])
@@ -0,0 +1,195 @@
+import dataclasses as dtc
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from assertpy import assert_that
+
+from promisces.models.matrix import Matrices
+from promisces.models.mixture import Mixture
+from promisces.models.reference import Reference
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substances
+from promisces.models.treatment import Treatments, TreatmentTrain
+from promisces.simulate_removal import SimulationResult, simulate_removal, simulate_removal_adaptive
+from promisces.storage import FORMAT, METADATA_FILE, VERSION, ResultCache, load_results, save_results
+
+
+def make_result(name: str, compact: bool = False) -> SimulationResult:
+    scenario = Scenario(
+        name,
+        Matrices.rww,
+        Substances.pfoa,
+        TreatmentTrain([
+            Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array([50, 60]))),
+            Treatments.dilsw.clone(with_lit_data=False, mixture=Mixture(0.5, 0.05, 1, 0.2)),
+        ]),
+        StartingConcentration(np.array([10., 100.])),
+        Reference("test", 20, 2024, "")
+    )
+    return simulate_removal(scenario, 1000, 100, seed=1, compact=compact)
+
+
+class TestStorage(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_should_round_trip_arrays_and_scenario(self):
+        result = make_result("round trip")
+        path = os.path.join(self.tmp.name, "result")
+
+        result.save(path)
+        loaded = SimulationResult.load(path)
+
+        assert_that(loaded.starting_concentration).is_instance_of(np.memmap)
+        assert_that(np.array_equal(loaded.starting_concentration, result.starting_concentration)).is_true()
+        for actual, expected in zip(loaded.intermediate_results, result.intermediate_results):
+            assert_that(np.array_equal(actual.output_concentration, expected.output_concentration)).is_true()
+            assert_that(np.array_equal(actual.rmv_factors, expected.rmv_factors)).is_true()
+            assert_that(actual.process_type).is_equal_to(expected.process_type)
+            assert_that(actual.dominant_distribution).is_equal_to(expected.dominant_distribution)
+        scenario = loaded.scenario
+        assert_that(scenario.name).is_equal_to("round trip")
+        assert_that(scenario.input_matrix).is_equal_to(Matrices.rww)
+        assert_that([t.id for t in scenario.treatment_train]).is_equal_to(["wwtt", "dilsw"])
+        assert_that(scenario.treatment_train[1].mixture).is_equal_to(Mixture(0.5, 0.05, 1, 0.2))
+        assert_that(scenario.reference).is_equal_to(Reference("test", 20, 2024, ""))
+        assert_that(loaded.summary.output_c.equals(result.summary.output_c)).is_true()
+        assert_that(loaded.timings).is_equal_to(result.timings).is_not_empty()
+
+    def test_should_round_trip_a_reference_without_year(self):
+        result = make_result("literature reference")
+        # a blank year of the literature table is read as pd.NA, blank comments as NaN
+        result.scenario.reference = Reference("lit", np.float64(20.), pd.NA, float("nan"))
+        path = os.path.join(self.tmp.name, "reference")
+
+        result.save(path)
+        reference = SimulationResult.load(path).scenario.reference
+
+        assert_that(reference.id).is_equal_to("lit")
+        assert_that(reference.ref_value_ng_l).is_equal_to(20.)
+        assert_that(reference.year).is_same_as(pd.NA)
+        assert_that(reference.comments).is_same_as(pd.NA)
+
+    def test_should_keep_compact_arrays(self):
+        result = make_result("compact", compact=True)
+        path = os.path.join(self.tmp.name, "compact")
+
+        result.save(path)
+        loaded = SimulationResult.load(path, mmap=False)
+
+        assert_that(loaded.is_compact).is_true()
+        assert_that(loaded.intermediate_results[0].stored_rmv_factors.dtype).is_equal_to(np.uint16)
+        assert_that(np.array_equal(loaded.final_concentration, result.final_concentration)).is_true()
+
+    def test_should_load_results_of_a_directory_on_access(self):
+        save_results([make_result("first"), make_result("second")], self.tmp.name)
+
+        results = load_results(self.tmp.name)
+
+        assert_that(results.names).is_equal_to(["first", "second"])
+        assert_that(results._loaded).is_empty()
+        assert_that(results[-1].scenario.name).is_equal_to("second")
+        assert_that(results._loaded).contains_key(1).does_not_contain_key(0)
+        assert_that([r.scenario.name for r in results]).is_equal_to(["first", "second"])
+
+    def test_should_keep_the_convergence_of_adaptive_runs(self):
+        result = simulate_removal_adaptive(make_result("adaptive").scenario, rel_tol=0.05, seed=0)
+        path = os.path.join(self.tmp.name, "adaptive")
+
+        result.save(path)
+
+        assert_that(SimulationResult.load(path).convergence).is_equal_to(result.convergence)
+
+
+class TestResultCache(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.scenario = make_result("cached").scenario
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scenario_digest_should_cover_treatment_data(self):
+        changed = dtc.replace(self.scenario, treatment_train=self.scenario.treatment_train.copy())
+        changed.treatment_train[1].mixture = Mixture(0.5, 0.05, 1, 0.3)
+        renamed = dtc.replace(self.scenario, name="other name")
+
+        assert_that(hash(changed.treatment_train[1])).is_equal_to(hash(self.scenario.treatment_train[1]))
+        assert_that(changed.digest()).is_not_equal_to(self.scenario.digest())
+        assert_that(renamed.digest()).is_equal_to(self.scenario.digest())
+
+    def test_treatment_digest_should_change_with_removal_and_mixture_data(self):
+        treatment = Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array([40., 60.])))
+        mixture = Treatments.dilsw.clone(with_lit_data=False, mixture=Mixture(0.5, 0.05, 1, 0.3))
+
+        assert_that(treatment.digest()).is_equal_to(treatment.clone().digest())
+        assert_that(Treatments.dwac.digest()).is_equal_to(Treatments.dwac.digest())
+        assert_that(treatment.clone(removal=RemovalPercent(np.array([40., 70.]))).digest()) \
+            .is_not_equal_to(treatment.digest())
+        assert_that(mixture.clone(mixture=Mixture(0.5, 0.1, 1, 0.3)).digest()).is_not_equal_to(mixture.digest())
+
+    def test_should_remove_the_temporary_directory_of_a_failed_write(self):
+        cache = ResultCache(self.tmp.name)
+        result = make_result("failing")
+        result.scenario.reference = Reference("test", 20, 2024, object())
+
+        with self.assertRaises(TypeError):
+            cache.put("key", result)
+        with self.assertWarns(UserWarning):
+            simulated = simulate_removal(result.scenario, 1000, 100, seed=4, cache=cache)
+
+        assert_that(os.listdir(self.tmp.name)).is_empty()
+        assert_that(simulated.final_concentration).is_length(1000)
+
+    def test_should_drop_a_broken_entry(self):
+        cache = ResultCache(self.tmp.name)
+        cache.put("truncated", make_result("truncated"))
+        cache.put("other version", make_result("other version"))
+        with open(os.path.join(self.tmp.name, "truncated", METADATA_FILE), "w") as f:
+            f.write('{"format": ')
+        with open(os.path.join(self.tmp.name, "other version", METADATA_FILE), "w") as f:
+            json.dump({"format": FORMAT, "version": VERSION + 1}, f)
+
+        assert_that(cache.get("truncated")).is_none()
+        assert_that(cache.get("other version")).is_none()
+        assert_that(os.listdir(self.tmp.name)).is_empty()
+
+    def test_should_return_stored_result_for_same_scenario_and_seed(self):
+        cache = ResultCache(self.tmp.name)
+
+        first = simulate_removal(self.scenario, 1000, 100, seed=4, cache=cache)
+        second = simulate_removal(self.scenario, 1000, 100, seed=4, cache=cache)
+        other_seed = simulate_removal(self.scenario, 1000, 100, seed=5, cache=cache)
+
+        assert_that(isinstance(first.final_concentration, np.memmap)).is_false()
+        assert_that(second.final_concentration).is_instance_of(np.memmap)
+        assert_that(np.array_equal(second.final_concentration, first.final_concentration)).is_true()
+        assert_that(second.scenario).is_same_as(self.scenario)
+        assert_that(isinstance(other_seed.final_concentration, np.memmap)).is_false()
+        assert_that(cache).is_length(2)
+
+    def test_should_evict_least_recently_used_entries(self):
+        cache = ResultCache(self.tmp.name)
+        for seed in range(3):
+            simulate_removal(self.scenario, 1000, 100, seed=seed, cache=cache)
+        entries = cache.entries()
+        os.utime(os.path.join(self.tmp.name, entries[0][0]), (0, 0))
+        oldest = cache.entries()[0][0]
+
+        cache.max_bytes = sum(nbytes for _, _, nbytes in entries) - 1
+        cache.evict()
+
+        assert_that(cache).is_length(2)
+        assert_that(cache).does_not_contain(oldest)
+        assert_that(cache.nbytes).is_less_than_or_equal_to(cache.max_bytes)
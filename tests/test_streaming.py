@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.models.matrix import Matrices
+from promisces.models.reference import Reference
+from promisces.models.removal_percent import RemovalPercent
+from promisces.models.scenario import Scenario
+from promisces.models.starting_concentration import StartingConcentration
+from promisces.models.substance import Substances
+from promisces.models.treatment import Treatments, TreatmentTrain
+from promisces.simulate_removal import simulate_removal
+from promisces.streaming import QuantileSketch, simulate_removal_streaming
+
+
+class TestQuantileSketch(TestCase):
+
+    def test_should_merge_chunks_within_relative_accuracy(self):
+        values = np.random.default_rng(0).lognormal(0, 3, 100_000)
+        first, second = QuantileSketch(1e-3), QuantileSketch(1e-3)
+        first.add(values[:30_000])
+        second.add(values[30_000:])
+        first.merge(second)
+
+        percentiles = np.array([0.01, 0.5, 0.95, 0.999])
+        expected = np.quantile(values, percentiles, method="lower")
+        assert_that(np.abs(first.quantile(percentiles) / expected - 1).max()).is_less_than_or_equal_to(1e-3)
+        assert_that(first.count).is_equal_to(100_000)
+        assert_that(first.mean).is_close_to(values.mean(), 1e-9)
+
+
+class TestSimulateRemovalStreaming(TestCase):
+
+    def test_should_match_single_run_percentiles(self):
+        scenario = Scenario(
+            "streaming",
+            Matrices.rww,
+            Substances.pfoa,
+            TreatmentTrain([
+                Treatments.wwtt.clone(with_lit_data=False, removal=RemovalPercent(np.array([40, 60, 70]))),
+                Treatments.wwuf.clone(with_lit_data=False),
+            ]),
+            StartingConcentration(np.array([10., 100.])),
+            Reference("test", 20, 2024, "")
+        )
+
+        single = simulate_removal(scenario, 200_000, 100, seed=1)
+        streamed = simulate_removal_streaming(scenario, 200_000, 100, chunk_size=10_000, seed=1)
+
+        final = streamed.percentiles().loc["wwuf"]
+        # same labels as `pd.DataFrame.describe`
+        assert_that(list(final.index)).is_equal_to(
+            ["count", "mean", "std", "min", "50%", "75%", "90%", "95%", "97.5%", "99%", "max"]
+        )
+        for p, column in ((0.5, "50%"), (0.95, "95%")):
+            assert_that(final[column]).is_close_to(np.quantile(single.final_concentration, p), 0.5)
+        assert_that(streamed.exceedance_probability().loc["wwuf", 20.]).is_close_to(
+            (single.final_concentration > 20).mean(), 0.01
+        )
@@ -0,0 +1,72 @@
+from unittest import TestCase
+
+import numpy as np
+from assertpy import assert_that
+
+from promisces.simulate_removal import simulate_removal
+from promisces.timing import StageHook, StageTimer, add_stage_hook, remove_stage_hook, stage
+from tests.helpers import make_scenario
+
+
+class RecordingHook(StageHook):
+
+    def __init__(self):
+        self.events = []
+
+    def start(self, name: str):
+        self.events += [("start", name)]
+
+    def end(self, timing):
+        self.events += [("end", timing.stage)]
+
+
+class TestStageTimer(TestCase):
+
+    def test_should_not_record_without_active_timer(self):
+        timer = StageTimer()
+        with stage("outside") as timing:
+            timing.n_samples = 10
+
+        assert_that(timer.timings).is_empty()
+
+    def test_should_name_nested_stages_after_parent(self):
+        timer = StageTimer()
+        with timer.active():
+            with stage("outer") as outer:
+                with stage("inner") as inner:
+                    inner.nbytes = 8
+            with stage("next"):
+                pass
+
+        assert_that([t.stage for t in timer.timings]).is_equal_to(["outer", "outer/inner", "next"])
+        assert_that(outer.seconds).is_greater_than_or_equal_to(inner.seconds)
+        assert_that(timer.to_frame()["nbytes"].tolist()).is_equal_to([0, 8, 0])
+
+    def test_should_call_hooks_around_stages(self):
+        hook = RecordingHook()
+        add_stage_hook(hook)
+        try:
+            with StageTimer().active():
+                with stage("a"):
+                    with stage("b"):
+                        pass
+        finally:
+            remove_stage_hook(hook)
+
+        assert_that(hook.events).is_equal_to([("start", "a"), ("start", "a/b"), ("end", "a/b"), ("end", "a")])
+
+
+class TestSimulationTimings(TestCase):
+
+    def test_should_time_every_treatment(self):
+        scenario = make_scenario()
+        result = simulate_removal(scenario, 1000, 100, seed=0)
+
+        stages = [t.stage for t in result.timings]
+        assert_that(stages[:2]).is_equal_to(["literature", "input"])
+        for treatment in scenario.treatment_train:
+            assert_that(stages).contains(treatment.id)
+        top_level = [t for t in result.timings[1:] if "/" not in t.stage]
+        assert_that({t.n_samples for t in top_level}).is_equal_to({1000})
+        assert_that(all(t.nbytes > 0 for t in top_level)).is_true()
+        assert_that(np.all([t.seconds >= 0 for t in result.timings])).is_true()